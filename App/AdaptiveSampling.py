@@ -0,0 +1,69 @@
+import numpy as np
+
+
+def adaptive_angles(evaluate, start, stop, initial_samples=33, tolerance_db=0.5, floor_db=-40.0, max_passes=16, min_step=1e-3):
+    """Sample evaluate(angles) on a non-uniform grid that is dense only where the pattern needs it.
+
+    Starting from a uniform grid, every interval is split at its midpoint and the midpoint value is compared with the
+    straight line between the interval's ends in dB (clipped at floor_db below the peak). Intervals whose error exceeds
+    tolerance_db keep being refined on the next pass, so samples concentrate around nulls and lobe peaks while smooth
+    regions stay coarse. All midpoints of one pass are evaluated in a single vectorized call.
+
+    The clipped comparison cannot tell a null at -40 dB from one at -80 dB, so every local minimum is then bracketed:
+    both intervals around it are halved, pass after pass, until they are narrower than min_step. The deepest sample of
+    each null is therefore within min_step of its location.
+
+    Returns (angles, values), sorted by angle.
+    """
+    angles = np.linspace(start, stop, max(int(initial_samples), 3))
+    values = np.asarray(evaluate(angles), dtype=np.float64)
+    active = np.ones(len(angles) - 1, dtype=bool)  # Intervals still to be refined
+
+    for _ in range(max_passes):
+        left = np.flatnonzero(active & (np.diff(angles) > min_step))
+        if left.size == 0:
+            break
+
+        midpoints = (angles[left] + angles[left + 1]) / 2
+        midpoint_values = np.asarray(evaluate(midpoints), dtype=np.float64)
+
+        reference = max(values.max(), midpoint_values.max())
+        to_db = lambda v: 10 * np.log10(np.maximum(v / reference, 10 ** (floor_db / 10))) if reference > 0 else np.zeros_like(v)
+        interpolated_db = (to_db(values[left]) + to_db(values[left + 1])) / 2
+        needs_refinement = np.abs(to_db(midpoint_values) - interpolated_db) > tolerance_db
+
+        # Insert the midpoints; both halves of an interval that failed the test stay active
+        insert_at = left + 1
+        angles = np.insert(angles, insert_at, midpoints)
+        values = np.insert(values, insert_at, midpoint_values)
+        new_active = np.zeros(len(angles) - 1, dtype=bool)
+        new_left = left + np.arange(left.size)  # Position of each refined interval's left end after insertion
+        new_active[new_left] = needs_refinement
+        new_active[new_left + 1] = needs_refinement
+        active = new_active
+
+    return bracket_minima(evaluate, angles, values, min_step)
+
+
+def bracket_minima(evaluate, angles, values, min_step=1e-3, max_passes=64):
+    # Halve the two intervals around every interior local minimum until both are narrower than min_step
+    for _ in range(max_passes):
+        minima = np.flatnonzero((values[1:-1] < values[:-2]) & (values[1:-1] <= values[2:])) + 1
+        minima = minima[(angles[minima] - angles[minima - 1] > min_step) | (angles[minima + 1] - angles[minima] > min_step)]
+        if minima.size == 0:
+            break
+
+        # Midpoints of the intervals on both sides; an interval already shared by two neighbouring minima is split once
+        left = np.unique(np.concatenate((minima - 1, minima)))
+        left = left[angles[left + 1] - angles[left] > min_step]
+        midpoints = (angles[left] + angles[left + 1]) / 2
+        angles = np.insert(angles, left + 1, midpoints)
+        values = np.insert(values, left + 1, np.asarray(evaluate(midpoints), dtype=np.float64))
+    return angles, values
+
+
+def initial_sample_count(aperture_wavelengths, span_degrees=180, minimum=33, samples_per_lobe=4):
+    # Lobes are about one wavelength / aperture apart in sin(angle), and sin(angle) changes fastest at broadside, where a
+    # step of one radian moves it by one. Uniform angle steps of 1 / (samples_per_lobe * aperture) radians therefore
+    # give every lobe at least samples_per_lobe samples
+    return max(minimum, int(np.ceil(samples_per_lobe * aperture_wavelengths * np.radians(span_degrees))) + 1)
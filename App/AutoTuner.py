@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import platform
+import time
+import uuid
+
+import numpy as np
+
+from App.Scenarios import SCENARIO_SETTINGS
+from App.SimpleSimulation import BeamformingSimulator
+
+# Settings of the exact computation; every approximation is measured against these
+DEFAULT_SETTINGS = {'grid_scale': 1.0, 'precision': 'float64', 'far_field': False, 'chunk_size': None}
+
+GRID_SCALES = (1.0, 0.5, 0.25)
+PRECISIONS = ('float64', 'float32')
+CHUNK_SIZES = (None, 4096, 16384, 65536)
+MINIMUM_RESOLUTION = 16
+
+
+def machine_fingerprint():
+    # A profile is only trusted on the machine (and numerical stack) that measured it
+    return {'node': platform.node(), 'machine': platform.machine(), 'processor': platform.processor(),
+            'cpus': os.cpu_count(), 'numpy': np.__version__}
+
+
+def configuration_class(arrays_info, resolution):
+    """Tuning key: total element count rounded up to a power of two, array count and display grid size."""
+    elements = sum(info['num_elements'] * info.get('rows', 1) for info in arrays_info)
+    bucket = 1 << max(elements - 1, 0).bit_length()
+    return f"elements={bucket}/arrays={len(arrays_info)}/grid={resolution}"
+
+
+def tuned_resolution(resolution, settings):
+    return max(MINIMUM_RESOLUTION, int(round(resolution * settings['grid_scale'])))
+
+
+def resample(intensity, x, y, x_target, y_target):
+    # Bilinear resampling onto the reference grid, one axis at a time
+    rows = np.array([np.interp(x_target, x, row) for row in intensity])
+    return np.array([np.interp(y_target, y, column) for column in rows.T]).T
+
+
+class AutoTuner:
+    def __init__(self, profile_path=os.path.join("Profiles", "Tuning.json"), repeats=3, basis_max_entries=8_000_000):
+        """Benchmarks the simulator's approximations and remembers the fastest accurate one per configuration class.
+
+        Candidates are timed on the evaluation the GUI pipeline runs: a per-element propagation basis and one matrix product
+        while elements x grid points fit in basis_max_entries (the pipeline's limit), and the basis-free evaluation, where
+        the chunk size applies, beyond it. The error of a candidate is the largest absolute difference between its
+        normalized intensity map, resampled to the full grid, and a float64 exact reference. Choices are persisted in
+        profile_path together with the machine they were measured on, so a later session on the same machine starts tuned.
+        """
+        self.profile_path = profile_path
+        self.repeats = repeats
+        self.basis_max_entries = basis_max_entries
+        self.profile = self.load_profile()
+
+    # Profile ------------------------------------------------------------------------------------------------------------------------------
+
+    def load_profile(self):
+        empty = {'machine': machine_fingerprint(), 'classes': {}}
+        try:
+            with open(self.profile_path, encoding='utf-8') as profile_file:
+                profile = json.load(profile_file)
+        except (FileNotFoundError, ValueError, OSError):
+            return empty
+        return profile if profile.get('machine') == empty['machine'] else empty
+
+    def save_profile(self):
+        profile_directory = os.path.dirname(self.profile_path)
+        if profile_directory and not os.path.exists(profile_directory):
+            os.makedirs(profile_directory)
+        temporary_path = f"{self.profile_path}.{uuid.uuid4().hex}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as profile_file:
+            json.dump(self.profile, profile_file, indent=2)
+        os.replace(temporary_path, self.profile_path)
+
+    def lookup(self, arrays_info, resolution):
+        """Tuned settings for this configuration class, or the exact defaults when it has not been tuned."""
+        entry = self.profile['classes'].get(configuration_class(arrays_info, resolution))
+        return dict(DEFAULT_SETTINGS, **entry['settings']) if entry else dict(DEFAULT_SETTINGS)
+
+    # Benchmarking -------------------------------------------------------------------------------------------------------------------------
+
+    def uses_basis(self, model, resolution):
+        return len(model.all_element_positions()) * resolution * resolution <= self.basis_max_entries
+
+    def render(self, model, x_range, y_range, resolution, settings):
+        # The normalized map as the pipeline's propagation and field stages compute it for these settings
+        resolution = tuned_resolution(resolution, settings)
+        x = np.linspace(x_range[0], x_range[1], resolution)
+        y = np.linspace(y_range[0], y_range[1], resolution)
+        X, Y = np.meshgrid(x, y)
+        positions = model.all_element_positions()
+        amplitudes = model.all_element_amplitudes()
+        directivity = model.element_directivity()
+        if self.uses_basis(model, resolution):
+            basis = BeamformingSimulator.element_basis(positions, X, Y, model.k, settings['precision'], settings['far_field'], directivity)
+            weights = BeamformingSimulator.steering_weights(positions, model.k, model.steering_angle, amplitudes)
+            field = BeamformingSimulator.field_from_basis(basis, weights).reshape(X.shape)
+        else:
+            field = BeamformingSimulator.unbatched_field(positions, X, Y, model.k, model.steering_angle, settings['precision'], amplitudes,
+                                                         settings['chunk_size'], settings['far_field'], directivity=directivity)
+        return x, y, BeamformingSimulator.normalized_intensity(field)
+
+    def measure(self, model, x_range, y_range, resolution, settings):
+        # Every repeat builds the basis afresh, as the pipeline does after a geometry, frequency or setting change
+        timings = []
+        for _ in range(self.repeats):
+            start = time.perf_counter()
+            x, y, intensity = self.render(model, x_range, y_range, resolution, settings)
+            timings.append(time.perf_counter() - start)
+        return min(timings) * 1000, (x, y, intensity)
+
+    def benchmark(self, model, x_range, y_range, resolution, progress=None):
+        """Time every candidate and measure its error against the exact reference; returns result dicts, fastest first.
+
+        Chunk sizes only change speed, so they are timed once on the exact computation and the fastest is carried into
+        the accuracy-changing candidates (grid scale x precision x far field) rather than multiplying their number. They
+        are not timed at all when the full grid is evaluated through the basis, where they have no effect.
+        """
+        reference_ms, (x_ref, y_ref, reference) = self.measure(model, x_range, y_range, resolution, DEFAULT_SETTINGS)
+        results = [{'settings': dict(DEFAULT_SETTINGS), 'ms': reference_ms, 'error': 0.0, 'basis': self.uses_basis(model, resolution)}]
+        if progress is not None:
+            progress(results[0])
+
+        chunk_sizes = () if self.uses_basis(model, resolution) else CHUNK_SIZES[1:]
+        for chunk_size in chunk_sizes:
+            settings = dict(DEFAULT_SETTINGS, chunk_size=chunk_size)
+            milliseconds, (_, _, intensity) = self.measure(model, x_range, y_range, resolution, settings)
+            results.append({'settings': settings, 'ms': milliseconds, 'error': float(np.abs(intensity - reference).max()), 'basis': False})
+            if progress is not None:
+                progress(results[-1])
+        best_chunk_size = min(results, key=lambda result: result['ms'])['settings']['chunk_size']
+
+        for grid_scale in GRID_SCALES:
+            for precision in PRECISIONS:
+                for far_field in (False, True):
+                    settings = {'grid_scale': grid_scale, 'precision': precision, 'far_field': far_field, 'chunk_size': best_chunk_size}
+                    if settings == DEFAULT_SETTINGS or any(result['settings'] == settings for result in results):
+                        continue
+                    milliseconds, (x, y, intensity) = self.measure(model, x_range, y_range, resolution, settings)
+                    if intensity.shape != reference.shape:
+                        intensity = resample(intensity, x, y, x_ref, y_ref)
+                    results.append({'settings': settings, 'ms': milliseconds, 'error': float(np.abs(intensity - reference).max()),
+                                    'basis': self.uses_basis(model, tuned_resolution(resolution, settings))})
+                    if progress is not None:
+                        progress(results[-1])
+
+        return sorted(results, key=lambda result: result['ms'])
+
+    def tune(self, model, x_range, y_range, resolution, tolerance, progress=None):
+        """Benchmark, keep the fastest candidate within tolerance, record it in the profile and return its entry."""
+        results = self.benchmark(model, x_range, y_range, resolution, progress)
+        reference = next(result for result in results if result['settings'] == DEFAULT_SETTINGS)
+        chosen = next(result for result in results if result['error'] <= tolerance)
+        entry = {
+            'settings': chosen['settings'],
+            'tolerance': tolerance,
+            'error': chosen['error'],
+            'basis': chosen['basis'],
+            'ms': round(chosen['ms'], 3),
+            'reference_ms': round(reference['ms'], 3),
+            'tuned_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self.profile['classes'][configuration_class(model.arrays_info, resolution)] = entry
+        self.save_profile()
+        return entry, results
+
+
+def describe(settings, basis=False):
+    # basis: whether the pipeline evaluates these settings through its cached propagation basis, where chunk_size has no effect
+    if basis:
+        chunk = 'cached basis'
+    elif settings['chunk_size'] is None:
+        chunk = 'whole grid' if settings['far_field'] else 'element loop'
+    else:
+        chunk = f"chunks of {settings['chunk_size']}"
+    return (f"grid x{settings['grid_scale']:g}, {settings['precision']}, {'far field' if settings['far_field'] else 'exact'}, "
+            f"{chunk}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the simulator's speed/accuracy settings for a configuration on this machine.")
+    parser.add_argument('--scenario', choices=list(SCENARIO_SETTINGS), default='5G')
+    parser.add_argument('--arrays', type=int, default=1)
+    parser.add_argument('--elements', type=int, help="Elements per array (defaults to the scenario's)")
+    parser.add_argument('--resolution', type=int, default=200)
+    parser.add_argument('--tolerance', type=float, default=0.01, help="Largest accepted error in normalized intensity")
+    parser.add_argument('--profile', default=os.path.join("Profiles", "Tuning.json"))
+    arguments = parser.parse_args()
+
+    scenario = SCENARIO_SETTINGS[arguments.scenario]
+    array_info = {
+        'num_elements': arguments.elements or scenario['num_elements'],
+        'spacing': scenario['elements_spacing'] * 3e8 / scenario['frequency'],
+        'curvature': scenario['curvature'],
+    }
+    model = BeamformingSimulator(scenario['frequency'], 0, [array_info] * arguments.arrays)
+
+    tuner = AutoTuner(arguments.profile)
+    entry, results = tuner.tune(model, (-10, 10), (0, 10), arguments.resolution, arguments.tolerance,
+                                progress=lambda result: print(f"  {describe(result['settings'], result['basis']):<55} {result['ms']:9.1f} ms  "
+                                                              f"error {result['error']:.2e}"))
+    print(f"Selected {describe(entry['settings'], entry['basis'])}: {entry['ms']:.1f} ms against {entry['reference_ms']:.1f} ms exact, "
+          f"error {entry['error']:.2e} (tolerance {arguments.tolerance:g})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,74 +1,132 @@
-from PyQt5 import QtWidgets, QtGui
+import os
+import time
+
+from PyQt5 import QtWidgets, QtGui, QtCore
 
 import numpy as np
 
 from App.UI.Design import Ui_MainWindow
+from App.UI.VolumeSliceViewer import VolumeJob, VolumeSliceViewer
+from App.UI.PipelineDebugView import PipelineDebugView
+from App.UI.TiledIntensityView import TiledIntensityView
+from App.UI.TaperComparisonView import TaperComparisonView
+from App.UI.MultiBeamView import MultiBeamView
+from App.UI.ImagingView import ImagingView
+from App.UI.QuantizationView import QuantizationView
 from App.Logging_Manager import LoggingManager
-from App.SimpleSimulation import BeamformingSimulator
+from App.SimpleSimulation import BeamformingSimulator, GEOMETRY_KEYS, PATTERN_KEYS, TAPER_KEYS
+from App.ResultCache import ResultCache
+from App.Prewarmer import Prewarmer
+from App.Pipeline import Pipeline
+from App.MultiBeam import MultiBeamField
+from App.Coupling import coupled_weights, factorize
+from App.Scenarios import SCENARIO_SETTINGS, SCENARIO_CYCLE
+from App.Tapers import TAPERS
+from App.Directivity import ELEMENT_PATTERNS, SELECTABLE_PATTERNS
+from App.AutoTuner import AutoTuner, tuned_resolution, describe
+from App.InteractionTrace import TraceRecorder
+from App.Exporter import export_scene
 
 
 class MainController:
-    def __init__(self, app):
+    SCENARIO_SETTINGS = SCENARIO_SETTINGS
+    SCENARIO_CYCLE = SCENARIO_CYCLE
+
+    # Simulation grid and beam profile sampling shared by the display, cache keys and prewarming
+    X_RANGE = (-10, 10)
+    Y_RANGE = (0, 10)
+    RESOLUTION = 200
+    # Beam profile angles (in degrees), sampled adaptively so nulls and lobes are resolved without a dense uniform grid
+    BEAM_PROFILE_SAMPLING = {'start': -90, 'stop': 90, 'tolerance_db': 0.5}
+    BASIS_MAX_ENTRIES = 8_000_000  # Elements x grid points kept as a cached propagation basis (about 128 MB complex)
+    AUTO_TUNE_TOLERANCE = 0.01  # Default error tolerance offered by the auto-tuner, in normalized intensity
+    VOLUME_SHAPE = (100, 100, 50)  # (nx, ny, nz) samples of the volumetric field
+    VOLUME_Z_RANGE = (-5, 5)
+
+    def __init__(self, app, trace_path=None, cache_directory="Cache"):
         self.app = app
         self.main_window = QtWidgets.QMainWindow()
 
         self.view = Ui_MainWindow()
 
         self.logging = LoggingManager()
+        # Optional recording of every UI parameter event, for headless replay with App.TraceReplay
+        self.trace_recorder = TraceRecorder(trace_path) if trace_path else None
+        self.result_cache = ResultCache(cache_directory)
+        self.prewarmer = Prewarmer(self.result_cache, logging=self.logging)
+        self.auto_tuner = AutoTuner(basis_max_entries=self.BASIS_MAX_ENTRIES)  # Timed on the evaluation the pipeline runs
+        self.auto_tune_tolerance = self.AUTO_TUNE_TOLERANCE
+        self.pipeline = self.build_pipeline()
+        self.pipeline_debug_view = PipelineDebugView()
+        self.tiled_view = None
+        self.imaging_view = None
+        self.volume_viewer = None
+        self.volume_job = None
+        self.thread_pool = QtCore.QThreadPool()
+        self.taper_comparison_view = TaperComparisonView()
+        self.taper_comparison_view.selectionChanged.connect(self.update_taper_comparison)
+        self.multi_beam = MultiBeamField()
+        self.multi_beam_view = MultiBeamView()
+        self.quantization_view = QuantizationView()
 
         self.initialize_view()
         self.initialize_arrays_info()
 
     def initialize_view(self):
         self.view.setupUi(self.main_window)
-        self.view.scenarios_button.clicked.connect(self.toggle_scenario)
+        self.view.scenarios_button.clicked.connect(self.traced('scenario', lambda: self.next_scenario(self.current_scenario),
+                                                               self.toggle_scenario))
         self.current_scenario = None
 
-        self.view.arrays_number_SpinBox.valueChanged.connect(self.update_current_arrays_number)
-        self.view.elements_number_SpinBox.valueChanged.connect(self.update_current_elements_number)
-        self.view.elements_spacing_slider.valueChanged.connect(self.update_elements_spacing)
-        self.view.array_curve_slider.valueChanged.connect(self.update_elements_curvature)
-
-        self.view.toggle_sidebar_button.clicked.connect(self.toggle_sidebar)
-
-        self.view.steering_angle_slider.sliderReleased.connect(self.update_steering_angle)
-        self.view.operating_frequency_combobox.currentIndexChanged.connect(self.update_operating_frequency)
+        self.view.arrays_number_SpinBox.valueChanged.connect(self.traced('arrays_number', self.view.arrays_number_SpinBox.value,
+                                                                         self.update_current_arrays_number))
+        self.view.elements_number_SpinBox.valueChanged.connect(self.traced('elements_number', self.view.elements_number_SpinBox.value,
+                                                                           self.update_current_elements_number))
+        self.view.elements_spacing_slider.valueChanged.connect(self.traced('elements_spacing', self.view.elements_spacing_slider.value,
+                                                                           self.update_elements_spacing))
+        self.view.array_curve_slider.valueChanged.connect(self.traced('curvature', self.view.array_curve_slider.value,
+                                                                      self.update_elements_curvature))
+        self.view.rows_SpinBox.valueChanged.connect(self.traced('rows', self.view.rows_SpinBox.value, self.update_rows))
+        # The view toggles the selection itself; the recorder only needs the resulting state
+        self.view.current_selected_array_button.clicked.connect(self.traced(
+            'array_selection', lambda: [self.view.current_selected_array, self.view.current_selected_ALL_array], lambda: None))
+
+        self.view.toggle_sidebar_button.clicked.connect(self.traced('sidebar', lambda: not self.view.sidebar.isVisible(), self.toggle_sidebar))
+
+        self.view.steering_angle_slider.sliderReleased.connect(self.traced('steering_angle', self.view.steering_angle_slider.value,
+                                                                           self.update_steering_angle))
+        self.view.operating_frequency_combobox.currentIndexChanged.connect(self.traced(
+            'operating_frequency', self.view.operating_frequency_combobox.currentIndex, self.update_operating_frequency))
+        self.view.taper_combobox.currentIndexChanged.connect(self.traced('taper', self.view.taper_combobox.currentIndex, self.update_taper))
+        self.view.element_pattern_combobox.currentIndexChanged.connect(self.traced(
+            'element_pattern', self.view.element_pattern_combobox.currentIndex, self.update_element_pattern))
+        self.view.coupling_button.toggled.connect(self.traced('coupling', self.view.coupling_button.isChecked, self.update_coupling))
+        self.view.compare_tapers_button.clicked.connect(self.show_taper_comparison)
+        self.view.multi_beam_button.clicked.connect(self.show_multi_beam)
+        self.multi_beam_view.beamsChanged.connect(self.traced('multi_beam', self.multi_beam_view.beams, self.update_multi_beam))
+        self.view.quantization_button.clicked.connect(self.show_quantization)
+        self.quantization_view.settingsChanged.connect(self.traced('phase_quantization', lambda: list(self.quantization_view.settings()),
+                                                                   self.update_quantization))
+        self.view.volume_view_button.clicked.connect(self.show_volume_view)
+        self.view.tiled_view_button.clicked.connect(self.show_tiled_view)
+        self.view.imaging_button.clicked.connect(self.show_imaging_view)
+        self.view.export_button.clicked.connect(self.export_current_view)
+        self.view.auto_tune_button.clicked.connect(self.auto_tune)
 
         self.view.quit_app_button.clicked.connect(self.close_application)
+        QtWidgets.QShortcut(QtGui.QKeySequence("Ctrl+D"), self.main_window, self.toggle_pipeline_debug_view)
 
-    def toggle_scenario(self):
-        scenario_settings = {
-            '5G': {
-                'frequency': 3.5e9,
-                'elements_spacing': 0.25,
-                'curvature': 0,
-                'num_elements': 16
-            },
-            'Ultrasound': {
-                'frequency': 5e6,
-                'elements_spacing': 0.5,
-                'curvature': 180,
-                'num_elements': 32
-            },
-            'Tumor Ablation': {
-                'frequency': 20e6,
-                'elements_spacing': 0.1,
-                'curvature': 90,
-                'num_elements': 64
-            }
-        }
+    def traced(self, event, value, slot):
+        # Without a recorder the slot is connected unchanged
+        return slot if self.trace_recorder is None else self.trace_recorder.wrap(event, value, slot)
 
+    def toggle_scenario(self):
         previous_scenario = self.current_scenario
-        if self.current_scenario is None or self.current_scenario == 'Tumor Ablation':
-            self.current_scenario = '5G'
-        elif self.current_scenario == '5G':
-            self.current_scenario = 'Ultrasound'
-        else:
-            self.current_scenario = 'Tumor Ablation'
+        self.current_scenario = self.next_scenario(self.current_scenario)
 
         self.logging.log(f"Switching scenario from {previous_scenario} to {self.current_scenario}")
 
-        scenario = scenario_settings[self.current_scenario]
+        scenario = self.SCENARIO_SETTINGS[self.current_scenario]
 
         self.view.current_operating_frequency = scenario['frequency']
         self.model.update_operating_frequency(self.view.current_operating_frequency)
@@ -76,20 +134,26 @@ class MainController:
         self.view.current_elements_spacing = scenario['elements_spacing'] * self.model.wavelength
         self.view.current_array_curvature_angle = scenario['curvature']
         self.view.elements_number_SpinBox.setValue(scenario['num_elements'])
+        # valueChanged does not fire when the element count is unchanged, so apply spacing and curvature explicitly
+        self.view.current_elements_number = scenario['num_elements']
+        self.view.updateVisualization()
 
         self.logging.log(
-            f"""
-            Updated scenario settings to {self.current_scenario} 
-            Frequency: {self.view.format_frequency(scenario['frequency'])},
-            Element Spacing:{scenario['elements_spacing']} * wavelength, 
-            Curvature: {scenario['curvature']}, 
-            Number of Elements: {scenario['num_elements']}
-            """
+            f"Updated scenario settings to {self.current_scenario}: "
+            f"Frequency: {self.view.format_frequency(scenario['frequency'])}, "
+            f"Element Spacing: {scenario['elements_spacing']} * wavelength, "
+            f"Curvature: {scenario['curvature']}, "
+            f"Number of Elements: {scenario['num_elements']}"
         )
 
         self.view.scenarios_button.setText(self.current_scenario)
         self.update_and_refresh_arrays_info()
 
+    def next_scenario(self, scenario):
+        if scenario is None:
+            return self.SCENARIO_CYCLE[0]
+        return self.SCENARIO_CYCLE[(self.SCENARIO_CYCLE.index(scenario) + 1) % len(self.SCENARIO_CYCLE)]
+
     def toggle_sidebar(self):
         # Toggle the visibility of the sidebar
         self.view.sidebar.setVisible(not self.view.sidebar.isVisible())
@@ -106,71 +170,354 @@ class MainController:
         self.view.toggle_sidebar_button.setIcon(icon)
 
     def initialize_arrays_info(self):
-        # Start with an empty list of configurations
-        self.configurations = []
-
-        # Loop over the number of arrays specified in the current_arrays_number
-        for i in range(1, self.view.current_arrays_number + 1):
-            try:
-                # Retrieve the configuration for each array
-                spacing, num_elements, curvature = self.view.visualization_widget.get_array_configuration(i)
-                # Append a new dictionary to the configurations list with the retrieved settings
-                self.configurations.append({
-                    'num_elements': num_elements,
-                    'spacing': spacing,
-                    'curvature': curvature
-                })
-            except IndexError:
-                # Handle cases where the index is out of range, potentially logging or adding default configurations
-                self.logging.log(f"Failed to retrieve configuration for array {i}, using default settings.")
-                self.configurations.append({
-                    'num_elements': 64,  # Default value if out of range
-                    'spacing': 0.5,  # Default value if out of range
-                    'curvature': 0  # Default value if out of range
-                })
+        # Start with the configurations currently shown by the visualization widget
+        self.configurations = self.read_array_configurations()
 
-        self.model = BeamformingSimulator(self.view.current_operating_frequency, self.view.current_steering_angle, self.configurations)
+        self.model = BeamformingSimulator(self.view.current_operating_frequency, self.view.current_steering_angle, self.configurations,
+                                          coupling=self.view.coupling_button.isChecked())
 
         self.apply_configurations_to_visualization()
 
     def update_and_refresh_arrays_info(self):
-        # Clear the existing configurations to ensure no outdated data is kept
-        self.configurations.clear()
+        # Replace the configurations in place so no outdated data is kept; the model shares this list
+        self.configurations[:] = self.read_array_configurations()
+
+        # Optionally update visualization widget here if necessary
+        self.apply_configurations_to_visualization()
 
-        # Reinitialize the configurations by fetching current settings from the visualization widget
+    def read_array_configurations(self, array_configs=None):
+        # Array configurations as the simulator expects them, read from the widget unless explicit ones are given
+        if array_configs is None:
+            array_configs = self.view.visualization_widget.array_configs
+
+        configurations = []
         for i in range(1, self.view.current_arrays_number + 1):
-            try:
+            if i <= len(array_configs):
                 # Retrieve the configuration for each array
-                spacing, num_elements, curvature = self.view.visualization_widget.get_array_configuration(i)
-                # Append a new dictionary to the configurations list with the retrieved settings
-                self.configurations.append({
+                spacing, num_elements, curvature = array_configs[i - 1]
+                configurations.append({
                     'num_elements': num_elements,
                     'spacing': spacing,
                     'curvature': curvature
                 })
-            except IndexError:
+                if self.view.current_taper != 'uniform':
+                    # Only tapered arrays carry the key, so uniform configurations keep their existing cache keys
+                    configurations[-1]['taper'] = self.view.current_taper
+                if self.view.current_element_pattern != 'isotropic':
+                    # Likewise only directive arrays carry the pattern
+                    configurations[-1]['element_pattern'] = self.view.current_element_pattern
+                if self.view.current_rows > 1:
+                    # And only planar arrays their rows, spaced like the elements within a row
+                    configurations[-1]['rows'] = self.view.current_rows
+            else:
                 # Handle cases where the index is out of range, potentially logging or adding default configurations
                 self.logging.log(f"Failed to retrieve configuration for array {i}, using default settings.")
-                self.configurations.append({
+                configurations.append({
                     'num_elements': 64,  # Default value if out of range
                     'spacing': 0.5,  # Default value if out of range
                     'curvature': 0  # Default value if out of range
                 })
-
-        # Optionally update visualization widget here if necessary
-        self.apply_configurations_to_visualization()
+        return configurations
 
     def apply_configurations_to_visualization(self):
-        # Assuming self.model is an instance of BeamformingSimulator
-        x_range = (-10, 10)
-        y_range = (0, 10)
-        x, y, intensity = self.model.simulate_multiple_arrays(x_range, y_range)
+        # Settings chosen by the auto-tuner for this configuration class on this machine (exact when never tuned)
+        settings = self.auto_tuner.lookup(self.configurations, self.RESOLUTION)
+        self.model.precision = settings['precision']
+        self.model.far_field = settings['far_field']
+        self.model.chunk_size = settings['chunk_size']
+
+        self.pipeline.set_params(
+            arrays_info=self.model.arrays_info,
+            # The same configurations split by what each part determines, so a taper change reuses the geometry stages
+            array_geometry=BeamformingSimulator.configuration_subset(self.model.arrays_info, GEOMETRY_KEYS),
+            array_tapers=BeamformingSimulator.configuration_subset(self.model.arrays_info, TAPER_KEYS),
+            element_patterns=BeamformingSimulator.configuration_subset(self.model.arrays_info, PATTERN_KEYS),
+            frequency=self.model.frequency,
+            steering_angle=self.model.steering_angle,
+            precision=self.model.precision,
+            far_field=self.model.far_field,
+            chunk_size=self.model.chunk_size,
+            coupling=self.model.coupling,
+            grid=(self.X_RANGE, self.Y_RANGE, tuned_resolution(self.RESOLUTION, settings)),
+            angles=self.BEAM_PROFILE_SAMPLING,
+            tapers=self.taper_comparison_view.selected_tapers(),
+            beams=self.multi_beam_view.beams(),
+            phase_quantization=self.quantization_view.settings(),
+        )
+
+        targets = ['heatmap_plot', 'beam_plot']
+        if self.taper_comparison_view.isVisible():
+            targets.append('taper_comparison')
+        if self.multi_beam_view.isVisible():
+            targets.append('multi_beam')
+        if self.quantization_view.isVisible():
+            targets.append('phase_quantization')
+
+        outputs = self.in_foreground(self.pipeline.run, targets)
+
+        self.logging.log_event('pipeline_run', stages=[{'stage': name, 'status': status, 'ms': round(milliseconds, 3)}
+                                                       for name, status, milliseconds in self.pipeline.run_log],
+                               total_ms=round(sum(milliseconds for _, _, milliseconds in self.pipeline.run_log), 3))
+        if self.pipeline_debug_view.isVisible():
+            self.pipeline_debug_view.show_run(self.pipeline.run_log)
+        if self.tiled_view is not None and self.tiled_view.isVisible():
+            self.tiled_view.set_model(self.model)
+        if self.imaging_view is not None and self.imaging_view.isVisible():
+            self.imaging_view.set_model(self.model)
+        if 'taper_comparison' in outputs:
+            self.taper_comparison_view.show_comparison(self.pipeline.params['tapers'], outputs['taper_comparison'])
+        if 'multi_beam' in outputs:
+            self.multi_beam_view.show_multi_beam(outputs['multi_beam'])
+        if 'phase_quantization' in outputs:
+            self.quantization_view.show_comparison(outputs['phase_quantization'])
+
+        self.prewarm_neighbouring_states()
+
+    # --------------------------------------------------------------------------------------------------------------------------------------
+
+    def build_pipeline(self):
+        # Each stage reruns only when a parameter or upstream stage it reads has changed
+        pipeline = Pipeline()
+        # Geometry-only configurations: positions, distances, propagation and coupling do not rerun for taper or pattern changes
+        pipeline.add_stage('geometry', lambda inputs: [dict(info) for info in inputs['array_geometry']], params=['array_geometry'])
+        pipeline.add_stage('positions', lambda inputs: self.model.all_element_positions(inputs['geometry']), dependencies=['geometry'])
+        pipeline.add_stage('coordinates', self.coordinates_stage, params=['grid'])
+        pipeline.add_stage('distances', self.distances_stage, params=['far_field'], dependencies=['positions', 'coordinates'])
+        pipeline.add_stage('directivity', lambda inputs: self.model.element_directivity(self.merged_configurations(inputs, 'element_patterns')),
+                           params=['element_patterns'], dependencies=['geometry'])
+        # Derived once per geometry and grid next to the distances; the gains are folded into the basis, so steering never revisits them
+        pipeline.add_stage('element_angles', self.element_angles_stage, params=['far_field'],
+                           dependencies=['directivity', 'positions', 'coordinates', 'distances'])
+        pipeline.add_stage('element_gains', lambda inputs: None if inputs['element_angles'] is None else
+                           inputs['directivity'].gains(inputs['element_angles']), dependencies=['directivity', 'element_angles'])
+        pipeline.add_stage('propagation', self.propagation_stage, params=['frequency', 'precision', 'far_field'],
+                           dependencies=['distances', 'positions', 'coordinates', 'element_gains'])
+        pipeline.add_stage('amplitudes', lambda inputs: self.model.all_element_amplitudes(self.merged_configurations(inputs, 'array_tapers')),
+                           params=['array_tapers'], dependencies=['geometry'])
+        # Factorized once per geometry and frequency, so a steering change only costs the triangular solve in 'phases'
+        pipeline.add_stage('coupling_factorization', lambda inputs: factorize(inputs['positions'], BeamformingSimulator.wave_number(inputs['frequency']))
+                           if inputs['coupling'] else None, params=['frequency', 'coupling'], dependencies=['positions'])
+        pipeline.add_stage('phases', self.phases_stage, params=['frequency', 'steering_angle'],
+                           dependencies=['positions', 'amplitudes', 'coupling_factorization'])
+        pipeline.add_stage('field', self.field_stage, params=['frequency', 'steering_angle', 'precision', 'far_field', 'chunk_size', 'coupling'],
+                           dependencies=['propagation', 'phases', 'positions', 'amplitudes', 'coordinates', 'directivity'])
+        pipeline.add_stage('normalization', lambda inputs: BeamformingSimulator.normalized_intensity(inputs['field']),
+                           dependencies=['field'])
+        pipeline.add_stage('array_factor', self.array_factor_stage, params=['frequency', 'steering_angle', 'angles', 'coupling'],
+                           dependencies=['geometry', 'phases', 'amplitudes', 'directivity'])
+        pipeline.add_stage('scene', self.scene_stage, params=['arrays_info', 'frequency', 'steering_angle', 'precision', 'far_field', 'coupling',
+                                                             'grid', 'angles'],
+                           dependencies=['coordinates', 'normalization', 'array_factor'])
+        pipeline.add_stage('heatmap_plot', lambda inputs: self.view.intensityMapView.set_intensity(
+            inputs['scene']['x'], inputs['scene']['y'], inputs['scene']['intensity']), dependencies=['scene'])
+        pipeline.add_stage('beam_plot', lambda inputs: self.model.plot_beam_profile(
+            inputs['scene']['angles'], inputs['scene']['array_factor'], self.view.beamProfileCanvas), dependencies=['scene'])
+        # Only run while the comparison window is open; shares the cached propagation basis with the main field
+        pipeline.add_stage('taper_comparison', self.taper_comparison_stage, params=['frequency', 'steering_angle', 'precision', 'far_field',
+                                                                                   'chunk_size', 'angles', 'tapers'],
+                           dependencies=['geometry', 'positions', 'propagation', 'coordinates', 'coupling_factorization', 'directivity'])
+        # Only run while the multi-beam window is open; beams whose (angle, power) did not change keep their field rows
+        pipeline.add_stage('multi_beam', self.multi_beam_stage, params=['frequency', 'precision', 'far_field', 'chunk_size', 'beams'],
+                           dependencies=['geometry', 'positions', 'amplitudes', 'propagation', 'coordinates', 'coupling_factorization',
+                                         'directivity'])
+        # Only run while the quantization window is open; always the exact element loop, so the timings compare like with like
+        pipeline.add_stage('phase_quantization', self.phase_quantization_stage,
+                           params=['arrays_info', 'frequency', 'steering_angle', 'precision', 'coupling', 'grid', 'phase_quantization'])
+        return pipeline
+
+    def coordinates_stage(self, inputs):
+        x_range, y_range, resolution = inputs['grid']
+        x = np.linspace(x_range[0], x_range[1], resolution)
+        y = np.linspace(y_range[0], y_range[1], resolution)
+        X, Y = np.meshgrid(x, y)
+        return {'x': x, 'y': y, 'X': X, 'Y': Y}
+
+    def distances_stage(self, inputs):
+        positions = inputs['positions']
+        grid = inputs['coordinates']
+        if inputs['far_field'] or len(positions) * grid['X'].size > self.BASIS_MAX_ENTRIES:
+            return None  # Not needed by the far-field basis, or too large to cache per element
+        return BeamformingSimulator.distance_field(positions, grid['X'], grid['Y'])
+
+    def element_angles_stage(self, inputs):
+        directivity = inputs['directivity']
+        positions = inputs['positions']
+        grid = inputs['coordinates']
+        if directivity is None or len(positions) * grid['X'].size > self.BASIS_MAX_ENTRIES:
+            return None  # Isotropic, or too large to cache per element (the field stage then looks the gains up per element)
+        # The far-field basis has no distance field to share, so the angles then take their own
+        distances = None if inputs['far_field'] else inputs['distances']
+        return directivity.off_boresight_angles(positions, grid['X'], grid['Y'], distances=distances)
+
+    def propagation_stage(self, inputs):
+        k = BeamformingSimulator.wave_number(inputs['frequency'])
+        if inputs['far_field']:
+            grid = inputs['coordinates']
+            if len(inputs['positions']) * grid['X'].size > self.BASIS_MAX_ENTRIES:
+                return None
+            basis = BeamformingSimulator.far_field_basis(inputs['positions'], grid['X'], grid['Y'], k, inputs['precision'])
+        else:
+            distances = inputs['distances']
+            if distances is None:
+                return None  # The field stage evaluates without a basis instead
+            basis = BeamformingSimulator.propagation_basis(distances, k, inputs['precision'])
+        gains = inputs['element_gains']
+        if gains is not None:
+            basis *= gains  # Directive elements: each row carries its element's gain towards every grid point
+        return basis
+
+    def phases_stage(self, inputs):
+        # Element weights, or with mutual coupling the currents they drive (which carry the steering phase themselves)
+        weights = BeamformingSimulator.steering_weights(inputs['positions'], BeamformingSimulator.wave_number(inputs['frequency']),
+                                                        inputs['steering_angle'], inputs['amplitudes'])
+        return weights if inputs['coupling_factorization'] is None else coupled_weights(inputs['coupling_factorization'], weights)
+
+    def field_stage(self, inputs):
+        basis = inputs['propagation']
+        grid = inputs['coordinates']
+        if basis is None and inputs['coupling']:
+            return BeamformingSimulator.unbatched_field(inputs['positions'], grid['X'], grid['Y'], BeamformingSimulator.wave_number(inputs['frequency']),
+                                                        0.0, inputs['precision'], inputs['phases'], inputs['chunk_size'],
+                                                        inputs['far_field'], directivity=inputs['directivity'])
+        if basis is None:
+            return BeamformingSimulator.unbatched_field(inputs['positions'], grid['X'], grid['Y'], BeamformingSimulator.wave_number(inputs['frequency']),
+                                                        inputs['steering_angle'], inputs['precision'], inputs['amplitudes'], inputs['chunk_size'],
+                                                        inputs['far_field'], directivity=inputs['directivity'])
+        return BeamformingSimulator.field_from_basis(basis, inputs['phases']).reshape(grid['X'].shape)
+
+    def array_factor_stage(self, inputs):
+        # The beam profile is that of the first array
+        positions = self.model.element_positions(inputs['geometry'][0])
+        k = BeamformingSimulator.wave_number(inputs['frequency'])
+        directivity = self.profile_directivity(inputs['directivity'], len(positions))
+        if inputs['coupling']:
+            # The first array's coupled currents lead the phases and already include the steering
+            return BeamformingSimulator.sampled_array_factor(positions, k, 0.0, inputs['angles'], inputs['phases'][:len(positions)],
+                                                             directivity)
+        return BeamformingSimulator.sampled_array_factor(positions, k, inputs['steering_angle'], inputs['angles'],
+                                                         inputs['amplitudes'][:len(positions)], directivity)
+
+    @staticmethod
+    def merged_configurations(inputs, param):
+        # Geometry-only configurations with the keys of one split-out parameter (tapers or element patterns) put back
+        return [dict(geometry, **extra) for geometry, extra in zip(inputs['geometry'], inputs[param])]
+
+    @staticmethod
+    def profile_directivity(directivity, elements):
+        # The displayed beam profile is the first array's, so it uses the directivity of its leading elements
+        return None if directivity is None else directivity[:elements]
+
+    def taper_comparison_stage(self, inputs):
+        # Every selected taper is one row of the weight matrix, so all maps come out of one product with the cached basis
+        tapers = inputs['tapers']
+        if not tapers:
+            return None
+        positions = inputs['positions']
+        grid = inputs['coordinates']
+        k = BeamformingSimulator.wave_number(inputs['frequency'])
+        amplitudes = self.model.taper_amplitudes(tapers, inputs['geometry'])
+        steering_angle = inputs['steering_angle']
+        if inputs['coupling_factorization'] is not None:
+            # One triangular solve per taper against the shared factorization; the currents carry the steering phase
+            amplitudes = coupled_weights(inputs['coupling_factorization'], BeamformingSimulator.steering_weights(positions, k, steering_angle, amplitudes))
+            steering_angle = 0.0
+
+        basis = inputs['propagation']
+        if basis is None:
+            fields = np.stack([BeamformingSimulator.unbatched_field(positions, grid['X'], grid['Y'], k, steering_angle,
+                                                                    inputs['precision'], row, inputs['chunk_size'], inputs['far_field'],
+                                                                    directivity=inputs['directivity'])
+                               for row in amplitudes])
+        else:
+            weights = BeamformingSimulator.steering_weights(positions, k, steering_angle, amplitudes)
+            fields = BeamformingSimulator.field_from_basis(basis, weights).reshape(len(tapers), *grid['X'].shape)
+
+        first_array = len(self.model.element_positions(inputs['geometry'][0]))
+        angles, array_factors = BeamformingSimulator.sampled_array_factor(positions[:first_array], k, steering_angle,
+                                                                          inputs['angles'], amplitudes[:, :first_array],
+                                                                          self.profile_directivity(inputs['directivity'], first_array))
+        return {'x': grid['x'], 'y': grid['y'], 'intensities': BeamformingSimulator.normalized_intensities(fields), 'angles': angles,
+                'array_factors': array_factors}
+
+    def multi_beam_stage(self, inputs):
+        beams = inputs['beams']
+        if not beams:
+            return None
+        self.multi_beam.bind(inputs['positions'], inputs['amplitudes'], BeamformingSimulator.wave_number(inputs['frequency']),
+                             inputs['coordinates'], inputs['propagation'], len(self.model.element_positions(inputs['geometry'][0])),
+                             inputs['precision'], inputs['chunk_size'], inputs['far_field'], inputs['coupling_factorization'], inputs['directivity'])
+        self.multi_beam.update(beams)
+        return self.multi_beam.result()
+
+    def phase_quantization_stage(self, inputs):
+        bits, mode = inputs['phase_quantization']
+        model = BeamformingSimulator(inputs['frequency'], inputs['steering_angle'], inputs['arrays_info'], inputs['precision'],
+                                     coupling=inputs['coupling'], phase_bits=bits, phase_mode=mode)
+        return model.compare_quantization(*inputs['grid'])
+
+    def scene_stage(self, inputs):
+        # Served from the persistent cache when possible, in which case none of the physics stages run
+        model = BeamformingSimulator(inputs['frequency'], inputs['steering_angle'], inputs['arrays_info'], inputs['precision'],
+                                     inputs['far_field'], coupling=inputs['coupling'])
+        x_range, y_range, resolution = inputs['grid']
+        key = ResultCache.make_key(model.canonical_inputs(x_range, y_range, resolution, inputs['angles']))
+        scene = self.result_cache.get(key)
+        if scene is None:
+            grid = inputs['coordinates']
+            angles, array_factor = inputs['array_factor']
+            scene = {'x': grid['x'], 'y': grid['y'], 'intensity': inputs['normalization'], 'angles': angles, 'array_factor': array_factor}
+            self.result_cache.put(key, scene)
+        return scene
+
+    def toggle_pipeline_debug_view(self):
+        if self.pipeline_debug_view.isVisible():
+            self.pipeline_debug_view.hide()
+        else:
+            self.pipeline_debug_view.show_run(self.pipeline.run_log)
+            self.pipeline_debug_view.show()
 
-        angles = np.linspace(-90, 90, 500)  # Angles to compute beam profile (in degrees)
-        array_factor = self.model.calculate_array_factor(angles)
+    # --------------------------------------------------------------------------------------------------------------------------------------
 
-        self.model.plot_intensity_heatmap(x, y, intensity, self.view.intensityMapCanvas)
-        self.model.plot_beam_profile(angles, array_factor, self.view.beamProfileCanvas)
+    def scenario_state(self, scenario_name):
+        # The frequency and array configurations toggle_scenario would produce, without touching the view
+        scenario = self.SCENARIO_SETTINGS[scenario_name]
+        wavelength = BeamformingSimulator(scenario['frequency'], self.model.steering_angle, []).wavelength
+        array_configs = list(self.view.visualization_widget.array_configs)
+        for index, configuration in self.view.array_edits(scenario['elements_spacing'] * wavelength, scenario['num_elements'],
+                                                          scenario['curvature']):
+            if 1 <= index <= len(array_configs):
+                array_configs[index - 1] = configuration
+        return scenario['frequency'], self.read_array_configurations(array_configs)
+
+    def schedule_prewarm(self, priority, label, frequency, steering_angle, arrays_info):
+        # Prewarmed with the settings that state will be displayed with, so the cache keys match
+        settings = self.auto_tuner.lookup(arrays_info, self.RESOLUTION)
+        self.prewarmer.schedule(priority, label, frequency, steering_angle, arrays_info, self.X_RANGE, self.Y_RANGE,
+                                tuned_resolution(self.RESOLUTION, settings), self.BEAM_PROFILE_SAMPLING, settings['precision'],
+                                settings['far_field'], settings['chunk_size'], self.model.coupling)
+
+    def prewarm_scenarios(self):
+        # Every preset, starting with the one the scenarios button will switch to next
+        next_scenario = self.next_scenario(self.current_scenario)
+        for scenario_name in self.SCENARIO_CYCLE:
+            frequency, arrays_info = self.scenario_state(scenario_name)
+            priority = Prewarmer.NEXT_STATE_PRIORITY if scenario_name == next_scenario else Prewarmer.PRESET_PRIORITY
+            self.schedule_prewarm(priority, f"scenario {scenario_name}", frequency, self.model.steering_angle, arrays_info)
+
+    def prewarm_neighbouring_states(self):
+        self.prewarmer.cancel_speculative()
+
+        next_scenario = self.next_scenario(self.current_scenario)
+        frequency, arrays_info = self.scenario_state(next_scenario)
+        self.schedule_prewarm(Prewarmer.NEXT_STATE_PRIORITY, f"scenario {next_scenario}", frequency, self.model.steering_angle, arrays_info)
+
+        # Adjacent steering slider stops, nearest first
+        slider = self.view.steering_angle_slider
+        for step in (slider.singleStep(), slider.pageStep()):
+            for steering_angle in (self.model.steering_angle - step, self.model.steering_angle + step):
+                if slider.minimum() <= steering_angle <= slider.maximum():
+                    self.schedule_prewarm(Prewarmer.SPECULATIVE_PRIORITY, f"steering {steering_angle}", self.model.frequency,
+                                          steering_angle, self.configurations)
 
     # --------------------------------------------------------------------------------------------------------------------------------------
 
@@ -182,12 +529,14 @@ class MainController:
         self.view.current_selected_ALL_array = True
         self.view.current_selected_array_button.setText("All Arrays")
         self.view.visualization_widget.updateArrayNumber(self.view.current_arrays_number)
+        self.logging.log(f"Arrays number changed from {previous_value} to {self.view.current_arrays_number}", source='arrays_number')
 
     def update_current_elements_number(self):
         previous_value = self.view.current_elements_number
         self.view.current_elements_number = self.view.elements_number_SpinBox.value()
         self.view.arrays_parameters_indicator.setText(f"{self.view.current_elements_number} Elements")
         self.view.updateVisualization()
+        self.logging.log(f"Elements number changed from {previous_value} to {self.view.current_elements_number}", source='elements_number')
 
     def update_elements_spacing(self):
         previous_value = self.view.current_elements_spacing
@@ -197,18 +546,28 @@ class MainController:
             self.view.current_elements_spacing = 0  # or some default value, or raise an error/message to the user
         self.view.arrays_parameters_indicator.setText(f"{self.view.elements_spacing_slider.value()}% Wavelength")
         self.view.updateVisualization()
+        self.logging.log(f"Elements spacing changed from {previous_value} to {self.view.current_elements_spacing}", source='elements_spacing')
 
     def update_elements_curvature(self):
         previous_value = self.view.current_array_curvature_angle
         self.view.current_array_curvature_angle = self.view.array_curve_slider.value()
         self.view.arrays_parameters_indicator.setText(f"{self.view.current_array_curvature_angle} Degree")
         self.view.updateVisualization()
+        self.logging.log(f"Curvature changed from {previous_value} to {self.view.current_array_curvature_angle}", source='curvature')
+
+    def update_rows(self):
+        previous_value = self.view.current_rows
+        self.view.current_rows = self.view.rows_SpinBox.value()
+        self.view.arrays_parameters_indicator.setText(f"{self.view.current_rows} Rows")
+        self.logging.log(f"Array rows changed from {previous_value} to {self.view.current_rows}", source='rows')
+        self.update_and_refresh_arrays_info()
 
     def update_steering_angle(self):
         previous_value = self.view.current_steering_angle
         self.view.current_steering_angle = self.view.steering_angle_slider.value()
         self.view.sidebar_parameter_indicator.setText(f"{self.view.current_steering_angle} Degree")
         self.model.update_steering_angle(self.view.current_steering_angle)
+        self.logging.log(f"Steering angle changed from {previous_value} to {self.view.current_steering_angle}", source='steering_angle')
         self.apply_configurations_to_visualization()
 
     def update_operating_frequency(self):
@@ -219,12 +578,152 @@ class MainController:
         self.model.update_operating_frequency(self.view.current_operating_frequency)
         self.update_and_refresh_arrays_info()
 
+    def update_taper(self):
+        self.view.current_taper = list(TAPERS)[self.view.taper_combobox.currentIndex() - 1]
+        self.view.sidebar_parameter_indicator.setText(TAPERS[self.view.current_taper][0])
+        self.logging.log(f"Amplitude taper changed to {self.view.current_taper}", source='taper')
+        self.update_and_refresh_arrays_info()
+
+    def update_element_pattern(self):
+        self.view.current_element_pattern = SELECTABLE_PATTERNS[self.view.element_pattern_combobox.currentIndex() - 1]
+        self.view.sidebar_parameter_indicator.setText(ELEMENT_PATTERNS[self.view.current_element_pattern][0])
+        self.logging.log(f"Element pattern changed to {self.view.current_element_pattern}", source='element_pattern')
+        self.update_and_refresh_arrays_info()
+
+    def update_coupling(self):
+        self.model.coupling = self.view.coupling_button.isChecked()
+        self.logging.log(f"Mutual coupling {'enabled' if self.model.coupling else 'disabled'}", source='coupling')
+        self.apply_configurations_to_visualization()
+
+    def in_foreground(self, work, *args):
+        # Every user-triggered computation goes through here: background prewarming waits until it has been served
+        self.prewarmer.pause()
+        try:
+            return work(*args)
+        finally:
+            self.prewarmer.resume()
+
+    def show_taper_comparison(self):
+        self.taper_comparison_view.show()
+        self.taper_comparison_view.raise_()
+        self.update_taper_comparison()
+
+    def update_taper_comparison(self, tapers=None):
+        tapers = self.taper_comparison_view.selected_tapers() if tapers is None else tapers
+        self.pipeline.set_params(tapers=tapers)
+        comparison = self.in_foreground(self.pipeline.run, ['taper_comparison'])['taper_comparison']
+        self.taper_comparison_view.show_comparison(tapers, comparison)
+
+    def show_multi_beam(self):
+        self.multi_beam_view.show()
+        self.multi_beam_view.raise_()
+        self.update_multi_beam()
+
+    def update_multi_beam(self, beams=None):
+        beams = self.multi_beam_view.beams() if beams is None else beams
+        self.pipeline.set_params(beams=beams)
+        result = self.in_foreground(self.pipeline.run, ['multi_beam'])['multi_beam']
+        self.multi_beam_view.show_multi_beam(result)
+        self.logging.log_event('multi_beam', beams=len(beams), recomputed=self.multi_beam.recomputed,
+                               ms=round(sum(milliseconds for _, _, milliseconds in self.pipeline.run_log), 3))
+
+    def show_quantization(self):
+        self.quantization_view.show()
+        self.quantization_view.raise_()
+        self.update_quantization()
+
+    def update_quantization(self, *_):
+        bits, mode = self.quantization_view.settings()
+        self.pipeline.set_params(phase_quantization=(bits, mode))
+        comparison = self.in_foreground(self.pipeline.run, ['phase_quantization'])['phase_quantization']
+        self.quantization_view.show_comparison(comparison)
+        self.logging.log_event('phase_quantization', bits=bits, mode=mode, lobe_db=round(comparison['report']['lobe_db'], 2),
+                               speedup=round(comparison['timing']['speedup'], 2))
+
+    def auto_tune(self):
+        # Tolerance is the largest accepted error in normalized intensity against the exact float64 map
+        tolerance, accepted = QtWidgets.QInputDialog.getDouble(self.main_window, "Auto-Tune", "Error tolerance (normalized intensity):",
+                                                               self.auto_tune_tolerance, 1e-4, 0.5, 4)
+        if not accepted:
+            return
+        self.auto_tune_tolerance = tolerance
+
+        self.logging.log(f"Auto-tuning with tolerance {tolerance:g}")
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+        try:
+            exact_model = BeamformingSimulator(self.model.frequency, self.model.steering_angle, self.configurations)
+            entry, results = self.in_foreground(self.auto_tuner.tune, exact_model, self.X_RANGE, self.Y_RANGE, self.RESOLUTION, tolerance)
+        finally:
+            QtWidgets.QApplication.restoreOverrideCursor()
+
+        self.logging.log_event('auto_tune', tolerance=tolerance, chosen=entry['settings'], candidates=results)
+        self.logging.log(f"Auto-tune selected {describe(entry['settings'], entry['basis'])}: {entry['ms']:.1f} ms against "
+                         f"{entry['reference_ms']:.1f} ms exact")
+        self.apply_configurations_to_visualization()
+
+    def show_volume_view(self):
+        # Computed on the thread pool, so the window stays responsive; every run writes its own file, since an open
+        # viewer memory-maps the previous one
+        volume_path = os.path.join("Output", time.strftime("Volume_%Y%m%d_%H%M%S.npy"))
+        model = BeamformingSimulator(self.model.frequency, self.model.steering_angle, [dict(info) for info in self.configurations],
+                                     self.model.precision, self.model.far_field, self.model.chunk_size, self.model.coupling,
+                                     self.model.phase_bits, self.model.phase_mode)
+
+        self.logging.log(f"Computing volumetric field into {volume_path}")
+        self.view.volume_view_button.setEnabled(False)
+        self.volume_job = VolumeJob(model, self.X_RANGE, self.Y_RANGE, self.VOLUME_Z_RANGE, self.VOLUME_SHAPE, volume_path)
+        self.volume_job.signals.finished.connect(self.open_volume_viewer)
+        self.volume_job.signals.failed.connect(self.volume_failed)
+        self.thread_pool.start(self.volume_job)
+
+    def open_volume_viewer(self, volume_path):
+        self.view.volume_view_button.setEnabled(True)
+        self.volume_job = None
+        # The viewer memory-maps the file and reads one slice at a time
+        self.volume_viewer = VolumeSliceViewer(volume_path, self.X_RANGE, self.Y_RANGE, self.VOLUME_Z_RANGE)
+        self.volume_viewer.show()
+
+    def volume_failed(self, error):
+        self.view.volume_view_button.setEnabled(True)
+        self.volume_job = None
+        self.logging.log(f"Volumetric field failed: {error}", level='error')
+
+    def show_tiled_view(self):
+        # Tiles are computed on demand at the resolution of the current zoom level
+        if self.tiled_view is None:
+            self.tiled_view = TiledIntensityView(self.X_RANGE, self.Y_RANGE)
+        self.tiled_view.set_model(self.model)
+        self.tiled_view.show()
+        self.tiled_view.raise_()
+
+    def show_imaging_view(self):
+        # Receive side: RF echoes synthesized for the current arrays and imaged by delay-and-sum, streamed on a timer
+        if self.imaging_view is None:
+            self.imaging_view = ImagingView()
+        self.imaging_view.set_model(self.model)
+        self.imaging_view.show()
+        self.imaging_view.raise_()
+
+    def export_current_view(self):
+        # Publication-quality copies of the current plots, rendered offscreen with Agg
+        scene = self.in_foreground(self.pipeline.run, ['scene'])['scene']
+        base_path = os.path.join("Output", time.strftime("Beamforming_%Y%m%d_%H%M%S"))
+        for extension in ('png', 'svg'):
+            export_scene(scene, f"{base_path}.{extension}")
+        self.logging.log(f"Exported current view to {base_path}.png/.svg")
+
     # --------------------------------------------------------------------------------------------------------------------------------------
     def close_application(self):
         self.logging.log(f"Application Closed")
+        self.prewarmer.stop()
+        if self.trace_recorder is not None:
+            self.trace_recorder.close()
+        self.logging.close()
         self.main_window.close()
 
     def run(self):
         self.logging.log("Application Opened")
         self.main_window.showFullScreen()
+        # Start prewarming the presets once the window is up
+        QtCore.QTimer.singleShot(0, self.prewarm_scenarios)
         return self.app.exec_()
@@ -0,0 +1,53 @@
+import numpy as np
+
+BLOCK_SIZE = 64  # Rows solved per step of the blocked back substitution
+LOSS_RESISTANCE = 1e-3  # Ohmic loss of each element relative to its radiation resistance; keeps Z invertible
+
+
+def mutual_impedance(positions, k):
+    """Normalized mutual-impedance matrix Z (N, N) of the elements at positions (N, 3), treated as isotropic point sources.
+
+    The mutual term is z_mn = exp(j k r) / (j k r). Its real part, sin(k r) / (k r), is the exact mutual radiation
+    resistance of isotropic sources, and its imaginary part is the matching near-field reactance. Each element's
+    self-impedance is its (matched) radiation resistance, normalized to 1, plus LOSS_RESISTANCE. Elements at the same
+    position (identical arrays overlap) couple like the element to itself. Coupling vanishes as k r grows and dominates
+    at spacings well below half a wavelength.
+    """
+    kr = k * np.sqrt(((positions[:, None, :] - positions[None, :, :]) ** 2).sum(axis=-1))
+    coincident = kr == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        impedance = np.exp(1j * kr) / (1j * kr)
+    impedance[coincident] = 1.0
+    impedance[np.diag_indices_from(impedance)] += LOSS_RESISTANCE
+    return impedance
+
+
+def factorize(positions, k):
+    """QR factorization (Q, R) of the mutual-impedance matrix, the part of a coupled solve that depends only on the geometry."""
+    Q, R = np.linalg.qr(mutual_impedance(positions, k))
+    for array in (Q, R):
+        array.setflags(write=False)
+    return Q, R
+
+
+def back_substitution(R, y):
+    """Solve R x = y for upper-triangular R, y of shape (N,) or (N, B), one block of rows at a time from the bottom."""
+    x = np.empty(np.shape(y), dtype=np.result_type(R, y))
+    size = len(R)
+    for stop in range(size, 0, -BLOCK_SIZE):
+        start = max(stop - BLOCK_SIZE, 0)
+        rhs = y[start:stop] - R[start:stop, stop:] @ x[stop:]
+        # The diagonal block is a small triangular system; a dense solve of it costs BLOCK_SIZE^3, not N^3
+        x[start:stop] = np.linalg.solve(R[start:stop, start:stop], rhs)
+    return x
+
+
+def coupled_weights(factorization, weights):
+    """Element currents produced by driving the elements with weights, Z^-1 w, from a cached factorization.
+
+    weights is (N,) or (B, N) with one set of weights per row. Each solve is a product with Q^H and a triangular
+    back substitution, both O(N^2).
+    """
+    Q, R = factorization
+    weights = np.asarray(weights)
+    return back_substitution(R, Q.conj().T @ weights.T).T
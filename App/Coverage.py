@@ -0,0 +1,153 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from App.Scenarios import SCENARIO_SETTINGS
+from App.SimpleSimulation import BeamformingSimulator, REAL_DTYPES
+
+BLOCK_POINTS = 1 << 18  # Grid points evaluated per row block (about 20 MB of field, scratch and coordinates)
+FINE_BIN_DB = 0.01  # Width of the streamed histogram bins; normalized statistics are exact to within this
+DYNAMIC_RANGE_DB = 200  # Levels further below the coherent-sum peak are counted in the lowest bin
+HEADROOM_DB = 1  # Above the coherent-sum peak, which rounding can reach but the field cannot exceed
+DEFAULT_THRESHOLDS_DB = (-3, -6, -10, -20)
+FOCAL_THRESHOLD_DB = -3
+
+
+def contiguous_span(mask, index):
+    # [left, right) bounds of the run of True in mask that contains index
+    before = np.flatnonzero(~mask[:index])
+    after = np.flatnonzero(~mask[index:])
+    return (before[-1] + 1 if before.size else 0), (index + after[0] if after.size else mask.size)
+
+
+def coverage_statistics(model, x_range, y_range, shape, thresholds_db=DEFAULT_THRESHOLDS_DB, floor_db=-60, bin_db=1.0,
+                        block_points=BLOCK_POINTS, progress=None):
+    """Statistics of the normalized intensity over an (nx, ny) grid, streamed in row blocks.
+
+    Each block of rows is evaluated, reduced and discarded, so peak memory depends on the row length and block size
+    but not on the number of rows. Normalization takes a single pass. Levels are binned finely in dB relative to the
+    coherent-sum peak, which is known before the pass, and that histogram is shifted by the measured peak afterwards.
+    Thresholded areas and the CDF are therefore exact to within FINE_BIN_DB.
+
+    Returns area_above ({threshold dB: m^2}), the histogram and CDF on bin_db-wide bins from floor_db to 0 dB, the
+    peak location and the extent of the focal region. The focal region is the -3 dB region containing the peak,
+    measured on the per-row and per-column maxima.
+    """
+    nx, ny = shape
+    x = np.linspace(x_range[0], x_range[1], nx)
+    y = np.linspace(y_range[0], y_range[1], ny)
+    dx = (x_range[1] - x_range[0]) / max(nx - 1, 1)
+    dy = (y_range[1] - y_range[0]) / max(ny - 1, 1)
+
+    positions, amplitudes = model.geometry()
+    steering_angle, currents = model.excitation(positions, amplitudes)
+    reference = max(np.abs(currents).sum(), 1) ** 2  # Peak intensity of a fully coherent sum
+    fine_bins = int(round((DYNAMIC_RANGE_DB + HEADROOM_DB) / FINE_BIN_DB))
+    counts = np.zeros(fine_bins, dtype=np.int64)
+    row_max = np.empty(ny)
+    column_max = np.zeros(nx)
+    peak, peak_index = -1.0, (0, 0)
+
+    rows_per_block = max(1, block_points // nx)
+    for start in range(0, ny, rows_per_block):
+        stop = min(start + rows_per_block, ny)
+        X, Y = np.meshgrid(x, y[start:stop])
+        field = model.unbatched_field(positions, X, Y, model.k, steering_angle, model.precision, currents, model.chunk_size,
+                                      model.far_field, model.workspace, model.table_bits, model.directivity())
+        intensity = np.abs(field)
+        np.square(intensity, out=intensity)
+        intensity /= reference
+
+        block_peak = int(intensity.argmax())
+        if intensity.flat[block_peak] > peak:
+            peak = float(intensity.flat[block_peak])
+            peak_index = (start + block_peak // nx, block_peak % nx)
+        row_max[start:stop] = intensity.max(axis=1)
+        np.maximum(column_max, intensity.max(axis=0), out=column_max)
+
+        # Level in dB below the coherent-sum peak, quantized to a fine bin index in place
+        np.maximum(intensity, np.finfo(np.float64).tiny, out=intensity)
+        np.log10(intensity, out=intensity)
+        intensity *= 10 / FINE_BIN_DB
+        intensity += DYNAMIC_RANGE_DB / FINE_BIN_DB
+        np.clip(intensity, 0, fine_bins - 1, out=intensity)
+        counts += np.bincount(intensity.astype(np.intp).ravel(), minlength=fine_bins)
+
+        if progress is not None:
+            progress(stop, ny)
+
+    total = nx * ny
+    peak_db = 10 * np.log10(max(peak, np.finfo(np.float64).tiny))
+    cumulative = np.concatenate(([0], np.cumsum(counts)))
+
+    def count_below(normalized_db):
+        # Points whose normalized level is below normalized_db, to the nearest fine bin edge
+        index = np.clip(np.round((np.asarray(normalized_db) + peak_db + DYNAMIC_RANGE_DB) / FINE_BIN_DB).astype(np.intp), 0, fine_bins)
+        return cumulative[index]
+
+    edges = np.append(np.arange(floor_db, 0, bin_db), 0.0)
+    below = count_below(edges)
+    below[-1] = total  # Every point is at or below the peak
+    cell_area = dx * dy
+
+    focal_level = 10 ** (FOCAL_THRESHOLD_DB / 10) * peak
+    left, right = contiguous_span(column_max >= focal_level, peak_index[1])
+    bottom, top = contiguous_span(row_max >= focal_level, peak_index[0])
+    return {
+        'shape': [nx, ny],
+        'points': total,
+        'cell_area': cell_area,
+        'area_above': {float(threshold): float((total - count_below(threshold)) * cell_area) for threshold in thresholds_db},
+        'bin_edges_db': edges,
+        'histogram': np.diff(below),
+        'below_floor': int(below[0]),
+        'cdf': below / total,
+        'peak': {'x': float(x[peak_index[1]]), 'y': float(y[peak_index[0]]), 'relative_to_coherent_db': float(peak_db)},
+        'focal_region': {'threshold_db': FOCAL_THRESHOLD_DB, 'width': float((right - left) * dx), 'height': float((top - bottom) * dy),
+                         'area': float((total - count_below(FOCAL_THRESHOLD_DB)) * cell_area)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coverage statistics of the normalized intensity over a large grid, streamed in row blocks.")
+    parser.add_argument('--scenario', choices=list(SCENARIO_SETTINGS), default='5G')
+    parser.add_argument('--arrays', type=int, default=1)
+    parser.add_argument('--elements', type=int, help="Elements per array (defaults to the scenario's)")
+    parser.add_argument('--steering', type=float, default=0.0, help="Steering angle in degrees")
+    parser.add_argument('--shape', type=int, nargs=2, default=(2000, 1000), metavar=('NX', 'NY'))
+    parser.add_argument('--x-range', type=float, nargs=2, default=(-10, 10))
+    parser.add_argument('--y-range', type=float, nargs=2, default=(0, 10))
+    parser.add_argument('--thresholds', type=float, nargs='+', default=DEFAULT_THRESHOLDS_DB, help="Area thresholds in dB")
+    parser.add_argument('--precision', choices=list(REAL_DTYPES), default='float64')
+    parser.add_argument('--json', metavar='PATH', help="Also write the statistics as JSON")
+    arguments = parser.parse_args()
+
+    scenario = SCENARIO_SETTINGS[arguments.scenario]
+    array_info = {
+        'num_elements': arguments.elements or scenario['num_elements'],
+        'spacing': scenario['elements_spacing'] * 3e8 / scenario['frequency'],
+        'curvature': scenario['curvature'],
+    }
+    model = BeamformingSimulator(scenario['frequency'], arguments.steering, [array_info] * arguments.arrays, arguments.precision)
+
+    start = time.perf_counter()
+    statistics = coverage_statistics(model, arguments.x_range, arguments.y_range, arguments.shape, arguments.thresholds,
+                                     progress=lambda done, total: print(f"\r{done}/{total} rows", end='', flush=True))
+    print(f"\n{statistics['points']} points in {time.perf_counter() - start:.1f} s")
+    peak = statistics['peak']
+    print(f"Peak at ({peak['x']:.3f}, {peak['y']:.3f}) m, {peak['relative_to_coherent_db']:.2f} dB relative to a coherent sum")
+    for threshold, area in statistics['area_above'].items():
+        print(f"  area above {threshold:g} dB: {area:.4f} m^2")
+    focal = statistics['focal_region']
+    print(f"Focal region ({focal['threshold_db']} dB): {focal['width']:.4f} x {focal['height']:.4f} m")
+
+    if arguments.json:
+        with open(arguments.json, 'w', encoding='utf-8') as json_file:
+            json.dump({key: value.tolist() if isinstance(value, np.ndarray) else value for key, value in statistics.items()}, json_file,
+                      indent=2)
+
+
+if __name__ == "__main__":
+    main()
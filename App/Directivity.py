@@ -0,0 +1,187 @@
+import argparse
+import functools
+import time
+
+import numpy as np
+
+# Pattern name -> (display label, default parameter). cos^n takes its exponent n. 'tabulated' takes user-supplied
+# (angle off boresight in degrees, gain in dB) pairs and has no default.
+ELEMENT_PATTERNS = {
+    'isotropic': ("Isotropic", None),
+    'cosine': ("Cosine (cos^n)", 1.0),
+    'tabulated': ("Tabulated", None),
+}
+SELECTABLE_PATTERNS = ('isotropic', 'cosine')  # Patterns the GUI offers; a tabulated pattern needs its table supplied
+TABLE_SIZE = 1801  # Samples of every pattern table over 0-180 degrees off boresight (0.1 degree steps)
+GAIN_MAP_MAX_ENTRIES = 8_000_000  # Elements x grid points of gain maps kept cached with the grid (64 MB)
+
+
+def pattern_table(pattern, parameter=None):
+    """Amplitude gain of one element against the angle off its boresight, as TABLE_SIZE samples over 0-180 degrees.
+
+    Patterns are symmetric about boresight. Tables are peak-normalized to 1 and cached per (pattern, parameter), so
+    the returned array is shared and read-only.
+    """
+    if pattern not in ELEMENT_PATTERNS:
+        raise ValueError(f"Unknown element pattern '{pattern}', expected one of {tuple(ELEMENT_PATTERNS)}")
+    if parameter is None:
+        parameter = ELEMENT_PATTERNS[pattern][1]
+    if pattern == 'tabulated':
+        if parameter is None or len(parameter) < 2:
+            raise ValueError("A tabulated element pattern needs at least two (angle in degrees, gain in dB) pairs")
+        parameter = tuple(sorted((float(angle), float(gain)) for angle, gain in parameter))
+        if parameter[0][0] < 0 or parameter[-1][0] > 180:
+            raise ValueError("Tabulated element pattern angles must lie between 0 and 180 degrees off boresight")
+    elif parameter is not None:
+        parameter = float(parameter)
+    return _cached_table(pattern, parameter)
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_table(pattern, parameter):
+    angles = np.linspace(0, 180, TABLE_SIZE)
+    if pattern == 'isotropic':
+        table = np.ones(TABLE_SIZE)
+    elif pattern == 'cosine':
+        # Nothing is radiated behind the element
+        table = np.maximum(np.cos(np.radians(angles)), 0) ** parameter
+    else:
+        # Measured patterns are smooth in dB, so they are interpolated there; beyond the last sample its gain holds
+        samples = np.array(parameter)
+        table = 10 ** (np.interp(angles, samples[:, 0], samples[:, 1]) / 20)
+
+    table = table / table.max()
+    table.setflags(write=False)
+    return table
+
+
+def load_pattern(path):
+    """(angle, gain dB) pairs of a tabulated pattern from a two-column text file (comma- or whitespace-separated)."""
+    with open(path) as pattern_file:
+        samples = np.loadtxt(pattern_file, delimiter=',' if path.endswith('.csv') else None, ndmin=2)
+    if samples.shape[1] != 2:
+        raise ValueError(f"Expected two columns (angle in degrees, gain in dB) in {path}, got {samples.shape[1]}")
+    return tuple((float(angle), float(gain)) for angle, gain in samples)
+
+
+def table_gains(tables, rows, off_boresight):
+    """Gains (N, ...) of elements with patterns tables[rows] (N,) at off_boresight angles (N, ...) in degrees.
+
+    Every element's lookup is one linear interpolation between neighbouring table samples, done for all elements and
+    angles at once by gathering from the flattened (P, TABLE_SIZE) table stack.
+    """
+    position = np.asarray(off_boresight) * ((TABLE_SIZE - 1) / 180)
+    index = np.minimum(position.astype(np.intp), TABLE_SIZE - 2)
+    fraction = position - index
+    index += (rows * TABLE_SIZE).reshape((-1,) + (1,) * (index.ndim - 1))
+    flat = tables.ravel()
+    gains = flat.take(index + 1)
+    gains -= flat.take(index, out=position)  # position is no longer needed and has the gains' shape and dtype
+    gains *= fraction
+    gains += position
+    return gains
+
+
+class ElementDirectivity:
+    def __init__(self, orientations, tables, rows):
+        """Boresight orientations and amplitude patterns of a set of elements.
+
+        orientations (N,) are the boresight directions in degrees, measured like steering angles (from +y towards +x).
+        Element n radiates with the pattern tables[rows[n]]. There is one pattern_table per distinct pattern, so looking
+        up every element's gain is a single gather.
+        """
+        self.orientations = np.asarray(orientations, dtype=np.float64)
+        self.tables = tables
+        self.rows = np.asarray(rows, dtype=np.intp)
+
+    def __len__(self):
+        return len(self.orientations)
+
+    def __getitem__(self, index):
+        # A subset of the elements, such as the first array whose beam profile is displayed
+        return ElementDirectivity(self.orientations[index], self.tables, self.rows[index])
+
+    def off_boresight_angles(self, positions, X, Y, z=0.0, distances=None):
+        """Angle in degrees (N, X.size) between each element's boresight and its direction to every grid point at height z.
+
+        distances is the matching (N, X.size) distance_field, reused instead of recomputed when given.
+        """
+        dx = np.reshape(X, (1, -1)) - positions[:, 0:1]
+        dy = np.reshape(Y, (1, -1)) - positions[:, 1:2]
+        if distances is None:
+            distances = np.sqrt(dx ** 2 + dy ** 2 + (z - positions[:, 2:3]) ** 2)
+        cosine = dx * np.sin(np.radians(self.orientations))[:, None]
+        cosine += dy * np.cos(np.radians(self.orientations))[:, None]
+        cosine /= np.maximum(distances, np.finfo(np.float64).tiny)
+        np.clip(cosine, -1, 1, out=cosine)
+        return np.degrees(np.arccos(cosine, out=cosine), out=cosine)
+
+    def gains(self, off_boresight):
+        return table_gains(self.tables, self.rows, off_boresight)
+
+    def field_gains(self, positions, X, Y, z=0.0, distances=None):
+        """Amplitude gain (N, X.size) of every element towards every grid point at height z."""
+        return self.gains(self.off_boresight_angles(positions, X, Y, z, distances))
+
+    def profile_gains(self, angles):
+        """Far-field gains (N, len(angles)) towards the beam profile angles, in degrees measured like steering angles."""
+        offsets = np.asarray(angles, dtype=np.float64)[None, :] - self.orientations[:, None]
+        return self.gains(np.abs((offsets + 180) % 360 - 180))
+
+
+def main():
+    from App.Scenarios import SCENARIO_SETTINGS
+    from App.SimpleSimulation import BeamformingSimulator
+
+    parser = argparse.ArgumentParser(description="Scan loss and update cost of directive elements against isotropic ones.")
+    parser.add_argument('--scenario', choices=list(SCENARIO_SETTINGS), default='Ultrasound')
+    parser.add_argument('--arrays', type=int, default=1)
+    parser.add_argument('--elements', type=int, help="Elements per array (defaults to the scenario's)")
+    parser.add_argument('--curvature', type=float, help="Array curvature in degrees (defaults to the scenario's)")
+    parser.add_argument('--pattern', choices=list(ELEMENT_PATTERNS), default='cosine')
+    parser.add_argument('--exponent', type=float, help="Exponent n of the cos^n pattern")
+    parser.add_argument('--pattern-file', help="Two-column (angle off boresight, gain dB) table of a tabulated pattern")
+    parser.add_argument('--steering', type=float, nargs='+', default=[0, 15, 30, 45, 60])
+    parser.add_argument('--resolution', type=int, default=200)
+    arguments = parser.parse_args()
+
+    scenario = SCENARIO_SETTINGS[arguments.scenario]
+    isotropic_info = {
+        'num_elements': arguments.elements or scenario['num_elements'],
+        'spacing': scenario['elements_spacing'] * 3e8 / scenario['frequency'],
+        'curvature': scenario['curvature'] if arguments.curvature is None else arguments.curvature,
+    }
+    directive_info = dict(isotropic_info, element_pattern=arguments.pattern)
+    if arguments.pattern_file:
+        directive_info['pattern_parameter'] = load_pattern(arguments.pattern_file)
+    elif arguments.exponent is not None:
+        directive_info['pattern_parameter'] = arguments.exponent
+    x_range, y_range = (-10, 10), (0, 10)
+    angles = np.linspace(-90, 90, 1441)
+
+    print(f"{'steering':>8} {'iso ms':>7} {'dir ms':>7} {'iso peak':>8} {'dir peak':>8} {'scan loss dB':>12}")
+    models = [BeamformingSimulator(scenario['frequency'], 0, [info] * arguments.arrays) for info in (isotropic_info, directive_info)]
+    first_ms = []
+    for model in models:
+        start = time.perf_counter()
+        model.simulate_multiple_arrays(x_range, y_range, arguments.resolution)
+        first_ms.append((time.perf_counter() - start) * 1000)
+    for steering_angle in arguments.steering:
+        row = []
+        for model in models:
+            model.update_steering_angle(steering_angle)
+            start = time.perf_counter()
+            model.simulate_multiple_arrays(x_range, y_range, arguments.resolution)
+            milliseconds = (time.perf_counter() - start) * 1000
+            directivity = model.element_directivity(model.arrays_info[:1])
+            array_factor = model.array_factor(model.element_positions(model.arrays_info[0]), model.k, steering_angle, angles,
+                                              model.element_amplitudes(model.arrays_info[0]), directivity)
+            row.append((milliseconds, angles[array_factor.argmax()], array_factor.max()))
+        (iso_ms, iso_peak, iso_level), (dir_ms, dir_peak, dir_level) = row
+        print(f"{steering_angle:>8g} {iso_ms:>7.1f} {dir_ms:>7.1f} {iso_peak:>8.2f} {dir_peak:>8.2f} "
+              f"{10 * np.log10(max(dir_level, np.finfo(np.float64).tiny) / iso_level):>12.2f}")
+    print(f"First map, which builds the cached gain maps: {first_ms[0]:.1f} ms isotropic, {first_ms[1]:.1f} ms directive")
+
+
+if __name__ == "__main__":
+    main()
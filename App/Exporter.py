@@ -0,0 +1,251 @@
+import argparse
+import collections
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from App.Scenarios import SCENARIO_SETTINGS
+from App.SimpleSimulation import BeamformingSimulator
+from App.Tapers import TAPERS
+from App.Workspace import Workspace
+
+# Everything here renders with matplotlib's Agg canvas directly (never pyplot or Qt), so it also runs in worker processes
+SWEEP_PARAMETERS = ('steering', 'frequency', 'time')
+VIDEO_FORMATS = ('mp4', 'gif')
+IMAGE_FORMATS = ('png', 'svg')
+
+X_RANGE = (-10, 10)
+Y_RANGE = (0, 10)
+RESOLUTION = 200
+BEAM_PROFILE_SAMPLING = {'start': -90, 'stop': 90, 'tolerance_db': 0.5}
+
+# Per-process memo of the complex field for time sweeps, where every frame shares the same field
+_field_memo = {}
+# Per-process workspace, so consecutive frames on the same grid reuse the coordinate and scratch buffers
+_workspace = Workspace()
+
+
+def render_scene(scene, kind='both', width=1200, height=500, dpi=100, time_phase=None):
+    """Draw a scene onto a new Agg-backed figure. kind is 'intensity', 'beam' or 'both'."""
+    figure = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    FigureCanvasAgg(figure)
+
+    if kind == 'both':
+        intensity_figure, beam_figure = figure.subfigures(1, 2)
+    else:
+        intensity_figure = beam_figure = figure
+
+    if kind in ('intensity', 'both'):
+        ax = BeamformingSimulator.draw_intensity_heatmap(intensity_figure, scene['x'], scene['y'], scene['intensity'])
+        if time_phase is not None:
+            ax.set_title(f'Instantaneous Field (t = {time_phase:.2f} T)')
+    if kind in ('beam', 'both'):
+        BeamformingSimulator.draw_beam_profile(beam_figure, scene['angles'], scene['array_factor'])
+    return figure
+
+
+def compute_frame_scene(parameters, sweep_parameter, value):
+    model = BeamformingSimulator(parameters['frequency'], parameters['steering_angle'], parameters['arrays_info'])
+    model.workspace = _workspace
+    if sweep_parameter == 'steering':
+        model.update_steering_angle(value)
+    elif sweep_parameter == 'frequency':
+        model.update_operating_frequency(value)
+
+    if sweep_parameter != 'time':
+        return model.compute_scene(X_RANGE, Y_RANGE, RESOLUTION, BEAM_PROFILE_SAMPLING)
+
+    # Time sweeps show the real part of the field at phase omega * t, value being the fraction of one period
+    key = repr(parameters)
+    if key not in _field_memo:
+        _field_memo.clear()
+        scene = model.compute_scene(X_RANGE, Y_RANGE, RESOLUTION, BEAM_PROFILE_SAMPLING)
+        X, Y = np.meshgrid(scene['x'], scene['y'])
+        field = BeamformingSimulator.direct_field(model.all_element_positions(), X, Y, model.k, model.steering_angle,
+                                                  amplitudes=model.all_element_amplitudes(), directivity=model.element_directivity())
+        _field_memo[key] = (scene, field / np.abs(field).max())
+    scene, field = _field_memo[key]
+    return dict(scene, intensity=np.real(field * np.exp(-2j * np.pi * value)) ** 2)
+
+
+def render_frame(task):
+    """Worker entry point: compute and render one sweep frame.
+
+    Image formats are written to disk by the worker itself and only the path comes back; video frames are returned as a
+    compact RGB byte string for the parent to stream into the encoder.
+    """
+    parameters, sweep_parameter, value, kind, size, output_path = task
+    scene = compute_frame_scene(parameters, sweep_parameter, value)
+    figure = render_scene(scene, kind, *size, time_phase=value if sweep_parameter == 'time' else None)
+
+    if output_path is not None:
+        figure.savefig(output_path)
+        return output_path
+
+    figure.canvas.draw()
+    rgba = np.asarray(figure.canvas.buffer_rgba())
+    return np.ascontiguousarray(rgba[:, :, :3]).tobytes()
+
+
+class FrameEncoder:
+    def __init__(self, output_path, size, fps):
+        """Streams RGB frames into ffmpeg when available; GIFs fall back to Pillow, which needs every frame first."""
+        self.output_path = output_path
+        self.size = size
+        self.fps = fps
+        self.process = None
+        self.pillow_frames = []
+
+        ffmpeg = shutil.which('ffmpeg')
+        extension = os.path.splitext(output_path)[1].lower().lstrip('.')
+        if ffmpeg:
+            codec = ['-c:v', 'libx264', '-pix_fmt', 'yuv420p'] if extension == 'mp4' else []
+            self.process = subprocess.Popen([ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                                             '-s', f'{size[0]}x{size[1]}', '-r', str(fps), '-i', '-', *codec, output_path],
+                                            stdin=subprocess.PIPE)
+        elif extension != 'gif':
+            raise RuntimeError("Exporting MP4 requires ffmpeg on the PATH; export a GIF or an image sequence instead")
+
+    def write(self, frame_bytes):
+        if self.process is not None:
+            self.process.stdin.write(frame_bytes)
+        else:
+            from PIL import Image
+            frame = Image.frombytes('RGB', self.size, frame_bytes)
+            self.pillow_frames.append(frame.quantize(colors=256))  # Palettized frames are a quarter of the RGB size
+
+    def close(self):
+        if self.process is not None:
+            self.process.stdin.close()
+            if self.process.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed to encode {self.output_path}")
+        elif self.pillow_frames:
+            first, *rest = self.pillow_frames
+            first.save(self.output_path, save_all=True, append_images=rest, duration=int(1000 / self.fps), loop=0)
+            self.pillow_frames = []
+
+
+def export_scene(scene, output_path, kind='both', width=1200, height=500):
+    """Export a single scene to PNG or SVG (chosen by the file extension)."""
+    output_directory = os.path.dirname(output_path)
+    if output_directory and not os.path.exists(output_directory):
+        os.makedirs(output_directory)
+    render_scene(scene, kind, width, height).savefig(output_path)
+    return output_path
+
+
+def export_sweep(parameters, sweep_parameter, values, output_path, kind='both', width=1200, height=500, fps=15, workers=None,
+                 progress=None):
+    """Render one frame per sweep value in a process pool.
+
+    output_path ending in .mp4 or .gif produces a video; a .png/.svg path produces an image sequence, numbered through an
+    '{index}' field in the path or a suffix added before the extension. At most two frames per worker are in flight, so
+    memory stays flat however long the sweep is.
+    """
+    if sweep_parameter not in SWEEP_PARAMETERS:
+        raise ValueError(f"Unknown sweep parameter '{sweep_parameter}', expected one of {SWEEP_PARAMETERS}")
+
+    extension = os.path.splitext(output_path)[1].lower().lstrip('.')
+    if extension not in VIDEO_FORMATS + IMAGE_FORMATS:
+        raise ValueError(f"Unsupported export format '{extension}'")
+
+    output_directory = os.path.dirname(output_path)
+    if output_directory and not os.path.exists(output_directory):
+        os.makedirs(output_directory)
+
+    if extension in IMAGE_FORMATS and '{index' not in output_path:
+        root, _ = os.path.splitext(output_path)
+        output_path = f"{root}_{{index:04d}}.{extension}"
+
+    encoder = FrameEncoder(output_path, (width, height), fps) if extension in VIDEO_FORMATS else None
+    tasks = ((parameters, sweep_parameter, value, kind, (width, height),
+              output_path.format(index=index) if encoder is None else None) for index, value in enumerate(values))
+
+    workers = workers or os.cpu_count() or 1
+    in_flight = collections.deque()
+    completed = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for task in tasks:
+                in_flight.append(executor.submit(render_frame, task))
+                if len(in_flight) >= 2 * workers:
+                    completed = _consume(in_flight.popleft(), encoder, completed, progress)
+            while in_flight:
+                completed = _consume(in_flight.popleft(), encoder, completed, progress)
+    finally:
+        if encoder is not None:
+            encoder.close()
+    return completed
+
+
+def _consume(future, encoder, completed, progress):
+    # Frames are consumed in submission order, so the encoder always receives them in sequence
+    result = future.result()
+    if encoder is not None:
+        encoder.write(result)
+    completed += 1
+    if progress is not None:
+        progress(completed)
+    return completed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export beamforming intensity maps and beam profiles without the GUI.")
+    parser.add_argument('output', help="Output file: .png/.svg for a single figure or an image sequence, .mp4/.gif for a video")
+    parser.add_argument('--scenario', choices=list(SCENARIO_SETTINGS), default='5G')
+    parser.add_argument('--frequency', type=float, help="Operating frequency in Hz (defaults to the scenario's)")
+    parser.add_argument('--steering', type=float, default=0, help="Steering angle in degrees")
+    parser.add_argument('--arrays', type=int, default=1)
+    parser.add_argument('--elements', type=int, help="Elements per array (defaults to the scenario's)")
+    parser.add_argument('--spacing', type=float, help="Element spacing in wavelengths (defaults to the scenario's)")
+    parser.add_argument('--curvature', type=float, help="Array curvature in degrees (defaults to the scenario's)")
+    parser.add_argument('--taper', choices=list(TAPERS), default='uniform', help="Amplitude taper applied to every array")
+    parser.add_argument('--kind', choices=['intensity', 'beam', 'both'], default='both')
+    parser.add_argument('--sweep', choices=SWEEP_PARAMETERS, help="Render one frame per value of this parameter")
+    parser.add_argument('--start', type=float, help="First sweep value (time sweeps are in periods)")
+    parser.add_argument('--stop', type=float, help="Last sweep value")
+    parser.add_argument('--steps', type=int, default=60)
+    parser.add_argument('--fps', type=int, default=15)
+    parser.add_argument('--size', type=int, nargs=2, default=(1200, 500), metavar=('WIDTH', 'HEIGHT'))
+    parser.add_argument('--workers', type=int)
+    arguments = parser.parse_args()
+
+    scenario = SCENARIO_SETTINGS[arguments.scenario]
+    frequency = arguments.frequency or scenario['frequency']
+    spacing = arguments.spacing if arguments.spacing is not None else scenario['elements_spacing']
+    array_info = {
+        'num_elements': arguments.elements or scenario['num_elements'],
+        'spacing': spacing * 3e8 / frequency,
+        'curvature': arguments.curvature if arguments.curvature is not None else scenario['curvature'],
+    }
+    if arguments.taper != 'uniform':
+        array_info['taper'] = arguments.taper
+    parameters = {'frequency': frequency, 'steering_angle': arguments.steering, 'arrays_info': [array_info] * arguments.arrays}
+    width, height = arguments.size
+
+    if arguments.sweep is None:
+        model = BeamformingSimulator(frequency, arguments.steering, parameters['arrays_info'])
+        export_scene(model.compute_scene(X_RANGE, Y_RANGE, RESOLUTION, BEAM_PROFILE_SAMPLING), arguments.output, arguments.kind, width, height)
+        print(f"Exported {arguments.output}")
+        return
+
+    defaults = {'steering': (-60, 60), 'frequency': (frequency / 2, frequency * 2), 'time': (0, 1)}[arguments.sweep]
+    start = arguments.start if arguments.start is not None else defaults[0]
+    stop = arguments.stop if arguments.stop is not None else defaults[1]
+    values = np.linspace(start, stop, arguments.steps, endpoint=arguments.sweep != 'time')
+
+    try:
+        count = export_sweep(parameters, arguments.sweep, values, arguments.output, arguments.kind, width, height, arguments.fps,
+                             arguments.workers, progress=lambda done: print(f"\r{done}/{len(values)} frames", end='', flush=True))
+    except RuntimeError as error:
+        parser.exit(1, f"\n{error}\n")
+    print(f"\nExported {count} frames to {arguments.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import argparse
+import time
+
+import numpy as np
+
+from App.Scenarios import SCENARIO_SETTINGS
+from App.SimpleSimulation import BeamformingSimulator
+
+SAMPLING_FACTOR = 4  # RF samples per period of the centre frequency
+FRACTIONAL_BANDWIDTH = 0.6  # -6 dB bandwidth of the transmit pulse relative to the centre frequency
+PULSE_SIGMAS = 4  # Half-length of the synthesized pulse, in standard deviations of its Gaussian envelope
+PIXELS_PER_WAVELENGTH = 4
+IMAGE_WIDTH_WAVELENGTHS = 40
+IMAGE_DEPTH_WAVELENGTHS = (5, 45)  # First and last image row, measured from the front face of the array
+DYNAMIC_RANGE_DB = 50  # Displayed range of the log-compressed B-mode image
+
+
+def image_region(positions, wavelength, width=IMAGE_WIDTH_WAVELENGTHS, depth=IMAGE_DEPTH_WAVELENGTHS):
+    """(x_range, y_range) of an image centred on the array and in front of it (towards +y), sized in wavelengths."""
+    centre = positions[:, 0].mean()
+    front = positions[:, 1].max()
+    return (centre - width * wavelength / 2, centre + width * wavelength / 2), (front + depth[0] * wavelength, front + depth[1] * wavelength)
+
+
+def pulse_sigma(frequency, bandwidth=FRACTIONAL_BANDWIDTH):
+    # Standard deviation of the Gaussian envelope whose spectrum is at half amplitude at frequency * (1 +- bandwidth / 2)
+    return np.sqrt(2 * np.log(2)) / (np.pi * bandwidth * frequency)
+
+
+def demo_scatterers(x_range, y_range, phase):
+    """(S, 3) scatterers (x, y, amplitude): a fixed grid of weak points and one strong point orbiting the image centre.
+
+    phase in [0, 1) is the position of the moving scatterer along its orbit.
+    """
+    x0, x1 = x_range
+    y0, y1 = y_range
+    width, height = x1 - x0, y1 - y0
+    fixed = [(x0 + fx * width, y0 + fy * height, 0.5) for fx in (0.25, 0.5, 0.75) for fy in (0.2, 0.8)]
+    angle = 2 * np.pi * phase
+    moving = (x0 + width * (0.5 + 0.3 * np.cos(angle)), y0 + height * (0.5 + 0.2 * np.sin(angle)), 1.0)
+    return np.array(fixed + [moving])
+
+
+class DelayAndSumImager:
+    def __init__(self, positions, frequency, speed, x, y, apodization=None, sampling_factor=SAMPLING_FACTOR,
+                 bandwidth=FRACTIONAL_BANDWIDTH):
+        """Receive beamformer for a diverging-wave transmit from the array centre, imaging the pixels of the x, y grid.
+
+        The delay table is built once. For every pixel and channel it holds the flat index of the baseband sample just
+        before the two-way delay, plus two complex weights. The weights fold together linear interpolation, the phase
+        rotation back to the carrier and the receive apodization. A frame is then one gather and one multiply-add over
+        pixels x channels, with no per-frame trigonometry, square roots or division. Frames with the same geometry
+        reuse the table and every per-frame buffer.
+        """
+        positions = np.asarray(positions, dtype=np.float64)
+        self.positions = positions
+        self.frequency = float(frequency)
+        self.speed = float(speed)
+        self.x, self.y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        self.sampling_rate = sampling_factor * self.frequency
+        self.sigma = pulse_sigma(self.frequency, bandwidth)
+        self.source = positions.mean(axis=0)
+        channels = len(positions)
+
+        X, Y = np.meshgrid(self.x, self.y)
+        px, py = X.reshape(-1, 1), Y.reshape(-1, 1)
+        transmit = np.sqrt((px - self.source[0]) ** 2 + (py - self.source[1]) ** 2 + self.source[2] ** 2)
+        receive = np.sqrt((px - positions[:, 0]) ** 2 + (py - positions[:, 1]) ** 2 + positions[:, 2] ** 2)
+        delays = (transmit + receive) / self.speed  # (pixels, channels) two-way delays in seconds
+
+        # The record covers the latest echo from the image plus the tail of its pulse
+        self.samples = int(np.ceil((delays.max() + PULSE_SIGMAS * self.sigma) * self.sampling_rate)) + 2
+        self.time = np.arange(self.samples) / self.sampling_rate
+
+        position = delays * self.sampling_rate
+        before = np.floor(position)
+        fraction = position - before
+        rotation = np.exp(2j * np.pi * self.frequency * delays)
+        if apodization is not None:
+            rotation *= np.asarray(apodization, dtype=np.float64)
+        self.index0 = (before.astype(np.int64) * channels + np.arange(channels)).astype(np.intp)
+        self.index1 = self.index0 + channels
+        self.weight0 = ((1 - fraction) * rotation).astype(np.complex64)
+        self.weight1 = (fraction * rotation).astype(np.complex64)
+
+        # Analytic-signal filter and baseband shift of the demodulator
+        spectrum_weights = np.zeros(self.samples)
+        spectrum_weights[0] = 1
+        spectrum_weights[1:(self.samples + 1) // 2] = 2
+        if self.samples % 2 == 0:
+            spectrum_weights[self.samples // 2] = 1
+        self.spectrum_weights = spectrum_weights[:, None]
+        self.baseband = np.exp(-2j * np.pi * self.frequency * self.time).astype(np.complex64)[:, None]
+
+        self.iq = np.empty((self.samples, channels), np.complex64)
+        self.gather0 = np.empty(self.index0.shape, np.complex64)
+        self.gather1 = np.empty(self.index0.shape, np.complex64)
+
+    @classmethod
+    def from_model(cls, model, pixels_per_wavelength=PIXELS_PER_WAVELENGTH, **region):
+        """Imager for the elements of a BeamformingSimulator, with its taper as receive apodization and an image_region grid."""
+        positions, amplitudes = model.geometry()
+        x_range, y_range = image_region(positions, model.wavelength, **region)
+        x = np.arange(x_range[0], x_range[1], model.wavelength / pixels_per_wavelength)
+        y = np.arange(y_range[0], y_range[1], model.wavelength / pixels_per_wavelength)
+        return cls(positions, model.frequency, model.wavelength * model.frequency, x, y, amplitudes)
+
+    @property
+    def table_bytes(self):
+        return sum(array.nbytes for array in (self.index0, self.index1, self.weight0, self.weight1))
+
+    # -------------------------------------------------------------------------------------------------------------------------------------
+
+    def synthesize(self, scatterers, noise=0.0, rng=None):
+        """(samples, channels) float32 RF echoes of point scatterers, given as (S, 2) (x, y) or (S, 3) (x, y, amplitude).
+
+        Every scatterer returns the transmit pulse to every element after its two-way delay. There is no spreading
+        loss, as after time-gain compensation. Only the samples under each pulse are evaluated, for all scatterers
+        and channels at once. noise adds white Gaussian noise with that standard deviation.
+        """
+        scatterers = np.atleast_2d(np.asarray(scatterers, dtype=np.float64))
+        amplitudes = scatterers[:, 2] if scatterers.shape[1] > 2 else np.ones(len(scatterers))
+        channels = len(self.positions)
+        sx, sy = scatterers[:, 0:1], scatterers[:, 1:2]
+        transmit = np.sqrt((sx - self.source[0]) ** 2 + (sy - self.source[1]) ** 2 + self.source[2] ** 2)
+        receive = np.sqrt((sx - self.positions[:, 0]) ** 2 + (sy - self.positions[:, 1]) ** 2 + self.positions[:, 2] ** 2)
+        delays = (transmit + receive) / self.speed  # (S, channels)
+
+        # (S, window, channels) sample indices under each pulse; samples beyond the record are dropped
+        half_window = int(np.ceil(PULSE_SIGMAS * self.sigma * self.sampling_rate))
+        first = np.floor(delays * self.sampling_rate).astype(np.intp) - half_window
+        rows = first[:, None, :] + np.arange(2 * half_window + 2)[None, :, None]
+        inside = (rows >= 0) & (rows < self.samples)
+        rows = np.clip(rows, 0, self.samples - 1)
+        offset = self.time[rows] - delays[:, None, :]
+        echoes = amplitudes[:, None, None] * np.exp(-0.5 * (offset / self.sigma) ** 2) * np.cos(2 * np.pi * self.frequency * offset)
+        echoes[~inside] = 0
+
+        rf = np.zeros((self.samples, channels), np.float32)
+        np.add.at(rf, (rows, np.broadcast_to(np.arange(channels), rows.shape)), echoes)
+        if noise:
+            rf += (rng or np.random.default_rng()).normal(0, noise, rf.shape).astype(np.float32)
+        return rf
+
+    def demodulate(self, rf):
+        # Analytic signal through the FFT, shifted to baseband so linear interpolation between samples stays accurate
+        analytic = np.fft.ifft(np.fft.fft(rf, axis=0) * self.spectrum_weights, axis=0)
+        np.multiply(analytic, self.baseband, out=self.iq, casting='same_kind')
+        return self.iq
+
+    def beamform(self, rf):
+        """Envelope image (ny, nx) of one frame of (samples, channels) RF data, normalized to its peak."""
+        iq = self.demodulate(rf).reshape(-1)
+        np.take(iq, self.index0, out=self.gather0)
+        np.take(iq, self.index1, out=self.gather1)
+        self.gather0 *= self.weight0
+        self.gather1 *= self.weight1
+        self.gather0 += self.gather1
+        envelope = np.abs(self.gather0.sum(axis=1)).reshape(len(self.y), len(self.x))
+        envelope /= max(float(envelope.max()), np.finfo(np.float32).tiny)
+        return envelope
+
+    def stream(self, scenes, noise=0.0, rng=None):
+        """Yield (scatterers, envelope) for each scatterer array of scenes; nothing is rebuilt between frames."""
+        for scatterers in scenes:
+            yield scatterers, self.beamform(self.synthesize(scatterers, noise, rng))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream delay-and-sum images of moving point scatterers from synthetic RF data.")
+    parser.add_argument('--scenario', choices=list(SCENARIO_SETTINGS), default='Ultrasound')
+    parser.add_argument('--elements', type=int, help="Elements in the array (defaults to the scenario's)")
+    parser.add_argument('--curvature', type=float, help="Array curvature in degrees (defaults to the scenario's)")
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--pixels-per-wavelength', type=float, default=PIXELS_PER_WAVELENGTH)
+    parser.add_argument('--noise', type=float, default=0.0, help="Standard deviation of additive RF noise")
+    parser.add_argument('--save', metavar='PATH', help="Save the last envelope image as .npy")
+    arguments = parser.parse_args()
+
+    scenario = SCENARIO_SETTINGS[arguments.scenario]
+    array_info = {
+        'num_elements': arguments.elements or scenario['num_elements'],
+        'spacing': scenario['elements_spacing'] * 3e8 / scenario['frequency'],
+        'curvature': scenario['curvature'] if arguments.curvature is None else arguments.curvature,
+    }
+    model = BeamformingSimulator(scenario['frequency'], 0, [array_info])
+
+    start = time.perf_counter()
+    imager = DelayAndSumImager.from_model(model, arguments.pixels_per_wavelength)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"{len(imager.x)} x {len(imager.y)} pixels x {len(imager.positions)} channels, {imager.samples} samples per channel; "
+          f"delay table {imager.table_bytes / 2 ** 20:.1f} MB built in {build_ms:.0f} ms")
+
+    x_range, y_range = (imager.x[0], imager.x[-1]), (imager.y[0], imager.y[-1])
+    scenes = (demo_scatterers(x_range, y_range, frame / arguments.frames) for frame in range(arguments.frames))
+    start = time.perf_counter()
+    envelope = None
+    for _, envelope in imager.stream(scenes, arguments.noise):
+        pass
+    elapsed = time.perf_counter() - start
+    print(f"{arguments.frames} frames in {elapsed:.2f} s: {arguments.frames / elapsed:.1f} frames/s, {elapsed / arguments.frames * 1000:.2f} ms per frame")
+
+    if arguments.save and envelope is not None:
+        np.save(arguments.save, envelope)
+
+
+if __name__ == "__main__":
+    main()
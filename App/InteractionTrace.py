@@ -0,0 +1,75 @@
+import json
+import os
+import time
+
+TRACE_VERSION = 1
+
+
+class TraceRecorder:
+    def __init__(self, trace_path):
+        """Records every UI parameter event to a JSON-lines trace for later headless replay (see App.TraceReplay).
+
+        The first line is a header; each following line is one event with its time since recording started, the value
+        the control was set to, and how long the controller slot took. Lines are flushed as they are written, so a
+        session that crashes still leaves a usable trace.
+        """
+        trace_directory = os.path.dirname(trace_path)
+        if trace_directory and not os.path.exists(trace_directory):
+            os.makedirs(trace_directory)
+        self.trace_path = trace_path
+        self.trace_file = open(trace_path, 'w', encoding='utf-8')
+        self.start = time.perf_counter()
+        self.depth = 0  # Slots triggered from inside another recorded slot are part of that event, not new ones
+        self.write({'type': 'header', 'version': TRACE_VERSION, 'started': time.strftime("%Y-%m-%dT%H:%M:%S")})
+
+    def write(self, record):
+        if self.trace_file is None:
+            return
+        self.trace_file.write(json.dumps(record) + '\n')
+        self.trace_file.flush()
+
+    def record(self, event, value, at=None, slot_ms=None):
+        at = time.perf_counter() - self.start if at is None else at
+        record = {'type': 'event', 't': round(at, 6), 'event': event, 'value': value}
+        if slot_ms is not None:
+            record['slot_ms'] = round(slot_ms, 3)
+        self.write(record)
+
+    def wrap(self, event, value, slot):
+        """A slot that records event with value() (read before the slot runs) whenever it is the outermost event."""
+        def traced_slot(*_):
+            if self.depth:
+                return slot()
+            at = time.perf_counter() - self.start
+            event_value = value()
+            self.depth += 1
+            start = time.perf_counter()
+            try:
+                slot()
+            finally:
+                self.depth -= 1
+                self.record(event, event_value, at, (time.perf_counter() - start) * 1000)
+        return traced_slot
+
+    def close(self):
+        if self.trace_file is not None:
+            self.trace_file.close()
+            self.trace_file = None
+
+
+def load_trace(trace_path):
+    """Return (header, events) from a recorded trace."""
+    header = None
+    events = []
+    with open(trace_path, encoding='utf-8') as trace_file:
+        for line in trace_file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get('type') == 'header':
+                header = record
+            elif record.get('type') == 'event':
+                events.append(record)
+    if header is None or header.get('version') != TRACE_VERSION:
+        raise ValueError(f"{trace_path} is not a version {TRACE_VERSION} interaction trace")
+    return header, events
@@ -1,40 +1,149 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        """One JSON object per line: timestamp, event name and the event's fields."""
+        entry = {'time': round(record.created, 6), 'event': record.event}
+        entry.update(record.fields)
+        return json.dumps(entry, default=str)
 
 
 class LoggingManager:
-    def __init__(self, log_file="Simulation.log"):
-        """Initialize logging configuration."""
+    def __init__(self, log_file="Simulation.log", performance_log_file="Performance.jsonl", rotation='size', max_bytes=1024 ** 2,
+                 backup_count=5, json_events=True, rate_limit_interval=0.25):
+        """Initialize logging configuration.
+
+        Records are handed to a queue on the calling thread and written by a background listener thread, so logging never
+        blocks the GUI on file I/O. The log file rotates by size ('size', max_bytes) or daily ('time'), keeping backup_count
+        old files. Structured performance events from log_event go to a separate JSON-lines file when json_events is set.
+        """
         log_directory = "Logging"
         if not os.path.exists(log_directory):
             os.makedirs(log_directory)  # Create the Logging directory if it does not exist
 
         log_path = os.path.join(log_directory, log_file)
         self.log_file = log_path
+        self.performance_log_file = os.path.join(log_directory, performance_log_file)
+        self.json_events = json_events
+
+        if rotation == 'time':
+            file_handler = logging.handlers.TimedRotatingFileHandler(self.log_file, when='midnight', backupCount=backup_count)
+        else:
+            file_handler = logging.handlers.RotatingFileHandler(self.log_file, maxBytes=max_bytes, backupCount=backup_count)
+        file_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+        file_handler.addFilter(lambda record: not hasattr(record, 'event'))
+        handlers = [file_handler]
+
+        if self.json_events:
+            performance_handler = logging.handlers.RotatingFileHandler(self.performance_log_file, maxBytes=max_bytes,
+                                                                       backupCount=backup_count)
+            performance_handler.setFormatter(JsonLinesFormatter())
+            performance_handler.addFilter(lambda record: hasattr(record, 'event'))
+            handlers.append(performance_handler)
+
+        self.queue = queue.SimpleQueue()
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        self.listening = True  # Until close() has stopped the listener
+        atexit.register(self.close)
+
+        self.logger = logging.getLogger("BeamformingSimulator")
+        self.logger.setLevel(logging.INFO)  # Log levels: DEBUG, INFO, WARNING, ERROR, CRITICAL
+        self.logger.propagate = False
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)  # A previous LoggingManager's queue must not receive records
+        self.logger.addHandler(logging.handlers.QueueHandler(self.queue))
 
-        logging.basicConfig(
-            filename=self.log_file,
-            level=logging.INFO,  # Log levels: DEBUG, INFO, WARNING, ERROR, CRITICAL
-            format="%(asctime)s - %(levelname)s - %(message)s"
-        )
+        # Rate limiting state for high-frequency sources: source -> (time of last emitted message, suppressed count,
+        # last suppressed (message, level) or None, timer that emits it when the interval expires or None)
+        self.rate_limit_interval = rate_limit_interval
+        self.rate_limits = {}
+        self.rate_limit_lock = threading.Lock()
 
-    def log(self, message, level='info'):
-        """General log method that logs messages based on the level specified."""
+    def log(self, message, level='info', source=None):
+        """General log method that logs messages based on the level specified.
+
+        Messages tagged with a source (for example a slider) are emitted at most once per rate_limit_interval. The
+        last message suppressed within an interval is still emitted when the interval expires (or on close), so the
+        final value of a slider drag is always logged; the number of messages dropped before it is reported with it.
+        """
+        if source is not None:
+            now = time.monotonic()
+            with self.rate_limit_lock:
+                last_emitted, suppressed, _, timer = self.rate_limits.get(source, (None, 0, None, None))
+                if last_emitted is not None and now - last_emitted < self.rate_limit_interval:
+                    if timer is None:
+                        timer = threading.Timer(last_emitted + self.rate_limit_interval - now, self.flush_suppressed, (source,))
+                        timer.daemon = True
+                        timer.start()
+                    self.rate_limits[source] = (last_emitted, suppressed + 1, (message, level), timer)
+                    return
+                if timer is not None:
+                    timer.cancel()  # Superseded by this newer message
+                self.rate_limits[source] = (now, 0, None, None)
+            message = self.with_suppressed_count(message, suppressed)
+
+        self.emit(message, level)
+
+    def flush_suppressed(self, source):
+        # Trailing edge of the rate limit: emit the last message suppressed for source, if it is still pending
+        with self.rate_limit_lock:
+            _, suppressed, pending, _ = self.rate_limits.get(source, (None, 0, None, None))
+            if pending is None:
+                return
+            self.rate_limits[source] = (time.monotonic(), 0, None, None)
+        message, level = pending
+        self.emit(self.with_suppressed_count(message, suppressed - 1), level)
+
+    @staticmethod
+    def with_suppressed_count(message, suppressed):
+        return f"{message} ({suppressed} similar messages suppressed)" if suppressed else message
+
+    def emit(self, message, level):
         {
-            'info': logging.info,
-            'error': logging.error,
-            'warning': logging.warning,
-            'debug': logging.debug
+            'info': self.logger.info,
+            'error': self.logger.error,
+            'warning': self.logger.warning,
+            'debug': self.logger.debug
         }[level](message)
 
+    def log_event(self, event, **fields):
+        """Record a structured performance or timing event as one JSON line."""
+        if self.json_events:
+            self.logger.info(event, extra={'event': event, 'fields': fields})
+
     def log_action(self, message):
-        logging.info(message)
+        self.logger.info(message)
 
     def log_error(self, message):
-        logging.error(message)
+        self.logger.error(message)
 
     def log_warning(self, message):
-        logging.warning(message)
+        self.logger.warning(message)
 
     def log_debug(self, message):
-        logging.debug(message)
+        self.logger.debug(message)
+
+    def close(self):
+        # Emit pending rate-limited messages and flush everything still queued; safe to call more than once
+        if not self.listening:
+            return
+        with self.rate_limit_lock:
+            timers = {source: state[3] for source, state in self.rate_limits.items()}
+        for source, timer in timers.items():
+            if timer is not None:
+                timer.cancel()
+            self.flush_suppressed(source)
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+        self.listening = False
+        atexit.unregister(self.close)  # Otherwise the hook would keep this manager and its handlers alive until exit
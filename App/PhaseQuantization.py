@@ -0,0 +1,143 @@
+import argparse
+import functools
+
+import numpy as np
+
+PHASE_BITS = range(1, 9)  # Phase-shifter resolutions offered, in bits
+PHASE_MODES = ('round', 'dither')
+TABLE_BITS = 14  # Resolution of the phasor table that replaces cos/sin of propagation phases (at most pi / 16384 rad of error)
+DITHER_SEED = 0  # Dithering is reproducible, so a quantized configuration always yields the same map and cache entry
+PATTERN_ANGLES = np.linspace(-90, 90, 1441)  # Beam profile angles of the comparison, fine enough for narrow quantization lobes
+
+
+def phasor_table(bits, dtype=np.complex128):
+    """The 2^bits unit-circle phasors exp(2 pi j m / 2^bits); cached per (bits, dtype), so the array is shared and read-only."""
+    return _cached_table(int(bits), np.dtype(dtype).str)
+
+
+@functools.lru_cache(maxsize=32)
+def _cached_table(bits, dtype):
+    size = 1 << bits
+    table = np.exp(2j * np.pi * np.arange(size) / size).astype(dtype)
+    table.setflags(write=False)
+    return table
+
+
+def phase_codes(phase, bits, mode='round', seed=DITHER_SEED):
+    """Phase-shifter codes in [0, 2^bits) for phases in radians.
+
+    'round' takes the nearest state, so the error follows the phase ramp periodically and concentrates into
+    quantization lobes. 'dither' rounds up with probability equal to the fractional part. The error is then unbiased
+    and uncorrelated between elements, and it spreads into a raised sidelobe floor instead.
+    """
+    if mode not in PHASE_MODES:
+        raise ValueError(f"Unknown phase quantization mode '{mode}', expected one of {PHASE_MODES}")
+    if int(bits) not in PHASE_BITS:
+        raise ValueError(f"Phase quantization takes {PHASE_BITS.start} to {PHASE_BITS.stop - 1} bits, got {bits}")
+    scaled = np.asarray(phase, dtype=np.float64) * ((1 << bits) / (2 * np.pi))
+    if mode == 'round':
+        codes = np.rint(scaled)
+    else:
+        codes = np.floor(scaled + np.random.default_rng(seed).random(scaled.shape))
+    return codes.astype(np.intp) & ((1 << bits) - 1)
+
+
+def quantized_phasors(phase, bits, mode='round', seed=DITHER_SEED):
+    """exp(j phase) with the phase on a 2^bits-state shifter, read from the table instead of evaluating exp."""
+    return phasor_table(bits)[phase_codes(phase, bits, mode, seed)]
+
+
+def table_phasors(phase, out, codes, table_bits=TABLE_BITS):
+    """exp(j phase) into out, rounded to the phasor table, without evaluating cos or sin.
+
+    phase is overwritten and codes is an intp scratch array of the same shape. The table matches out's dtype.
+    """
+    phase *= (1 << table_bits) / (2 * np.pi)
+    np.rint(phase, out=phase)
+    np.copyto(codes, phase, casting='unsafe')
+    np.bitwise_and(codes, (1 << table_bits) - 1, out=codes)  # Two's complement makes this the modulo for negative codes too
+    return np.take(phasor_table(table_bits, out.dtype), codes, out=out)
+
+
+# Quantization lobes ----------------------------------------------------------------------------------------------------------------------
+
+def main_lobe_span(pattern, index):
+    # [left, right] indices of the nulls (first local minima) on either side of the peak at index
+    rising = np.flatnonzero(np.diff(pattern[:index + 1]) <= 0)
+    falling = np.flatnonzero(np.diff(pattern[index:]) >= 0)
+    return (rising[-1] + 1 if rising.size else 0), (index + falling[0] if falling.size else len(pattern) - 1)
+
+
+def peak_sidelobe_db(pattern):
+    # Highest level outside the main lobe relative to the peak, or -inf when the pattern has no sidelobes
+    index = int(pattern.argmax())
+    left, right = main_lobe_span(pattern, index)
+    outside = np.concatenate((pattern[:left], pattern[right + 1:]))
+    return float(10 * np.log10(outside.max() / pattern[index])) if outside.size and outside.max() > 0 else -np.inf
+
+
+def quantization_report(angles, ideal_pattern, quantized_pattern, amplitudes, bits, mode):
+    """Measured and predicted quantization lobes, from the complex ideal and quantized patterns (same angles).
+
+    The lobe is the peak of the error pattern |AF_q - AF|^2, relative to the ideal main beam. Rounding predicts a
+    peak quantization lobe of 2^(-2 bits) (-6.02 dB per bit). Dithering predicts an average error level of
+    sigma^2 sum(a^2) / sum(a)^2, where sigma^2 = step^2 / 6 is the phase-error variance of random rounding.
+    """
+    ideal = np.abs(ideal_pattern) ** 2
+    quantized = np.abs(quantized_pattern) ** 2
+    reference = ideal.max()
+    error = np.abs(quantized_pattern - ideal_pattern) ** 2 / reference
+    lobe = int(error.argmax())
+    step = 2 * np.pi / (1 << bits)
+    amplitudes = np.abs(amplitudes)
+    if mode == 'round':
+        predicted = -20 * bits * np.log10(2)
+    else:
+        predicted = 10 * np.log10(step ** 2 / 6 * (amplitudes ** 2).sum() / max(amplitudes.sum(), np.finfo(np.float64).tiny) ** 2)
+    return {
+        'bits': int(bits),
+        'mode': mode,
+        'lobe_db': float(10 * np.log10(max(error[lobe], np.finfo(np.float64).tiny))),
+        'lobe_angle': float(angles[lobe]),
+        'predicted_lobe_db': float(predicted),
+        'mean_error_db': float(10 * np.log10(max(error.mean(), np.finfo(np.float64).tiny))),
+        'ideal_sidelobe_db': peak_sidelobe_db(ideal),
+        'quantized_sidelobe_db': peak_sidelobe_db(quantized),
+        'pointing_error': float(angles[quantized.argmax()] - angles[ideal.argmax()]),
+        'gain_loss_db': float(10 * np.log10(max(quantized.max(), np.finfo(np.float64).tiny) / reference)),
+    }
+
+
+def main():
+    from App.Scenarios import SCENARIO_SETTINGS
+    from App.SimpleSimulation import BeamformingSimulator
+
+    parser = argparse.ArgumentParser(description="Quantization lobes and table speedup of N-bit phase shifters against ideal phases.")
+    parser.add_argument('--scenario', choices=list(SCENARIO_SETTINGS), default='5G')
+    parser.add_argument('--arrays', type=int, default=1)
+    parser.add_argument('--elements', type=int, help="Elements per array (defaults to the scenario's)")
+    parser.add_argument('--steering', type=float, default=23.0, help="Steering angle in degrees")
+    parser.add_argument('--bits', type=int, nargs='+', default=list(PHASE_BITS), choices=list(PHASE_BITS))
+    parser.add_argument('--mode', choices=PHASE_MODES, default='round')
+    parser.add_argument('--resolution', type=int, default=200)
+    arguments = parser.parse_args()
+
+    scenario = SCENARIO_SETTINGS[arguments.scenario]
+    array_info = {
+        'num_elements': arguments.elements or scenario['num_elements'],
+        'spacing': scenario['elements_spacing'] * 3e8 / scenario['frequency'],
+        'curvature': scenario['curvature'],
+    }
+    print(f"{'bits':>4} {'lobe dB':>8} {'predicted':>9} {'at deg':>7} {'PSL dB':>7} {'ideal PSL':>9} {'pointing':>8} {'speedup':>7}")
+    for bits in arguments.bits:
+        model = BeamformingSimulator(scenario['frequency'], arguments.steering, [array_info] * arguments.arrays, phase_bits=bits,
+                                     phase_mode=arguments.mode)
+        comparison = model.compare_quantization((-10, 10), (0, 10), arguments.resolution)
+        report = comparison['report']
+        print(f"{bits:>4} {report['lobe_db']:>8.1f} {report['predicted_lobe_db']:>9.1f} {report['lobe_angle']:>7.2f} "
+              f"{report['quantized_sidelobe_db']:>7.1f} {report['ideal_sidelobe_db']:>9.1f} {report['pointing_error']:>8.3f} "
+              f"{comparison['timing']['speedup']:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import hashlib
+import time
+
+import numpy as np
+
+
+def fingerprint(value):
+    """Stable, hashable summary of a stage parameter (arrays are summarised by content, not identity)."""
+    if isinstance(value, np.ndarray):
+        return ('ndarray', value.shape, str(value.dtype), hashlib.sha1(np.ascontiguousarray(value).tobytes()).hexdigest())
+    if isinstance(value, dict):
+        return ('dict', tuple((key, fingerprint(value[key])) for key in sorted(value)))
+    if isinstance(value, (list, tuple)):
+        return ('sequence', tuple(fingerprint(item) for item in value))
+    if isinstance(value, (np.floating, np.integer)):
+        return value.item()
+    return value
+
+
+class Stage:
+    def __init__(self, name, function, params=(), dependencies=()):
+        self.name = name
+        self.function = function  # Called with a StageInputs mapping, returns the stage output
+        self.params = tuple(params)
+        self.dependencies = tuple(dependencies)
+
+
+class StageInputs:
+    def __init__(self, pipeline, stage):
+        self.pipeline = pipeline
+        self.stage = stage
+
+    def __getitem__(self, name):
+        # Dependencies are resolved lazily, so a stage that does not need an input never triggers its recomputation
+        if name in self.stage.dependencies:
+            return self.pipeline.get(name)
+        if name in self.stage.params:
+            return self.pipeline.params[name]
+        raise KeyError(f"Stage '{self.stage.name}' does not declare input '{name}'")
+
+
+class Pipeline:
+    def __init__(self):
+        """A small DAG of memoized stages.
+
+        Each stage declares the parameters and upstream stages it reads. A stage's signature combines its own parameter
+        values with its dependencies' signatures, so changing a parameter invalidates exactly the stages downstream of it.
+        Every stage keeps its last output and is rerun only when its signature changes.
+        """
+        self.stages = {}
+        self.params = {}
+        self.memo = {}  # Stage name -> (signature, output)
+        self.signatures = {}  # Per-run cache of computed signatures
+        self.run_log = []  # (stage name, 'ran' or 'reused', milliseconds) for the last run
+        self.timing_stack = []
+
+    def add_stage(self, name, function, params=(), dependencies=()):
+        for dependency in dependencies:
+            if dependency not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dependency}'")
+        self.stages[name] = Stage(name, function, params, dependencies)
+
+    def set_params(self, **params):
+        self.params.update(params)
+
+    def signature(self, name):
+        if name not in self.signatures:
+            stage = self.stages[name]
+            own = tuple((param, fingerprint(self.params[param])) for param in stage.params)
+            upstream = tuple(self.signature(dependency) for dependency in stage.dependencies)
+            self.signatures[name] = hashlib.sha1(repr((name, own, upstream)).encode('utf-8')).hexdigest()
+        return self.signatures[name]
+
+    def get(self, name):
+        signature = self.signature(name)
+        memoized = self.memo.get(name)
+        if memoized is not None and memoized[0] == signature:
+            if not any(entry[0] == name for entry in self.run_log):
+                self.run_log.append((name, 'reused', 0.0))
+            return memoized[1]
+
+        # Time spent in upstream stages pulled from inside this one is excluded from its own time
+        self.timing_stack.append(0.0)
+        start = time.perf_counter()
+        output = self.stages[name].function(StageInputs(self, self.stages[name]))
+        elapsed = time.perf_counter() - start
+        nested = self.timing_stack.pop()
+        if self.timing_stack:
+            self.timing_stack[-1] += elapsed
+
+        self.memo[name] = (signature, output)
+        self.run_log.append((name, 'ran', (elapsed - nested) * 1000))
+        return output
+
+    def run(self, targets):
+        """Bring the target stages up to date and return their outputs."""
+        self.signatures = {}
+        self.run_log = []
+        return {target: self.get(target) for target in targets}
+
+    def invalidate(self, name=None):
+        if name is None:
+            self.memo.clear()
+        else:
+            self.memo.pop(name, None)
+
+    def report(self):
+        lines = [f"{name:<16} {status:<7} {milliseconds:8.2f} ms" for name, status, milliseconds in self.run_log]
+        total = sum(milliseconds for _, _, milliseconds in self.run_log)
+        lines.append(f"{'total':<16} {'':<7} {total:8.2f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,158 @@
+import heapq
+import itertools
+import threading
+
+from App.ResultCache import ResultCache
+from App.SimpleSimulation import BeamformingSimulator
+from App.Workspace import Workspace
+
+
+class PrewarmCancelled(Exception):
+    """Raised from a running job's checkpoint once the prewarmer has been stopped."""
+
+
+class Prewarmer:
+    # Priorities for schedule(); lower runs first
+    NEXT_STATE_PRIORITY = 0
+    PRESET_PRIORITY = 1
+    SPECULATIVE_PRIORITY = 2
+
+    def __init__(self, result_cache, logging=None, memory_cap_bytes=256 * 1024 ** 2, max_pending=32):
+        """Computes likely future scenes on a background thread and stores them in the result cache.
+
+        Work only runs while the controller reports itself idle (see pause/resume). A job is computed in pieces of a few
+        milliseconds and checks in between, so a pause stops a running job within one piece instead of letting it
+        compete with an interaction for the CPU. memory_cap_bytes bounds the total of the results prewarmed into the
+        cache (while they remain there) and the estimated working sets of queued and running jobs; a job that would
+        exceed it is skipped. At most max_pending jobs are queued; the lowest-priority ones are dropped first.
+        """
+        self.result_cache = result_cache
+        self.logging = logging
+        self.memory_cap_bytes = memory_cap_bytes
+        self.max_pending = max_pending
+
+        self.pending = []  # Heap of (priority, sequence, key, job)
+        self.pending_keys = set()
+        self.pending_bytes = 0  # Estimated working sets of queued jobs and the running one
+        self.stored_bytes = {}  # Cache key -> size of each result prewarmed so far
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.idle = threading.Event()
+        self.idle.set()
+        self.running = True
+        self.workspace = Workspace()  # Owned by the worker thread and lent to each job's model
+
+        self.thread = threading.Thread(target=self.work, name="Prewarmer", daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def estimate_job_bytes(arrays_info, resolution, angles):
+        # Complex accumulator plus the float64 temporaries of one element iteration, and the beam profile buffers
+        grid_points = resolution * resolution
+        angle_samples = 4096 if isinstance(angles, dict) else len(angles)  # Adaptive sampling stays well below this
+        return grid_points * (16 + 4 * 8) + angle_samples * 16 * 3
+
+    def schedule(self, priority, label, frequency, steering_angle, arrays_info, x_range, y_range, resolution, angles, precision='float64',
+                 far_field=False, chunk_size=None, coupling=False):
+        model = BeamformingSimulator(frequency, steering_angle, [dict(info) for info in arrays_info], precision, far_field, chunk_size,
+                                     coupling)
+        key = ResultCache.make_key(model.canonical_inputs(x_range, y_range, resolution, angles))
+        if key in self.result_cache:
+            return
+
+        estimate = self.estimate_job_bytes(model.arrays_info, resolution, angles)
+        with self.condition:
+            if key in self.pending_keys:
+                return
+            if self.committed_bytes() + estimate > self.memory_cap_bytes:
+                self.log(f"Prewarm of {label} skipped: exceeds the memory cap")
+                return
+            job = (label, model, x_range, y_range, resolution, angles, estimate)
+            heapq.heappush(self.pending, (priority, next(self.sequence), key, job))
+            self.pending_keys.add(key)
+            self.pending_bytes += estimate
+            if len(self.pending) > self.max_pending:
+                # Drop the least important (largest) entry
+                dropped = max(self.pending)
+                self.pending.remove(dropped)
+                heapq.heapify(self.pending)
+                self.pending_keys.discard(dropped[2])
+                self.pending_bytes -= dropped[3][-1]
+            self.condition.notify()
+
+    def committed_bytes(self):
+        # Prewarmed results the cache has since evicted no longer count against the cap. Called with the condition held
+        for key in [key for key in self.stored_bytes if key not in self.result_cache]:
+            del self.stored_bytes[key]
+        return sum(self.stored_bytes.values()) + self.pending_bytes
+
+    def cancel_speculative(self):
+        """Forget speculative jobs, which were predicted from a state the user has since left."""
+        with self.condition:
+            kept = [entry for entry in self.pending if entry[0] < self.SPECULATIVE_PRIORITY]
+            self.pending_bytes -= sum(entry[3][-1] for entry in self.pending if entry[0] >= self.SPECULATIVE_PRIORITY)
+            self.pending_keys = {entry[2] for entry in kept}
+            self.pending = kept
+            heapq.heapify(self.pending)
+
+    def pause(self):
+        self.idle.clear()
+
+    def resume(self):
+        self.idle.set()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.pending.clear()
+            self.pending_keys.clear()
+            self.pending_bytes = 0
+            self.condition.notify()
+        self.idle.set()
+
+    def checkpoint(self):
+        # Called by a running job between pieces: waits while the user is being served and abandons the job once stopped
+        self.idle.wait()
+        if not self.running:
+            raise PrewarmCancelled()
+
+    def work(self):
+        while True:
+            with self.condition:
+                while self.running and not self.pending:
+                    self.condition.wait()
+                if not self.running:
+                    return
+
+            # Yield to the user: never start a job while an interaction is being served
+            self.idle.wait()
+
+            with self.condition:
+                if not self.running or not self.pending:
+                    continue
+                _, _, key, job = heapq.heappop(self.pending)
+
+            label, model, x_range, y_range, resolution, angles, estimate = job
+            model.workspace = self.workspace
+            stored = 0
+            try:
+                if key not in self.result_cache:
+                    scene = model.compute_scene(x_range, y_range, resolution, angles, checkpoint=self.checkpoint)
+                    self.result_cache.put(key, scene)
+                    stored = sum(array.nbytes for array in scene.values())
+                    self.log(f"Prewarmed {label}", level='debug')
+            except PrewarmCancelled:
+                return
+            except Exception as error:
+                self.log(f"Prewarm of {label} failed: {error}", level='warning')
+            finally:
+                with self.condition:
+                    self.pending_keys.discard(key)
+                    if self.running:
+                        self.pending_bytes -= estimate
+                    if stored:
+                        self.stored_bytes[key] = stored
+
+    def log(self, message, level='info'):
+        if self.logging is not None:
+            self.logging.log(message, level)
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+
+
+class ResultCache:
+    def __init__(self, cache_directory="Cache", max_bytes=512 * 1024 ** 2):
+        """Content-addressed, size-bounded LRU store of simulation results on disk.
+
+        Each entry is a directory named after the hash of the canonical inputs, holding one .npy file per array.
+        An entry's modification time records its last use, so eviction drops the least recently used entries first.
+        """
+        self.cache_directory = cache_directory
+        self.max_bytes = max_bytes
+        if not os.path.exists(self.cache_directory):
+            os.makedirs(self.cache_directory)
+
+    @staticmethod
+    def make_key(inputs):
+        canonical = json.dumps(inputs, sort_keys=True, separators=(',', ':'), default=float)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_directory, key)
+
+    def __contains__(self, key):
+        return os.path.isdir(self.entry_path(key))
+
+    def get(self, key):
+        """Return the cached arrays for key as read-only memory maps, or None on a miss."""
+        entry_path = self.entry_path(key)
+        try:
+            names = [name for name in os.listdir(entry_path) if name.endswith('.npy')]
+            results = {name[:-4]: np.load(os.path.join(entry_path, name), mmap_mode='r') for name in names}
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+
+        try:
+            os.utime(entry_path)  # Mark as most recently used
+        except OSError:
+            pass
+        return results
+
+    def put(self, key, results):
+        """Store a dict of arrays under key. Entries are written to a temporary directory and renamed into place."""
+        entry_path = self.entry_path(key)
+        if os.path.isdir(entry_path):
+            os.utime(entry_path)
+            return
+
+        temporary_path = os.path.join(self.cache_directory, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(temporary_path)
+        try:
+            for name, array in results.items():
+                np.save(os.path.join(temporary_path, f"{name}.npy"), np.asarray(array))
+            os.replace(temporary_path, entry_path)
+        except OSError:
+            # Another process stored the same key first; its entry is equivalent
+            shutil.rmtree(temporary_path, ignore_errors=True)
+
+        self.evict()
+
+    def entries(self):
+        entries = []
+        for name in os.listdir(self.cache_directory):
+            entry_path = os.path.join(self.cache_directory, name)
+            if name.startswith('.') or not os.path.isdir(entry_path):
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(entry_path))
+                entries.append((os.path.getmtime(entry_path), size, entry_path))
+            except FileNotFoundError:
+                continue
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        entries = sorted(self.entries())  # Oldest access first
+        total = sum(size for _, size, _ in entries)
+        while entries and total > self.max_bytes:
+            _, size, entry_path = entries.pop(0)
+            shutil.rmtree(entry_path, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        for _, _, entry_path in self.entries():
+            shutil.rmtree(entry_path, ignore_errors=True)
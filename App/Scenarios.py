@@ -0,0 +1,38 @@
+# Preset scenarios cycled by the scenarios button. Element spacing is in wavelengths at the scenario frequency.
+SCENARIO_SETTINGS = {
+    '5G': {
+        'frequency': 3.5e9,
+        'elements_spacing': 0.25,
+        'curvature': 0,
+        'num_elements': 16
+    },
+    'Ultrasound': {
+        'frequency': 5e6,
+        'elements_spacing': 0.5,
+        'curvature': 180,
+        'num_elements': 32
+    },
+    'Tumor Ablation': {
+        'frequency': 20e6,
+        'elements_spacing': 0.1,
+        'curvature': 90,
+        'num_elements': 64
+    }
+}
+
+SCENARIO_CYCLE = ['5G', 'Ultrasound', 'Tumor Ablation']
+
+# Operating frequencies offered by the frequency selector (and used as the frequency levels of parameter studies)
+OPERATING_FREQUENCIES = [
+    700e6,  # 700 MHz (5G)
+    900e6,  # 900 MHz (5G)
+    1.8e9,  # 1.8 GHz (5G)
+    2.1e9,  # 2.1 GHz (5G)
+    3.5e9,  # 3.5 GHz (5G)
+    5e9,  # 5 GHz (5G and advanced applications)
+    1e6,  # 1 MHz (Ultrasound, tumor ablation)
+    3e6,  # 3 MHz (Ultrasound, therapeutic applications)
+    5e6,  # 5 MHz (Ultrasound, industrial applications)
+    10e6,  # 10 MHz (Ultrasound, tumor ablation)
+    20e6  # 20 MHz (Ultrasound, advanced tumor ablation)
+]
@@ -0,0 +1,340 @@
+import argparse
+import asyncio
+import collections
+import http.client
+import io
+import json
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from App.ResultCache import ResultCache
+from App.SimpleSimulation import BeamformingSimulator, ENGINE_VERSION
+
+DEFAULT_REQUEST = {
+    'x_range': (-10, 10),
+    'y_range': (0, 10),
+    'resolution': 200,
+    'angles': {'start': -90, 'stop': 90, 'tolerance_db': 0.5},
+    'precision': 'float64',
+}
+REQUIRED_KEYS = ('frequency', 'steering_angle', 'arrays_info')
+OUTPUTS = ('intensity', 'array_factor', 'angles', 'x', 'y', 'scene')
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+def is_number(value):
+    # JSON numbers arrive as int or float; booleans are ints to Python but not numbers to a client
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and np.isfinite(value)
+
+
+class SceneLRU:
+    def __init__(self, max_bytes=512 * 1024 ** 2):
+        """In-memory LRU of computed scenes shared by every client, bounded by the total size of the stored arrays.
+
+        Scenes of one batch share their x and y axes, so arrays are counted once however many entries hold them.
+        """
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()
+        self.arrays = {}  # id of every stored array -> [array, number of entries holding it]
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        scene = self.entries.get(key)
+        if scene is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return scene
+
+    def put(self, key, scene):
+        if key in self.entries:
+            return
+        self.entries[key] = scene
+        for array in scene.values():
+            held = self.arrays.setdefault(id(array), [array, 0])
+            held[1] += 1
+            if held[1] == 1:
+                self.total_bytes += array.nbytes
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            for array in evicted.values():
+                held = self.arrays[id(array)]
+                held[1] -= 1
+                if held[1] == 0:
+                    del self.arrays[id(array)]
+                    self.total_bytes -= array.nbytes
+
+
+class SimulationService:
+    def __init__(self, batch_window=0.005, cache_bytes=512 * 1024 ** 2, workers=2):
+        """Serves BeamformingSimulator results to local clients.
+
+        Requests that share a geometry (everything except the steering angle) and arrive within batch_window seconds of
+        each other are coalesced into one batched computation: the propagation basis is built once and every steering
+        angle is a row of a single matrix product. Results are kept in a shared in-memory LRU.
+        """
+        self.batch_window = batch_window
+        self.cache = SceneLRU(cache_bytes)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="Simulation")
+        self.pending_batches = {}  # Geometry key -> {scene key: (request, future)}
+        self.batches_run = 0
+        self.requests_served = 0
+
+    # Simulation -------------------------------------------------------------------------------------------------------------------------
+
+    @staticmethod
+    def normalize_request(payload):
+        unknown = sorted(set(payload) - set(REQUIRED_KEYS) - set(DEFAULT_REQUEST))
+        if unknown:
+            # Silently ignoring them would return an exact result the client did not ask for
+            raise ValueError(f"Unsupported request keys {unknown}; expected {list(REQUIRED_KEYS) + list(DEFAULT_REQUEST)}")
+        request = dict(DEFAULT_REQUEST)
+        request.update(payload)
+        for required in REQUIRED_KEYS:
+            if required not in request:
+                raise ValueError(f"Missing '{required}'")
+        if request['precision'] not in ('float64', 'float32'):
+            raise ValueError("precision must be 'float64' or 'float32'")
+        # Checked here so a bad value is the client's 400 rather than an error (or a division by zero) inside the simulation
+        if not is_number(request['frequency']) or request['frequency'] <= 0:
+            raise ValueError("frequency must be a positive number of Hz")
+        if not is_number(request['steering_angle']):
+            raise ValueError("steering_angle must be a number of degrees")
+        if not isinstance(request['resolution'], int) or isinstance(request['resolution'], bool) or request['resolution'] <= 0:
+            raise ValueError("resolution must be a positive integer")
+        for name in ('x_range', 'y_range'):
+            bounds = request[name]
+            if not isinstance(bounds, (list, tuple)) or len(bounds) != 2 or not all(is_number(bound) for bound in bounds):
+                raise ValueError(f"{name} must be a [start, stop] pair of numbers")
+        if not isinstance(request['arrays_info'], list) or not request['arrays_info']:
+            raise ValueError("arrays_info must be a list describing at least one array")
+        for info in request['arrays_info']:
+            if not isinstance(info, dict):
+                raise ValueError("Every arrays_info entry must be an object")
+            for key in ('num_elements', 'rows'):
+                count = info.get(key, None if key == 'num_elements' else 1)
+                if not isinstance(count, int) or isinstance(count, bool) or count <= 0:
+                    raise ValueError(f"{key} must be a positive integer")
+            for key in ('spacing', 'curvature', 'row_spacing'):
+                if (key in info or key != 'row_spacing') and not is_number(info.get(key)):
+                    raise ValueError(f"{key} must be a number")
+        return request
+
+    @staticmethod
+    def model_for(request):
+        return BeamformingSimulator(float(request['frequency']), float(request['steering_angle']), request['arrays_info'], request['precision'])
+
+    @classmethod
+    def scene_key(cls, request):
+        model = cls.model_for(request)
+        return ResultCache.make_key(model.canonical_inputs(request['x_range'], request['y_range'], request['resolution'], request['angles']))
+
+    @staticmethod
+    def geometry_key(request):
+        geometry = {key: value for key, value in request.items() if key not in ('steering_angle', 'output')}
+        return ResultCache.make_key(geometry)
+
+    async def simulate(self, payload):
+        request = self.normalize_request(payload)
+        key = self.scene_key(request)
+        scene = self.cache.get(key)
+        if scene is not None:
+            return scene
+
+        loop = asyncio.get_running_loop()
+        geometry_key = self.geometry_key(request)
+        batch = self.pending_batches.get(geometry_key)
+        if batch is None:
+            batch = self.pending_batches[geometry_key] = {}
+            loop.call_later(self.batch_window, lambda: asyncio.ensure_future(self.run_batch(geometry_key)))
+
+        if key not in batch:
+            batch[key] = (request, loop.create_future())
+        return await batch[key][1]
+
+    async def run_batch(self, geometry_key):
+        batch = self.pending_batches.pop(geometry_key)
+        requests = [request for request, _ in batch.values()]
+        self.batches_run += 1
+        try:
+            scenes = await asyncio.get_running_loop().run_in_executor(self.executor, self.compute_batch, requests)
+        except Exception as error:
+            for _, future in batch.values():
+                future.set_exception(error)
+            return
+
+        for (key, (_, future)), scene in zip(batch.items(), scenes):
+            self.cache.put(key, scene)
+            future.set_result(scene)
+
+    @classmethod
+    def compute_batch(cls, requests):
+        # Every request in a batch shares the geometry, so the first one describes it
+        model = cls.model_for(requests[0])
+        first = requests[0]
+        steering_angles = [float(request['steering_angle']) for request in requests]
+        x, y, intensities = model.simulate_steering_batch(first['x_range'], first['y_range'], first['resolution'], steering_angles)
+
+        positions = model.element_positions(model.arrays_info[0])
+        amplitudes = model.element_amplitudes(model.arrays_info[0])
+        directivity = model.element_directivity(model.arrays_info[:1])
+        scenes = []
+        for steering_angle, intensity in zip(steering_angles, intensities):
+            angles, array_factor = model.sampled_array_factor(positions, model.k, steering_angle, first['angles'], amplitudes, directivity)
+            # A copy rather than a view of the batch, so evicting the scene frees what the cache counted for it
+            scenes.append({'x': x, 'y': y, 'intensity': intensity.copy(), 'angles': angles, 'array_factor': array_factor})
+        return scenes
+
+    # HTTP -------------------------------------------------------------------------------------------------------------------------------
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                    content_length = int(headers.get('content-length', 0))
+                    if content_length < 0:
+                        raise ValueError("negative Content-Length")
+                except ValueError as error:
+                    # The rest of the stream cannot be framed, so the error is the last response on this connection
+                    status, content_type, content = self.json_response(400, {'error': f"Malformed request: {error}"})
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(content_length)
+                    status, content_type, content = await self.route(method, path, body)
+                    keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: {content_type}\r\n"
+                             f"Content-Length: {len(content)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                             .encode('latin-1') + content)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        path, _, query = path.partition('?')
+        if path == '/health':
+            return self.json_response(200, {'status': 'ok', 'engine_version': ENGINE_VERSION})
+        if path == '/stats':
+            return self.json_response(200, {
+                'requests_served': self.requests_served, 'batches_run': self.batches_run, 'cache_entries': len(self.cache.entries),
+                'cache_bytes': self.cache.total_bytes, 'cache_hits': self.cache.hits, 'cache_misses': self.cache.misses,
+            })
+        if path != '/simulate':
+            return self.json_response(404, {'error': f"Unknown path {path}"})
+        if method != 'POST':
+            return self.json_response(405, {'error': "Use POST with a JSON body"})
+
+        try:
+            payload = json.loads(body or b'{}')
+            if not isinstance(payload, dict):
+                raise ValueError("The request body must be a JSON object")
+            output = payload.pop('output', 'intensity')
+            if output not in OUTPUTS:
+                raise ValueError(f"output must be one of {OUTPUTS}")
+            scene = await self.simulate(payload)
+        except (ValueError, KeyError, TypeError) as error:
+            return self.json_response(400, {'error': str(error)})
+        except Exception as error:
+            return self.json_response(500, {'error': str(error)})
+
+        self.requests_served += 1
+        # Arrays travel as raw .npy bytes; a whole scene is an .npz archive of them
+        buffer = io.BytesIO()
+        if output == 'scene':
+            np.savez(buffer, **scene)
+        else:
+            np.save(buffer, np.asarray(scene[output]))
+        return 200, 'application/octet-stream', buffer.getvalue()
+
+    @staticmethod
+    def json_response(status, payload):
+        return status, 'application/json', json.dumps(payload).encode('utf-8')
+
+    async def serve(self, host='127.0.0.1', port=8765, unix_socket=None):
+        if unix_socket:
+            server = await asyncio.start_unix_server(self.handle_connection, path=unix_socket)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=60):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ServiceClient:
+    def __init__(self, host='127.0.0.1', port=8765, unix_socket=None, timeout=60):
+        """Minimal client for scripts; keeps one connection open across calls."""
+        if unix_socket:
+            self.connection = UnixHTTPConnection(unix_socket, timeout)
+        else:
+            self.connection = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def simulate(self, frequency, steering_angle, arrays_info, output='intensity', **options):
+        payload = dict(options, frequency=frequency, steering_angle=steering_angle, arrays_info=arrays_info, output=output)
+        self.connection.request('POST', '/simulate', body=json.dumps(payload), headers={'Content-Type': 'application/json'})
+        response = self.connection.getresponse()
+        content = response.read()
+        if response.status != 200:
+            raise RuntimeError(json.loads(content).get('error', f"HTTP {response.status}"))
+        loaded = np.load(io.BytesIO(content))
+        return dict(loaded) if output == 'scene' else loaded
+
+    def stats(self):
+        self.connection.request('GET', '/stats')
+        return json.loads(self.connection.getresponse().read())
+
+    def close(self):
+        self.connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve beamforming simulations to local clients over HTTP/JSON.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix-socket', help="Listen on this Unix socket path instead of TCP")
+    parser.add_argument('--batch-window', type=float, default=0.005, help="Seconds to wait for requests to coalesce")
+    parser.add_argument('--cache-mb', type=int, default=512)
+    arguments = parser.parse_args()
+
+    service = SimulationService(arguments.batch_window, arguments.cache_mb * 1024 ** 2)
+    where = arguments.unix_socket or f"http://{arguments.host}:{arguments.port}"
+    print(f"Beamforming simulation service listening on {where}")
+    try:
+        asyncio.run(service.serve(arguments.host, arguments.port, arguments.unix_socket))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,47 @@
+import hashlib
+import os
+import time
+
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.colors import LogNorm
+from matplotlib.colors import LogNorm, ListedColormap
 from math import sin, radians
 
+from App.AdaptiveSampling import adaptive_angles, initial_sample_count
+from App.Coupling import coupled_weights, factorize
+from App.Directivity import GAIN_MAP_MAX_ENTRIES, ElementDirectivity, pattern_table
+from App.PhaseQuantization import PATTERN_ANGLES, TABLE_BITS, quantization_report, quantized_phasors, table_phasors
+from App.Tapers import taper_window
+from App.Workspace import Workspace
+
+# Bump whenever a change alters computed results, so persisted cache entries from older engines are never reused
+ENGINE_VERSION = "3"
+
+COMPLEX_DTYPES = {'float64': np.complex128, 'float32': np.complex64}
+REAL_DTYPES = {'float64': np.float64, 'float32': np.float32}
+PROBE_BLOCK_ENTRIES = 4_000_000  # Elements x probe points evaluated per block by probe_field (about 64 MB complex)
+CHECKPOINT_ENTRIES = 1_000_000  # Elements x grid points evaluated between checkpoint() calls (a few milliseconds)
+# array_info keys by what they determine: element positions (and orientations), amplitude weights and element patterns
+GEOMETRY_KEYS = ('num_elements', 'spacing', 'curvature', 'rows', 'row_spacing')
+TAPER_KEYS = ('taper', 'taper_parameter')
+PATTERN_KEYS = ('element_pattern', 'pattern_parameter')
+
 
 class BeamformingSimulator:
-    def __init__(self, frequency, steering_angle, arrays_info):
+    def __init__(self, frequency, steering_angle, arrays_info, precision='float64', far_field=False, chunk_size=None, coupling=False,
+                 phase_bits=None, phase_mode='round'):
         self.frequency = frequency  # Operating frequency in Hz
         self.steering_angle = steering_angle  # Steering angle in degrees
         self.arrays_info = arrays_info  # Store array configurations
+        self.precision = precision  # 'float64' or 'float32' field accumulation
+        self.far_field = far_field  # Approximate element distances by plane waves from the array centre
+        self.chunk_size = chunk_size  # Grid points evaluated per vectorized block; None accumulates element by element
+        self.coupling = coupling  # Drive the elements through their mutual impedance instead of setting currents directly
+        self.phase_bits = phase_bits  # Resolution of the element phase shifters (1 to 8 bits); None applies ideal continuous phases
+        self.phase_mode = phase_mode  # How phases are quantized: 'round' or 'dither'
         self.wavelength = 3e8 / self.frequency  # Calculate wavelength from frequency
         self.k = 2 * np.pi / self.wavelength  # Calculate wave number
+        self.workspace = Workspace()  # Grid, scratch buffers and angle tables reused between calls
 
     def calculate_element_positions(self, num_elements, element_spacing, curvature_degree):
         positions = []
@@ -32,52 +63,742 @@ class BeamformingSimulator:
                 positions.append((x + radius, y))
         return positions
 
-    def simulate_multiple_arrays(self, x_range, y_range):
-        """Simulate multiple arrays with given configurations."""
-        x = np.linspace(x_range[0], x_range[1], 200)
-        y = np.linspace(y_range[0], y_range[1], 200)
-        X, Y = np.meshgrid(x, y)
-        intensity_map = np.zeros_like(X, dtype=np.complexfloating)
+    def calculate_planar_element_positions(self, num_elements, element_spacing, curvature_degree, rows, row_spacing):
+        # A planar (2-D) panel is the row layout of calculate_element_positions repeated along z
+        row_positions = self.calculate_element_positions(num_elements, element_spacing, curvature_degree)
+        row_offsets = [i * row_spacing - (rows - 1) * row_spacing / 2 for i in range(rows)]
+        return [(x, y, z) for z in row_offsets for (x, y) in row_positions]
+
+    def element_positions(self, array_info):
+        """Return the (x, y, z) element positions of one array as an (N, 3) array."""
+        rows = array_info.get('rows', 1)
+        positions = self.calculate_planar_element_positions(array_info['num_elements'], array_info['spacing'], array_info['curvature'],
+                                                            rows, array_info.get('row_spacing', array_info['spacing']))
+        return np.array(positions, dtype=np.float64).reshape(-1, 3)
+
+    def calculate_element_orientations(self, num_elements, element_spacing, curvature_degree):
+        # Boresight of each element in degrees from +y: a linear array faces +y, a curved one outward along the arc normal
+        if curvature_degree == 0 or num_elements <= 1:
+            return np.zeros(num_elements)
+        radius = element_spacing / (2 * sin(radians(curvature_degree / (num_elements - 1) / 2)))
+        angles = -np.radians(curvature_degree) / 2 + np.arange(num_elements) * np.radians(curvature_degree) / (num_elements - 1)
+        # calculate_element_positions places each element at radius * (cos, sin) from the arc's centre
+        return np.degrees(np.arctan2(radius * np.cos(angles), radius * np.sin(angles)))
+
+    def element_orientations(self, array_info):
+        """Boresight angles (N,) of one array's elements in element_positions order, in degrees measured like steering angles."""
+        row_orientations = self.calculate_element_orientations(array_info['num_elements'], array_info['spacing'], array_info['curvature'])
+        return np.tile(row_orientations, array_info.get('rows', 1))
+
+    def all_element_positions(self, arrays_info=None):
+        """Positions of every element of every array, stacked into one (N, 3) array."""
+        arrays_info = self.arrays_info if arrays_info is None else arrays_info
+        if not arrays_info:
+            return np.zeros((0, 3))
+        return np.concatenate([self.element_positions(array_info) for array_info in arrays_info])
+
+    def element_amplitudes(self, array_info):
+        """Amplitude weights of one array in element_positions order.
+
+        The optional 'taper' and 'taper_parameter' keys select the window (uniform when absent); planar panels are
+        tapered along both axes with the product of the row and column windows.
+        """
+        taper = array_info.get('taper', 'uniform')
+        parameter = array_info.get('taper_parameter')
+        row_window = taper_window(taper, array_info['num_elements'], parameter)
+        column_window = taper_window(taper, array_info.get('rows', 1), parameter)
+        return np.outer(column_window, row_window).ravel()
+
+    def all_element_amplitudes(self, arrays_info=None):
+        arrays_info = self.arrays_info if arrays_info is None else arrays_info
+        if not arrays_info:
+            return np.zeros(0)
+        return np.concatenate([self.element_amplitudes(array_info) for array_info in arrays_info])
+
+    def element_directivity(self, arrays_info=None):
+        """ElementDirectivity of every element, or None when every array is isotropic.
+
+        The optional 'element_pattern' and 'pattern_parameter' keys select an array's pattern (see App.Directivity).
+        None keeps the field kernels on their isotropic paths, so arrays without the keys cost nothing extra.
+        """
+        arrays_info = self.arrays_info if arrays_info is None else arrays_info
+        if all(info.get('element_pattern', 'isotropic') == 'isotropic' for info in arrays_info):
+            return None
+        tables, rows = [], []
+        for info in arrays_info:
+            table = pattern_table(info.get('element_pattern', 'isotropic'), info.get('pattern_parameter'))
+            # Tables are cached per pattern, so arrays with the same pattern share one row of the table stack
+            row = next((index for index, known in enumerate(tables) if known is table), len(tables))
+            if row == len(tables):
+                tables.append(table)
+            rows.append(np.full(info['num_elements'] * info.get('rows', 1), row))
+        return ElementDirectivity(np.concatenate([self.element_orientations(info) for info in arrays_info]), np.stack(tables),
+                                  np.concatenate(rows))
+
+    @staticmethod
+    def configuration_subset(arrays_info, keys):
+        """Copies of arrays_info holding only the given keys (those present), such as GEOMETRY_KEYS for what positions depend on."""
+        return [{key: info[key] for key in keys if key in info} for info in arrays_info]
+
+    def geometry(self):
+        """(positions, amplitudes) of every element, cached in the workspace until arrays_info changes."""
+        return self.workspace.geometry(self.arrays_info, lambda: (self.all_element_positions(), self.all_element_amplitudes()))
+
+    def directivity(self):
+        """ElementDirectivity of every element (None when isotropic), cached in the workspace until arrays_info changes."""
+        return self.workspace.directivity(self.arrays_info, self.element_directivity)
+
+    def grid_gains(self, positions, X, Y):
+        # Gain maps over the workspace grid, cached with it. None when isotropic, or when too large to keep (the kernels then look
+        # them up per element)
+        directivity = self.directivity()
+        if directivity is None or len(positions) * X.size > GAIN_MAP_MAX_ENTRIES:
+            return None
+        return self.workspace.gain_maps(directivity, lambda: directivity.field_gains(positions, X, Y).reshape((len(positions),) + X.shape))
+
+    def element_currents(self, positions, weights):
+        """Element currents for drive weights (N,) or (B, N): the weights themselves, or Z^-1 w with mutual coupling.
+
+        The impedance factorization is cached in the workspace, so only the first call for a geometry and frequency
+        pays for it; every later steering or taper is a triangular solve.
+        """
+        if not self.coupling:
+            return weights
+        factorization = self.workspace.coupling(positions, self.k, lambda: factorize(positions, self.k))
+        return coupled_weights(factorization, weights)
+
+    def excitation(self, positions, amplitudes, steering_angle=None):
+        # (steering angle, amplitudes) for the field kernels. Coupled or quantized weights are complex and carry the steering phase
+        steering_angle = self.steering_angle if steering_angle is None else steering_angle
+        if not self.coupling and self.phase_bits is None:
+            return steering_angle, amplitudes
+        weights = self.steering_weights(positions, self.k, steering_angle, amplitudes, self.phase_bits, self.phase_mode)
+        return 0.0, self.element_currents(positions, weights)
+
+    @property
+    def table_bits(self):
+        # Quantized mode evaluates propagation phasors from the lookup table as well; ideal mode keeps exact cos/sin
+        return None if self.phase_bits is None else TABLE_BITS
+
+    def taper_amplitudes(self, tapers, arrays_info=None):
+        """(T, N) amplitudes with every array tapered by each of tapers in turn (names or (name, parameter) pairs)."""
+        arrays_info = self.arrays_info if arrays_info is None else arrays_info
+        rows = []
+        for taper in tapers:
+            name, parameter = (taper, None) if isinstance(taper, str) else taper
+            rows.append(self.all_element_amplitudes([dict(info, taper=name, taper_parameter=parameter) for info in arrays_info]))
+        return np.stack(rows)
+
+    # Building blocks with explicit inputs, so each can run as a separately memoized pipeline stage -------------------------------------
+
+    @staticmethod
+    def wave_number(frequency):
+        return 2 * np.pi * frequency / 3e8
+
+    @staticmethod
+    def distance_field(positions, X, Y):
+        """Distances from each element to each grid point of the z = 0 slice, as an (N, ny * nx) array."""
+        dx = X.reshape(1, -1) - positions[:, 0:1]
+        dy = Y.reshape(1, -1) - positions[:, 1:2]
+        return np.sqrt(dx ** 2 + dy ** 2 + positions[:, 2:3] ** 2)
+
+    @staticmethod
+    def propagation_basis(distances, k, precision='float64'):
+        """Per-element propagation phasors exp(j k r); the field for any steering is a weighted sum of its rows."""
+        return np.exp(1j * k * distances).astype(COMPLEX_DTYPES[precision], copy=False)
+
+    @staticmethod
+    def steering_weights(positions, k, steering_angle, amplitudes=None, phase_bits=None, phase_mode='round'):
+        """Complex element weights; amplitudes of shape (T, N) give one row of weights per amplitude taper.
+
+        With phase_bits the phases are those of phase_bits-bit shifters (see App.PhaseQuantization), read from the
+        phasor table instead of evaluating exp.
+        """
+        if phase_bits is None:
+            weights = np.exp(-1j * k * positions[:, 0] * np.sin(np.radians(steering_angle)))
+        else:
+            weights = quantized_phasors(-k * positions[:, 0] * np.sin(np.radians(steering_angle)), phase_bits, phase_mode)
+        return weights if amplitudes is None else amplitudes * weights
+
+    @staticmethod
+    def beam_weights(positions, k, beams, amplitudes=None):
+        """(B, N) complex weights of simultaneous beams, given as (steering angle in degrees, relative power) pairs.
+
+        Each row steers the array to one beam with amplitude sqrt(power); the composite excitation is the sum of the
+        rows, so by linearity its field is the sum of the per-beam fields.
+        """
+        angles, powers = np.asarray(beams, dtype=np.float64).reshape(-1, 2).T
+        weights = np.sqrt(powers)[:, None] * np.exp(-1j * k * np.outer(np.sin(np.radians(angles)), positions[:, 0]))
+        return weights if amplitudes is None else weights * amplitudes
+
+    @staticmethod
+    def field_from_basis(basis, weights):
+        return weights.astype(basis.dtype, copy=False) @ basis
+
+    @staticmethod
+    def direct_field(positions, X, Y, k, steering_angle, precision='float64', amplitudes=None, workspace=None, table_bits=None,
+                     directivity=None, gains=None):
+        """Field on the z = 0 slice accumulated one element at a time, without holding a per-element basis.
+
+        With a workspace the scratch buffers and the returned field are workspace buffers, valid until its next use.
+        """
+        dtype = COMPLEX_DTYPES[precision]
+        if workspace is None:
+            field = np.zeros(X.shape, dtype)
+            scratch = None
+        else:
+            field = workspace.buffer('field', X.shape, dtype)
+            field.fill(0)
+            scratch = (workspace.buffer('distance', X.shape, np.float64), workspace.buffer('term', X.shape, np.float64),
+                       workspace.buffer('phasor', X.shape, dtype))
+            if table_bits is not None:
+                scratch += (workspace.buffer('codes', X.shape, np.intp),)
+        # The map is the z = 0 slice, so planar arrays contribute through their z offset
+        return BeamformingSimulator.accumulate_elements(field, positions, X, Y, 0.0, k, steering_angle, amplitudes, scratch, table_bits,
+                                                        directivity, gains)
+
+    @staticmethod
+    def accumulate_elements(field, positions, X, Y, z, k, steering_angle, amplitudes=None, scratch=None, table_bits=None,
+                            directivity=None, gains=None):
+        """Add every element's contribution at height z to field in place.
+
+        Each element is evaluated into the same three scratch arrays (two real, one complex like field) with out=
+        operations, so the loop allocates nothing per element. With table_bits the phasors are looked up in a
+        2^table_bits-entry table (one more, intp, scratch array) instead of evaluating cos and sin. Directive elements
+        are weighted by gains (N, *X.shape), their cached gain maps, or without them by maps looked up per element from
+        directivity, which allocates.
+        """
+        if scratch is None:
+            scratch = (np.empty(X.shape), np.empty(X.shape), np.empty(X.shape, field.dtype))
+        distance, term, phasor = scratch[:3]
+        codes = None if table_bits is None else scratch[3] if len(scratch) > 3 else np.empty(X.shape, np.intp)
+        amplitudes = np.ones(len(positions)) if amplitudes is None else amplitudes
+        steering_sine = np.sin(np.radians(steering_angle))
+        for index, ((ex, ey, ez), amplitude) in enumerate(zip(positions, amplitudes)):
+            np.subtract(X, ex, out=distance)
+            np.square(distance, out=distance)
+            np.subtract(Y, ey, out=term)
+            np.square(term, out=term)
+            distance += term
+            distance += (z - ez) ** 2
+            np.sqrt(distance, out=distance)
+
+            # Phase k r - k x sin(steering), then exp(j phase) written as cos + j sin straight into the phasor
+            distance *= k
+            distance -= k * ex * steering_sine
+            if codes is None:
+                np.cos(distance, out=phasor.real)
+                np.sin(distance, out=phasor.imag)
+            else:
+                table_phasors(distance, phasor, codes, table_bits)
+            if amplitude != 1:
+                phasor *= amplitude
+            if gains is not None:
+                phasor *= gains[index]
+            elif directivity is not None:
+                phasor *= directivity[index:index + 1].field_gains(positions[index:index + 1], X, Y, z).reshape(X.shape)
+            field += phasor
+        return field
+
+    @staticmethod
+    def far_field_basis(positions, X, Y, k, precision='float64'):
+        """Propagation phasors under the far-field approximation r = R - u . (p - c).
+
+        R and u are the distance and direction from the array centre c, so only one square root per grid point is taken;
+        the approximation degrades close to the array.
+        """
+        real = REAL_DTYPES[precision]
+        centre = positions.mean(axis=0)
+        offsets = (positions - centre).astype(real)
+        dx = X.reshape(-1).astype(real) - real(centre[0])
+        dy = Y.reshape(-1).astype(real) - real(centre[1])
+        dz = np.full_like(dx, -centre[2])
+        R = np.maximum(np.sqrt(dx ** 2 + dy ** 2 + dz ** 2), np.finfo(real).tiny)
+        path = R - offsets @ (np.stack((dx, dy, dz)) / R)
+        return np.exp(1j * k * path).astype(COMPLEX_DTYPES[precision], copy=False)
+
+    @staticmethod
+    def element_basis(positions, X, Y, k, precision='float64', far_field=False, directivity=None):
+        """Per-element basis (N, X.size) of the selected propagation model, with the element gains folded in when directive."""
+        distances = None
+        if far_field:
+            basis = BeamformingSimulator.far_field_basis(positions, X, Y, k, precision)
+        else:
+            distances = BeamformingSimulator.distance_field(positions, X, Y)
+            basis = BeamformingSimulator.propagation_basis(distances, k, precision)
+        if directivity is not None:
+            basis *= directivity.field_gains(positions, X, Y, distances=distances)
+        return basis
+
+    @staticmethod
+    def weighted_field(positions, X, Y, k, weights, precision='float64', chunk_size=16384, far_field=False, directivity=None, gains=None):
+        """Field of arbitrary complex element weights, evaluated chunk_size grid points at a time.
+
+        Each block is one (N, chunk) basis and one matrix product; (B, N) weights give B fields of shape (B, *X.shape)
+        from the same blocks. Directive elements weight each block's basis by their gains towards its points, taken
+        from the cached gains (N, *X.shape) when given and looked up from directivity otherwise.
+        """
+        real = REAL_DTYPES[precision]
+        weights = np.asarray(weights).astype(COMPLEX_DTYPES[precision])
+        x = X.reshape(-1).astype(real)
+        y = Y.reshape(-1).astype(real)
+        field = np.empty(weights.shape[:-1] + (x.size,), dtype=COMPLEX_DTYPES[precision])
+        for start in range(0, x.size, chunk_size):
+            block = slice(start, start + chunk_size)
+            distances = None
+            if far_field:
+                basis = BeamformingSimulator.far_field_basis(positions, x[block], y[block], k, precision)
+            else:
+                distances = BeamformingSimulator.distance_field(positions.astype(real), x[block], y[block])
+                basis = BeamformingSimulator.propagation_basis(distances, k, precision)
+            if gains is not None:
+                basis *= gains.reshape(len(positions), -1)[:, block]
+            elif directivity is not None:
+                basis *= directivity.field_gains(positions, x[block], y[block], distances=distances)
+            field[..., block] = weights @ basis
+        return field.reshape(weights.shape[:-1] + X.shape)
+
+    @staticmethod
+    def chunked_field(positions, X, Y, k, steering_angle, precision='float64', amplitudes=None, chunk_size=16384, far_field=False,
+                      directivity=None, gains=None):
+        """Field evaluated chunk_size grid points at a time, each block as one (N, chunk) basis and one matrix product."""
+        weights = BeamformingSimulator.steering_weights(positions, k, steering_angle, amplitudes)
+        return BeamformingSimulator.weighted_field(positions, X, Y, k, weights, precision, chunk_size, far_field, directivity, gains)
+
+    @staticmethod
+    def unbatched_field(positions, X, Y, k, steering_angle, precision='float64', amplitudes=None, chunk_size=None, far_field=False,
+                        workspace=None, table_bits=None, directivity=None, gains=None):
+        # The field without a cached basis, by whichever evaluation the settings select (only the element loop uses the table)
+        if chunk_size is None and not far_field:
+            return BeamformingSimulator.direct_field(positions, X, Y, k, steering_angle, precision, amplitudes, workspace, table_bits,
+                                                     directivity, gains)
+        return BeamformingSimulator.chunked_field(positions, X, Y, k, steering_angle, precision, amplitudes, chunk_size or X.size, far_field,
+                                                  directivity, gains)
+
+    @staticmethod
+    def normalized_intensity(field):
+        intensity = np.abs(field) ** 2
+        # Directive elements can leave the whole grid behind them, so an all-zero map stays zero instead of becoming NaN
+        intensity /= max(np.max(intensity), np.finfo(intensity.dtype).tiny)
+        return intensity
+
+    @staticmethod
+    def array_factor(positions, k, steering_angle, angles, amplitudes=None, directivity=None):
+        # With (T, N) amplitudes every taper's pattern comes out of the same matrix product, as a (T, len(angles)) array.
+        # Directive elements weight each angle by their gain towards it, so the profile includes the element pattern
+        weights = BeamformingSimulator.steering_weights(positions, k, steering_angle, amplitudes)
+        propagation = np.exp(1j * k * np.outer(positions[:, 0], np.sin(np.radians(angles))))
+        if directivity is not None:
+            propagation *= directivity.profile_gains(angles)
+        return np.abs(weights @ propagation) ** 2
+
+    @staticmethod
+    def sampled_array_factor(positions, k, steering_angle, angles, amplitudes=None, directivity=None):
+        """Beam profile as (angles, array factor).
+
+        angles is either an explicit array of degrees or an adaptive sampling spec {'start', 'stop', 'tolerance_db'},
+        in which case the angles are refined where the pattern needs them (see adaptive_angles). For (T, N) amplitudes
+        the adaptive grids of all tapers are merged, so every pattern is sampled on the same angles.
+        """
+        if not isinstance(angles, dict):
+            angles = np.asarray(angles)
+            return angles, BeamformingSimulator.array_factor(positions, k, steering_angle, angles, amplitudes, directivity)
+
+        if amplitudes is not None and np.ndim(amplitudes) == 2:
+            grids = [BeamformingSimulator.sampled_array_factor(positions, k, steering_angle, angles, row, directivity)[0]
+                     for row in amplitudes]
+            merged = np.unique(np.concatenate(grids))
+            return merged, BeamformingSimulator.array_factor(positions, k, steering_angle, merged, amplitudes, directivity)
+
+        aperture_wavelengths = np.ptp(positions[:, 0]) * k / (2 * np.pi) if len(positions) else 0
+        initial_samples = initial_sample_count(aperture_wavelengths, angles['stop'] - angles['start'])
+        return adaptive_angles(lambda sample_angles: BeamformingSimulator.array_factor(positions, k, steering_angle, sample_angles, amplitudes,
+                                                                                       directivity),
+                               angles['start'], angles['stop'], initial_samples=initial_samples, tolerance_db=angles.get('tolerance_db', 0.5))
+
+    @staticmethod
+    def normalized_intensities(fields):
+        # Each map of a (T, ny, nx) stack normalized to its own peak
+        intensities = np.abs(fields) ** 2
+        intensities /= np.maximum(intensities.max(axis=(1, 2), keepdims=True), np.finfo(intensities.dtype).tiny)
+        return intensities
+
+    # -------------------------------------------------------------------------------------------------------------------------------------
 
-        for array_info in self.arrays_info:
-            positions = self.calculate_element_positions(array_info['num_elements'], array_info['spacing'], array_info['curvature'])
-            for (ex, ey) in positions:
-                distances = np.sqrt((X - ex) ** 2 + (Y - ey) ** 2)
-                phase_shift = -self.k * ex * np.sin(np.radians(self.steering_angle))
-                intensity_map += np.exp(1j * (self.k * distances + phase_shift))
+    def simulate_multiple_arrays(self, x_range, y_range, resolution=200, checkpoint=None):
+        """Simulate multiple arrays with given configurations.
 
-        intensity = np.abs(intensity_map) ** 2
-        intensity /= np.max(intensity)
+        The grid and field buffers come from the workspace; only the returned intensity is newly allocated, since callers
+        keep it (x and y are the workspace's read-only axes). With a checkpoint the field is evaluated in bands of grid
+        rows of about CHECKPOINT_ENTRIES elements x points, calling checkpoint() before each, so a background caller can
+        pause or abandon the computation part way through.
+        """
+        x, y, X, Y = self.workspace.grid(x_range, y_range, resolution)
+        positions, amplitudes = self.geometry()
+        steering_angle, amplitudes = self.excitation(positions, amplitudes)
+        directivity, gains = self.directivity(), self.grid_gains(positions, X, Y)
+        if checkpoint is None:
+            intensity_map = self.unbatched_field(positions, X, Y, self.k, steering_angle, self.precision, amplitudes, self.chunk_size,
+                                                 self.far_field, self.workspace, self.table_bits, directivity, gains)
+        else:
+            intensity_map = self.workspace.buffer('banded_field', X.shape, COMPLEX_DTYPES[self.precision])
+            rows = max(1, CHECKPOINT_ENTRIES // max(len(positions) * X.shape[1], 1))
+            for start in range(0, X.shape[0], rows):
+                checkpoint()
+                band = slice(start, start + rows)
+                intensity_map[band] = self.unbatched_field(positions, X[band], Y[band], self.k, steering_angle, self.precision, amplitudes,
+                                                           self.chunk_size, self.far_field, table_bits=self.table_bits,
+                                                           directivity=directivity, gains=None if gains is None else gains[:, band])
+
+        intensity = np.abs(intensity_map, out=np.empty(X.shape, REAL_DTYPES[self.precision]))
+        np.square(intensity, out=intensity)
+        intensity /= max(np.max(intensity), np.finfo(intensity.dtype).tiny)
         return x, y, intensity
 
+    def probe_field(self, points, max_block_entries=PROBE_BLOCK_ENTRIES):
+        """Complex field and intensity at an (M, 2) array of (x, y) points on the z = 0 plane.
+
+        Only the requested points are evaluated, in blocks of at most max_block_entries elements x points, so the cost
+        and memory follow the number of probes rather than a grid covering them. Intensity is relative to the peak of a
+        fully coherent sum, the one normalization that does not depend on which points were asked for.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        if points.ndim != 2 or points.shape[1] != 2:
+            raise ValueError(f"Probe points must be an (M, 2) array, got shape {points.shape}")
+        positions, amplitudes = self.geometry()
+        weights = self.element_currents(positions, self.steering_weights(positions, self.k, self.steering_angle, amplitudes, self.phase_bits,
+                                                                            self.phase_mode))
+        block = max(1, max_block_entries // max(len(positions), 1))
+        field = self.weighted_field(positions, points[:, 0], points[:, 1], self.k, weights, self.precision, block, self.far_field,
+                                    self.directivity())
+        intensity = np.abs(field) ** 2 / max(np.abs(weights).sum(), 1) ** 2
+        return field, intensity
+
+    def simulate_volume(self, x_range, y_range, z_range, shape, output_path):
+        """Compute the normalized intensity over an (nx, ny, nz) grid into a memory-mapped .npy file.
+
+        The volume is stored as (nz, ny, nx) float32 and written one z slice at a time, so only a single
+        slice is ever held in memory. Returns the volume re-opened read-only.
+        """
+        nx, ny, nz = shape
+        x = np.linspace(x_range[0], x_range[1], nx)
+        y = np.linspace(y_range[0], y_range[1], ny)
+        z = np.linspace(z_range[0], z_range[1], nz)
+        X, Y = np.meshgrid(x, y)
+
+        output_directory = os.path.dirname(output_path)
+        if output_directory and not os.path.exists(output_directory):
+            os.makedirs(output_directory)
+        volume = np.lib.format.open_memmap(output_path, mode='w+', dtype=np.float32, shape=(nz, ny, nx))
+
+        positions = self.all_element_positions()
+        steering_angle, amplitudes = self.excitation(positions, self.all_element_amplitudes())
+        directivity = self.element_directivity()  # Gains change from slice to slice, so they are looked up per element
+        slice_field = np.empty_like(X, dtype=np.complex128)
+        slice_intensity = np.empty_like(X)
+        scratch = (np.empty_like(X), np.empty_like(X), np.empty_like(slice_field), np.empty(X.shape, np.intp))
+        peak = 0.0
+
+        # First pass: compute each slice and track the running maximum
+        for k_index, z_value in enumerate(z):
+            slice_field.fill(0)
+            self.accumulate_elements(slice_field, positions, X, Y, z_value, self.k, steering_angle, amplitudes, scratch, self.table_bits,
+                                     directivity)
+            np.abs(slice_field, out=slice_intensity)
+            np.square(slice_intensity, out=slice_intensity)
+            volume[k_index] = slice_intensity
+            peak = max(peak, float(slice_intensity.max()))
+
+        # Second pass: normalize slice by slice so the whole volume never has to be resident
+        if peak > 0:
+            for k_index in range(nz):
+                volume[k_index] /= peak
+        volume.flush()
+        del volume
+
+        return np.load(output_path, mmap_mode='r')
+
     def calculate_array_factor(self, angles):
-        array_factor = np.zeros_like(angles, dtype=np.complex128)
-        positions = self.calculate_element_positions(self.arrays_info[0]['num_elements'], self.arrays_info[0]['spacing'],
-                                                     self.arrays_info[0]['curvature'])
-        for x, _ in positions:
-            phase_shift = -self.k * x * np.sin(np.radians(self.steering_angle))
-            array_factor += np.exp(1j * (self.k * x * np.sin(np.radians(angles)) + phase_shift))
-        return np.abs(array_factor) ** 2
+        # sin(angles) comes from the workspace table and every element reuses the same phase and phasor buffers
+        sines = self.workspace.sines(angles)
+        array_factor = self.workspace.buffer('array_factor', sines.shape, np.complex128)
+        array_factor.fill(0)
+        phase = self.workspace.buffer('angle_phase', sines.shape, np.float64)
+        phasor = self.workspace.buffer('angle_phasor', sines.shape, np.complex128)
 
-    def plot_intensity_heatmap(self, x, y, intensity, canvas):
-        # Assuming 'canvas' is a FigureCanvasQTAgg
-        canvas.figure.clf()  # Clear any existing plots
-        ax = canvas.figure.subplots()
-        cax = ax.imshow(intensity, extent=[-10, 10, 0, 10], origin='lower', cmap='jet', aspect='auto')
+        positions = self.element_positions(self.arrays_info[0])
+        amplitudes = self.element_amplitudes(self.arrays_info[0])
+        directivity = self.element_directivity(self.arrays_info[:1])
+        gains = None if directivity is None else directivity.profile_gains(angles)
+        if self.phase_bits is not None:
+            # Quantized shifter states, with the angle phasors looked up in the same way
+            weights = self.steering_weights(positions, self.k, self.steering_angle, amplitudes, self.phase_bits, self.phase_mode)
+            codes = self.workspace.buffer('angle_codes', sines.shape, np.intp)
+            for index, ((x, _, _), weight) in enumerate(zip(positions, weights)):
+                np.multiply(sines, self.k * x, out=phase)
+                table_phasors(phase, phasor, codes)
+                phasor *= weight
+                if gains is not None:
+                    phasor *= gains[index]
+                array_factor += phasor
+            return np.square(np.abs(array_factor))
+
+        steering_sine = np.sin(np.radians(self.steering_angle))
+        for index, ((x, _, _), amplitude) in enumerate(zip(positions, amplitudes)):
+            np.multiply(sines, self.k * x, out=phase)
+            phase -= self.k * x * steering_sine
+            np.cos(phase, out=phasor.real)
+            np.sin(phase, out=phasor.imag)
+            if amplitude != 1:
+                phasor *= amplitude
+            if gains is not None:
+                phasor *= gains[index]
+            array_factor += phasor
+
+        result = np.abs(array_factor)
+        np.square(result, out=result)
+        return result
+
+    def simulate_steering_batch(self, x_range, y_range, resolution, steering_angles, max_basis_entries=8_000_000):
+        """Normalized intensity maps for several steering angles at once, as an (S, resolution, resolution) array.
+
+        The per-element propagation basis is computed once and every steering angle is a row of one matrix product.
+        Geometries too large for the basis fall back to accumulating each angle directly.
+        """
+        x = np.linspace(x_range[0], x_range[1], resolution)
+        y = np.linspace(y_range[0], y_range[1], resolution)
+        X, Y = np.meshgrid(x, y)
+        positions = self.all_element_positions()
+        amplitudes = self.all_element_amplitudes()
+        directivity = self.element_directivity()
+
+        if len(positions) * X.size > max_basis_entries:
+            fields = []
+            for steering_angle in steering_angles:
+                steering_angle, currents = self.excitation(positions, amplitudes, steering_angle)
+                fields.append(self.unbatched_field(positions, X, Y, self.k, steering_angle, self.precision, currents, self.chunk_size,
+                                                   self.far_field, directivity=directivity))
+            fields = np.stack(fields)
+        else:
+            # The element gains are folded into the basis once, so directive elements cost nothing extra per steering angle
+            basis = self.element_basis(positions, X, Y, self.k, self.precision, self.far_field, directivity)
+            weights = self.element_currents(positions, np.stack([self.steering_weights(positions, self.k, steering_angle, amplitudes,
+                                                                                       self.phase_bits, self.phase_mode)
+                                                                 for steering_angle in steering_angles]))
+            fields = (weights.astype(basis.dtype, copy=False) @ basis).reshape(len(steering_angles), *X.shape)
+
+        return x, y, self.normalized_intensities(fields)
+
+    def compare_tapers(self, x_range, y_range, resolution, tapers, angles, max_basis_entries=8_000_000):
+        """Intensity maps and beam profiles for several amplitude tapers at once.
+
+        As in simulate_steering_batch, the propagation basis is built once and each taper is one row of the weight matrix,
+        so every map comes out of a single matrix product. Returns x, y, intensities (T, ny, nx), angles and the
+        (T, len(angles)) array factors.
+        """
+        x = np.linspace(x_range[0], x_range[1], resolution)
+        y = np.linspace(y_range[0], y_range[1], resolution)
+        X, Y = np.meshgrid(x, y)
+        positions = self.all_element_positions()
+        steering_angle, amplitudes = self.excitation(positions, self.taper_amplitudes(tapers))
+        directivity = self.element_directivity()
+
+        if len(positions) * X.size > max_basis_entries:
+            fields = np.stack([self.unbatched_field(positions, X, Y, self.k, steering_angle, self.precision, row, self.chunk_size,
+                                                    self.far_field, directivity=directivity) for row in amplitudes])
+        else:
+            basis = self.element_basis(positions, X, Y, self.k, self.precision, self.far_field, directivity)
+            weights = self.steering_weights(positions, self.k, steering_angle, amplitudes)
+            fields = self.field_from_basis(basis, weights).reshape(len(amplitudes), *X.shape)
+
+        # The beam profile is that of the first array, whose elements lead the stacked amplitudes
+        first_array = len(self.element_positions(self.arrays_info[0]))
+        profile_directivity = None if directivity is None else directivity[:first_array]
+        profile_angles, array_factors = self.sampled_array_factor(positions[:first_array], self.k, steering_angle, angles,
+                                                                  amplitudes[:, :first_array], profile_directivity)
+        return {'x': x, 'y': y, 'intensities': self.normalized_intensities(fields), 'angles': profile_angles,
+                'array_factors': array_factors}
+
+    def compare_quantization(self, x_range, y_range, resolution, angles=PATTERN_ANGLES):
+        """Ideal and phase-quantized intensity maps and beam profiles side by side, with the quantization report.
+
+        Returns the compare_tapers layout (intensities and array_factors stacked as [ideal, quantized], the profiles
+        relative to the ideal peak), plus 'report' (see quantization_report) and 'timing'. Both maps run the same
+        element loop. The ideal one evaluates cos and sin per element and sample, the quantized one reads the phasor
+        table, so timing['speedup'] is the table's gain on that loop.
+        """
+        if self.phase_bits is None:
+            raise ValueError("compare_quantization needs phase_bits to be set")
+        x, y, X, Y = self.workspace.grid(x_range, y_range, resolution)
+        positions, amplitudes = self.geometry()
+        ideal = self.element_currents(positions, self.steering_weights(positions, self.k, self.steering_angle, amplitudes))
+        quantized = self.excitation(positions, amplitudes)[1]
+
+        intensities = np.empty((2,) + X.shape)
+        timing = {}
+        for index, (name, weights, table_bits) in enumerate((('ideal_ms', ideal, None), ('table_ms', quantized, TABLE_BITS))):
+            start = time.perf_counter()
+            field = self.direct_field(positions, X, Y, self.k, 0.0, self.precision, weights, self.workspace, table_bits, self.directivity(),
+                                      self.grid_gains(positions, X, Y))
+            timing[name] = (time.perf_counter() - start) * 1000
+            np.abs(field, out=intensities[index])
+        np.square(intensities, out=intensities)
+        intensities /= np.maximum(intensities.max(axis=(1, 2), keepdims=True), np.finfo(intensities.dtype).tiny)
+        timing['speedup'] = timing['ideal_ms'] / max(timing['table_ms'], 1e-9)
+
+        # Complex profiles of the first array, so the error pattern (and with it the quantization lobes) can be measured
+        first_array = len(self.element_positions(self.arrays_info[0]))
+        propagation = np.exp(1j * self.k * np.outer(positions[:first_array, 0], np.sin(np.radians(angles))))
+        directivity = self.element_directivity(self.arrays_info[:1])
+        if directivity is not None:
+            propagation *= directivity.profile_gains(angles)
+        patterns = np.stack((ideal[:first_array], quantized[:first_array])) @ propagation
+        array_factors = np.abs(patterns) ** 2
+        array_factors /= array_factors[0].max()
+        report = quantization_report(angles, patterns[0], patterns[1], amplitudes[:first_array], self.phase_bits, self.phase_mode)
+        return {'x': x, 'y': y, 'intensities': intensities, 'angles': np.asarray(angles), 'array_factors': array_factors,
+                'report': report, 'timing': timing}
+
+    def canonical_inputs(self, x_range, y_range, resolution, angles):
+        """Everything that determines the result of compute_scene, in a JSON-serialisable canonical form."""
+        return {
+            'engine_version': ENGINE_VERSION,
+            'frequency': float(self.frequency),
+            'steering_angle': float(self.steering_angle),
+            'arrays_info': [{key: info[key] for key in sorted(info)} for info in self.arrays_info],
+            'grid': {'x_range': [float(v) for v in x_range], 'y_range': [float(v) for v in y_range], 'resolution': int(resolution)},
+            'angles': dict(angles) if isinstance(angles, dict) else
+            hashlib.sha256(np.ascontiguousarray(angles, dtype=np.float64).tobytes()).hexdigest(),
+            'precision': self.precision,
+            # Only present when set, so exact results keep the keys they had before the approximation existed
+            **({'far_field': True} if self.far_field else {}),
+            **({'coupling': True} if self.coupling else {}),
+            **({'phase_bits': int(self.phase_bits), 'phase_mode': self.phase_mode} if self.phase_bits is not None else {}),
+        }
+
+    def compute_scene(self, x_range, y_range, resolution, angles, checkpoint=None):
+        """Compute the intensity map and beam profile together, as the arrays the result cache stores.
+
+        checkpoint is passed on to simulate_multiple_arrays and called once more before the beam profile.
+        """
+        x, y, intensity = self.simulate_multiple_arrays(x_range, y_range, resolution, checkpoint)
+        if checkpoint is not None:
+            checkpoint()
+        positions = self.element_positions(self.arrays_info[0])
+        steering_angle, amplitudes = self.steering_angle, self.element_amplitudes(self.arrays_info[0])
+        if self.coupling or self.phase_bits is not None:
+            # The first array's currents depend on every element it is coupled to, so they are a slice of the full solve
+            steering_angle, currents = self.excitation(*self.geometry())
+            amplitudes = currents[:len(positions)]
+        angles, array_factor = self.sampled_array_factor(positions, self.k, steering_angle, angles, amplitudes,
+                                                         self.element_directivity(self.arrays_info[:1]))
+        return {'x': x, 'y': y, 'intensity': intensity, 'angles': angles, 'array_factor': array_factor}
+
+    @staticmethod
+    def draw_intensity_heatmap(figure, x, y, intensity):
+        # Shared by the Qt canvases and the offscreen exporter
+        figure.clf()  # Clear any existing plots
+        ax = figure.subplots()
+        cax = ax.imshow(intensity, extent=[x[0], x[-1], y[0], y[-1]], origin='lower', cmap='jet', aspect='auto')
         ax.set_title('Beamforming Intensity Map')
         ax.set_xlabel('Horizontal Position (meters)')
         ax.set_ylabel('Vertical Position (meters)')
-        canvas.figure.colorbar(cax, ax=ax, label='Normalized Intensity')
-        canvas.draw()  # Update the canvas
+        figure.colorbar(cax, ax=ax, label='Normalized Intensity')
+        return ax
 
-    def plot_beam_profile(self, angles, array_factor, canvas):
-        canvas.figure.clf()  # Clear any existing plots
-        ax = canvas.figure.subplots()
+    @staticmethod
+    def draw_beam_profile(figure, angles, array_factor):
+        figure.clf()  # Clear any existing plots
+        ax = figure.subplots()
         ax.plot(angles, array_factor / np.max(array_factor))
         ax.set_title('Beam Profile')
         ax.set_xlabel('Angle (degrees)')
         ax.set_ylabel('Normalized Array Factor')
         ax.grid(True)
+        return ax
+
+    @staticmethod
+    def draw_taper_comparison(figure, comparison, labels, floor_db=-60, title='Beam Profile by Taper'):
+        # Beam profiles overlaid in dB on the left, one small intensity map per taper (or other variant) on the right
+        figure.clf()
+        profile_figure, maps_figure = figure.subfigures(1, 2, width_ratios=[3, 2])
+
+        ax = profile_figure.subplots()
+        for label, array_factor in zip(labels, comparison['array_factors']):
+            ax.plot(comparison['angles'], 10 * np.log10(np.maximum(array_factor / array_factor.max(), 10 ** (floor_db / 10))), label=label)
+        ax.set_ylim(floor_db, 3)
+        ax.set_title(title)
+        ax.set_xlabel('Angle (degrees)')
+        ax.set_ylabel('Normalized Array Factor (dB)')
+        ax.grid(True)
+        ax.legend(fontsize='small')
+
+        x, y = comparison['x'], comparison['y']
+        columns = 2 if len(labels) > 1 else 1
+        axes = np.atleast_1d(maps_figure.subplots(-(-len(labels) // columns), columns, sharex=True, sharey=True)).ravel()
+        for map_ax, label, intensity in zip(axes, labels, comparison['intensities']):
+            map_ax.imshow(intensity, extent=[x[0], x[-1], y[0], y[-1]], origin='lower', cmap='jet', aspect='auto')
+            map_ax.set_title(label, fontsize='small')
+        for map_ax in axes[len(labels):]:
+            map_ax.set_visible(False)
+        return ax
+
+    @staticmethod
+    def beam_colors(count):
+        # One colour per beam, shared by the dominant-beam map and the per-beam profiles
+        return plt.get_cmap('tab10').colors[:count] if count <= 10 else plt.get_cmap('turbo')(np.linspace(0, 1, count))
+
+    @staticmethod
+    def draw_multi_beam(figure, result, floor_db=-40):
+        """Combined intensity map, dominant-beam map and per-beam profiles of a MultiBeamField result.
+
+        Returns the artists ({'intensity', 'dominant', 'array_factor', 'beam_array_factors'}) so a view can update the
+        data of an unchanged layout in place instead of redrawing the figure.
+        """
+        figure.clf()
+        colors = BeamformingSimulator.beam_colors(len(result['beams']))
+        map_ax, dominant_ax, profile_ax = figure.subplots(1, 3, gridspec_kw={'width_ratios': [2, 2, 3]})
+        x, y = result['x'], result['y']
+        extent = [x[0], x[-1], y[0], y[-1]]
+
+        intensity_image = map_ax.imshow(result['intensity'], extent=extent, origin='lower', cmap='jet', aspect='auto')
+        map_ax.set_title('Combined Intensity')
+        map_ax.set_xlabel('Horizontal Position (meters)')
+        map_ax.set_ylabel('Vertical Position (meters)')
+
+        # Where the combined beam is negligible the strongest contribution is meaningless, so it is masked
+        dominant_image = dominant_ax.imshow(BeamformingSimulator.dominant_beam_map(result, floor_db), extent=extent, origin='lower',
+                                            cmap=ListedColormap(colors), vmin=-0.5, vmax=len(colors) - 0.5, aspect='auto',
+                                            interpolation='nearest')
+        dominant_ax.set_title('Strongest Beam')
+        dominant_ax.set_xlabel('Horizontal Position (meters)')
+
+        floor = 10 ** (floor_db / 10)
+        beam_lines = [profile_ax.plot(result['angles'], 10 * np.log10(np.maximum(array_factor, floor)), color=color, linewidth=0.8,
+                                      label=f"Beam {index + 1} ({angle:g} deg)")[0]
+                      for index, (array_factor, color, (angle, _)) in enumerate(zip(result['beam_array_factors'], colors, result['beams']))]
+        combined_line, = profile_ax.plot(result['angles'], 10 * np.log10(np.maximum(result['array_factor'], floor)), color='black',
+                                         linewidth=1.6, label='Combined')
+        profile_ax.set_ylim(floor_db, 3)
+        profile_ax.set_title('Beam Profiles')
+        profile_ax.set_xlabel('Angle (degrees)')
+        profile_ax.set_ylabel('Normalized Array Factor (dB)')
+        profile_ax.grid(True)
+        if len(beam_lines) <= 10:
+            profile_ax.legend(fontsize='small')
+        return {'intensity': intensity_image, 'dominant': dominant_image, 'array_factor': combined_line, 'beam_array_factors': beam_lines}
+
+    @staticmethod
+    def dominant_beam_map(result, floor_db=-40):
+        return np.ma.masked_where(result['intensity'] < 10 ** (floor_db / 10), result['dominant_beam'])
+
+    def plot_intensity_heatmap(self, x, y, intensity, canvas):
+        # Assuming 'canvas' is a FigureCanvasQTAgg
+        self.draw_intensity_heatmap(canvas.figure, x, y, intensity)
+        canvas.draw()  # Update the canvas
+
+    def plot_beam_profile(self, angles, array_factor, canvas):
+        self.draw_beam_profile(canvas.figure, angles, array_factor)
         canvas.draw()  # Update the canvas
 
     # -------------------------------------------------------------------------------------------------------------------------------------
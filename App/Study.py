@@ -0,0 +1,309 @@
+import argparse
+import collections
+import glob
+import itertools
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from App.Coverage import contiguous_span
+from App.Scenarios import OPERATING_FREQUENCIES
+from App.SimpleSimulation import BeamformingSimulator, REAL_DTYPES
+from App.Workspace import Workspace
+
+STUDY_VERSION = 1
+# Element spacing is in wavelengths at each point's frequency, as in the scenario presets
+STUDY_PARAMETERS = ('frequency', 'steering_angle', 'num_elements', 'spacing', 'curvature')
+INTEGER_PARAMETERS = ('num_elements',)
+DESIGNS = ('cartesian', 'lhs')
+METRICS = ('peak_x', 'peak_y', 'main_lobe_angle', 'beamwidth_3db', 'peak_sidelobe_db', 'ms')
+
+DEFAULT_SETTINGS = {'arrays': 1, 'resolution': 100, 'precision': 'float32', 'chunk_size': 64, 'x_range': [-10, 10], 'y_range': [0, 10],
+                    'profile_samples': 361}
+
+# Per-process workspace, so consecutive points on the same grid reuse the coordinate and scratch buffers
+_workspace = Workspace()
+
+
+# Design ----------------------------------------------------------------------------------------------------------------------------------
+
+def parameter_levels(name, specification, levels=None):
+    """Values of one parameter for a Cartesian design: explicit 'values', or 'levels' points across 'range'."""
+    if 'values' in specification:
+        values = np.asarray(specification['values'], dtype=np.float64)
+    else:
+        low, high = specification['range']
+        values = np.linspace(low, high, specification.get('levels', levels or 5))
+    return np.unique(np.round(values)) if name in INTEGER_PARAMETERS else np.unique(values)
+
+
+def make_design(spec):
+    """The design points of a study spec as {parameter: (P,) array}.
+
+    Cartesian designs take every combination of the parameter levels. Latin-hypercube designs draw 'samples' points
+    with every parameter stratified into 'samples' equal-probability intervals; discrete 'values' are stratified by index.
+    """
+    parameters = spec['parameters']
+    if spec['design'] == 'cartesian':
+        levels = [parameter_levels(name, parameters[name]) for name in STUDY_PARAMETERS]
+        points = np.array(list(itertools.product(*levels)), dtype=np.float64).reshape(-1, len(STUDY_PARAMETERS))
+        return {name: points[:, column] for column, name in enumerate(STUDY_PARAMETERS)}
+
+    if spec['design'] != 'lhs':
+        raise ValueError(f"Unknown design '{spec['design']}', expected one of {DESIGNS}")
+    samples = spec['samples']
+    rng = np.random.default_rng(spec.get('seed', 0))
+    design = {}
+    for name in STUDY_PARAMETERS:
+        specification = parameters[name]
+        strata = (rng.permutation(samples) + rng.random(samples)) / samples
+        if 'values' in specification:
+            values = np.asarray(specification['values'], dtype=np.float64)
+            design[name] = values[np.minimum((strata * len(values)).astype(np.intp), len(values) - 1)]
+        else:
+            low, high = specification['range']
+            design[name] = low + strata * (high - low)
+        if name in INTEGER_PARAMETERS:
+            design[name] = np.round(design[name])
+    return design
+
+
+# Evaluation ------------------------------------------------------------------------------------------------------------------------------
+
+def profile_metrics(angles, array_factor):
+    """Main-lobe direction, -3 dB beamwidth and peak sidelobe level (dB) of a beam profile."""
+    peak = int(array_factor.argmax())
+    normalized = array_factor / max(array_factor[peak], np.finfo(np.float64).tiny)
+
+    left, right = contiguous_span(normalized >= 0.5, peak)
+    beamwidth = angles[right - 1] - angles[left]
+
+    # The main lobe extends down to the first local minimum on each side; everything beyond it is sidelobe
+    rising_left = np.flatnonzero(np.diff(normalized[:peak + 1]) <= 0)
+    null_left = rising_left[-1] + 1 if rising_left.size else 0
+    falling_right = np.flatnonzero(np.diff(normalized[peak:]) >= 0)
+    null_right = peak + falling_right[0] if falling_right.size else len(angles) - 1
+    sidelobes = np.concatenate((normalized[:null_left + 1], normalized[null_right:]))
+    sidelobe = float(sidelobes.max()) if sidelobes.size else 0.0
+    return float(angles[peak]), float(beamwidth), float(10 * np.log10(max(sidelobe, 1e-30)))
+
+
+def evaluate_point(point, settings, angles):
+    frequency = point['frequency']
+    array_info = {'num_elements': int(point['num_elements']), 'spacing': point['spacing'] * 3e8 / frequency, 'curvature': point['curvature']}
+    model = BeamformingSimulator(frequency, point['steering_angle'], [array_info] * settings['arrays'], settings['precision'])
+    model.workspace = _workspace
+
+    start = time.perf_counter()
+    x, y, intensity = model.simulate_multiple_arrays(settings['x_range'], settings['y_range'], settings['resolution'])
+    # The profile of every element, so the metrics describe the same system as the stored map however many arrays there are
+    array_factor = model.array_factor(model.all_element_positions(), model.k, model.steering_angle, angles, model.all_element_amplitudes())
+    milliseconds = (time.perf_counter() - start) * 1000
+
+    peak_row, peak_column = np.unravel_index(int(intensity.argmax()), intensity.shape)
+    main_lobe, beamwidth, sidelobe = profile_metrics(angles, array_factor)
+    metrics = {'peak_x': float(x[peak_column]), 'peak_y': float(y[peak_row]), 'main_lobe_angle': main_lobe, 'beamwidth_3db': beamwidth,
+               'peak_sidelobe_db': sidelobe, 'ms': milliseconds}
+    return intensity.astype(np.float32), (array_factor / max(array_factor.max(), np.finfo(np.float64).tiny)).astype(np.float32), metrics
+
+
+def run_chunk(task):
+    """Worker entry point: evaluate one chunk of design points and commit it to the store.
+
+    The chunk file is written under a temporary name and renamed into place, so a chunk on disk is always complete and
+    an interrupted study loses at most the chunks that were in flight.
+    """
+    directory, chunk_index, indices, points, settings = task
+    angles = np.linspace(-90, 90, settings['profile_samples'])
+    intensities, array_factors, metrics = [], [], {name: [] for name in METRICS}
+    for row in range(len(indices)):
+        intensity, array_factor, point_metrics = evaluate_point({name: float(values[row]) for name, values in points.items()}, settings,
+                                                                angles)
+        intensities.append(intensity)
+        array_factors.append(array_factor)
+        for name in METRICS:
+            metrics[name].append(point_metrics[name])
+
+    StudyStore(directory).write_chunk(chunk_index, indices=np.asarray(indices), intensity=np.stack(intensities),
+                                      array_factor=np.stack(array_factors), angles=angles,
+                                      **{name: np.asarray(values) for name, values in points.items()},
+                                      **{name: np.asarray(values) for name, values in metrics.items()})
+    return chunk_index, len(indices)
+
+
+# Store -----------------------------------------------------------------------------------------------------------------------------------
+
+class StudyStore:
+    def __init__(self, directory):
+        """A study on disk: its spec, its design points and one .npz file per completed chunk of points.
+
+        A chunk file holds the point indices, the design values, the scalar METRICS, the intensity maps (P, ny, nx) and the
+        normalized beam profiles (P, profile_samples) of its points, all as float32 or float64 arrays.
+        """
+        self.directory = directory
+        self.spec_path = os.path.join(directory, "study.json")
+        self.design_path = os.path.join(directory, "design.npz")
+        self.chunks_directory = os.path.join(directory, "chunks")
+
+    def exists(self):
+        return os.path.exists(self.spec_path)
+
+    def create(self, spec):
+        """Write a new study's spec and design; an existing study is kept if its spec is the same and rejected otherwise."""
+        if self.exists():
+            if self.spec() != spec:
+                raise ValueError(f"{self.directory} already holds a different study; resume it or choose another directory")
+            return
+        os.makedirs(self.chunks_directory, exist_ok=True)
+        design = make_design(spec)
+        with open(self.design_path, 'wb') as design_file:
+            np.savez(design_file, **design)
+        # The spec goes last: a directory without it is not a study yet and is simply created again
+        with open(self.spec_path, 'w', encoding='utf-8') as spec_file:
+            json.dump(spec, spec_file, indent=2)
+
+    def spec(self):
+        with open(self.spec_path, encoding='utf-8') as spec_file:
+            return json.load(spec_file)
+
+    def design(self):
+        with np.load(self.design_path) as design:
+            return {name: design[name] for name in STUDY_PARAMETERS}
+
+    def chunk_path(self, chunk_index):
+        return os.path.join(self.chunks_directory, f"chunk_{chunk_index:06d}.npz")
+
+    def write_chunk(self, chunk_index, **arrays):
+        temporary_path = f"{self.chunk_path(chunk_index)}.{uuid.uuid4().hex}.tmp"
+        with open(temporary_path, 'wb') as chunk_file:
+            np.savez(chunk_file, **arrays)
+        os.replace(temporary_path, self.chunk_path(chunk_index))
+
+    def completed_chunks(self):
+        return sorted(int(os.path.basename(path)[6:12]) for path in glob.glob(os.path.join(self.chunks_directory, "chunk_*.npz")))
+
+    def discard_partial_chunks(self):
+        # Temporary files of chunks that were in flight when a previous run stopped
+        for path in glob.glob(os.path.join(self.chunks_directory, "*.tmp")):
+            os.remove(path)
+
+    def read_chunk(self, chunk_index):
+        return np.load(self.chunk_path(chunk_index))
+
+    def results(self):
+        """Design values and scalar metrics of every completed point, as {column: (P,) array} ordered by point index."""
+        columns = collections.defaultdict(list)
+        for chunk_index in self.completed_chunks():
+            with self.read_chunk(chunk_index) as chunk:
+                for name in ('indices',) + STUDY_PARAMETERS + METRICS:
+                    columns[name].append(chunk[name])
+        if not columns:
+            return {}
+        results = {name: np.concatenate(values) for name, values in columns.items()}
+        order = np.argsort(results['indices'])
+        return {name: values[order] for name, values in results.items()}
+
+    def intensity(self, point_index):
+        """The stored intensity map of one point."""
+        chunk_size = self.spec()['settings']['chunk_size']
+        with self.read_chunk(point_index // chunk_size) as chunk:
+            return chunk['intensity'][point_index % chunk_size]
+
+
+# Runner ----------------------------------------------------------------------------------------------------------------------------------
+
+def run_study(directory, workers=None, progress=None):
+    """Evaluate every design point of the study in directory that is not stored yet, on a process pool.
+
+    Chunks are submitted in order with at most two per worker in flight and are committed by the workers as they finish,
+    so memory stays flat however large the study is and a stopped run resumes from the chunks already on disk.
+    Returns the number of points evaluated by this run.
+    """
+    store = StudyStore(directory)
+    store.discard_partial_chunks()
+    settings = store.spec()['settings']
+    design = store.design()
+    total = len(design['frequency'])
+    chunk_size = settings['chunk_size']
+    completed = set(store.completed_chunks())
+    done = sum(min(chunk_size, total - chunk_index * chunk_size) for chunk_index in completed)
+
+    def tasks():
+        for chunk_index in range(-(-total // chunk_size)):
+            if chunk_index in completed:
+                continue
+            rows = slice(chunk_index * chunk_size, min((chunk_index + 1) * chunk_size, total))
+            yield directory, chunk_index, list(range(rows.start, rows.stop)), {name: values[rows] for name, values in design.items()}, settings
+
+    workers = workers or os.cpu_count() or 1
+    evaluated = 0
+    in_flight = collections.deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        try:
+            for task in tasks():
+                in_flight.append(executor.submit(run_chunk, task))
+                if len(in_flight) >= 2 * workers:
+                    evaluated += in_flight.popleft().result()[1]
+                    if progress is not None:
+                        progress(done + evaluated, total)
+            while in_flight:
+                evaluated += in_flight.popleft().result()[1]
+                if progress is not None:
+                    progress(done + evaluated, total)
+        except BaseException:
+            # Queued chunks are dropped; those already running finish and are kept
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+    return evaluated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run (or resume) a parameter study over frequency, steering, element count, spacing and curvature.")
+    parser.add_argument('directory', help="Study directory; an existing study there is resumed and the design options are ignored")
+    parser.add_argument('--design', choices=DESIGNS, default='cartesian')
+    parser.add_argument('--samples', type=int, default=1000, help="Points of a Latin-hypercube design")
+    parser.add_argument('--levels', type=int, default=5, help="Levels per ranged parameter of a Cartesian design")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--frequencies', type=float, nargs='+', default=OPERATING_FREQUENCIES, help="Frequency levels in Hz")
+    parser.add_argument('--steering', type=float, nargs=2, default=(-60, 60), metavar=('LOW', 'HIGH'))
+    parser.add_argument('--elements', type=int, nargs=2, default=(4, 64), metavar=('LOW', 'HIGH'))
+    parser.add_argument('--spacing', type=float, nargs=2, default=(0.25, 1.0), metavar=('LOW', 'HIGH'), help="In wavelengths")
+    parser.add_argument('--curvature', type=float, nargs=2, default=(0, 0), metavar=('LOW', 'HIGH'), help="In degrees")
+    parser.add_argument('--arrays', type=int, default=DEFAULT_SETTINGS['arrays'])
+    parser.add_argument('--resolution', type=int, default=DEFAULT_SETTINGS['resolution'])
+    parser.add_argument('--precision', choices=list(REAL_DTYPES), default=DEFAULT_SETTINGS['precision'])
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_SETTINGS['chunk_size'], help="Points per stored chunk")
+    parser.add_argument('--workers', type=int)
+    arguments = parser.parse_args()
+
+    store = StudyStore(arguments.directory)
+    if not store.exists():
+        ranged = {'steering_angle': arguments.steering, 'num_elements': arguments.elements, 'spacing': arguments.spacing,
+                  'curvature': arguments.curvature}
+        spec = {
+            'version': STUDY_VERSION,
+            'design': arguments.design,
+            'parameters': {'frequency': {'values': list(arguments.frequencies)},
+                           **{name: {'range': list(bounds), 'levels': arguments.levels} for name, bounds in ranged.items()}},
+            'settings': dict(DEFAULT_SETTINGS, arrays=arguments.arrays, resolution=arguments.resolution, precision=arguments.precision,
+                             chunk_size=arguments.chunk_size),
+        }
+        if arguments.design == 'lhs':
+            spec.update(samples=arguments.samples, seed=arguments.seed)
+        store.create(spec)
+        print(f"Created a {arguments.design} study of {len(store.design()['frequency'])} points in {arguments.directory}")
+    else:
+        print(f"Resuming {arguments.directory}")
+
+    start = time.perf_counter()
+    evaluated = run_study(arguments.directory, arguments.workers,
+                          progress=lambda done, total: print(f"\r{done}/{total} points", end='', flush=True))
+    print(f"\nEvaluated {evaluated} points in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
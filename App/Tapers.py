@@ -0,0 +1,86 @@
+import functools
+
+import numpy as np
+
+# Taper name -> (display label, default parameter). Taylor and Dolph–Chebyshev take the sidelobe level in dB below the
+# main lobe, Kaiser its beta; the others have no parameter.
+TAPERS = {
+    'uniform': ("Uniform", None),
+    'hamming': ("Hamming", None),
+    'hann': ("Hann", None),
+    'taylor': ("Taylor", 30.0),
+    'chebyshev': ("Dolph–Chebyshev", 30.0),
+    'kaiser': ("Kaiser", 6.0),
+}
+TAYLOR_NBAR = 4  # Number of nearly constant-level sidelobes next to the main lobe
+
+
+def taper_window(taper, num_elements, parameter=None):
+    """Amplitude weights of one row of num_elements elements, peak-normalized to 1.
+
+    Windows are cached per (taper, num_elements, parameter), so the returned array is shared and read-only.
+    """
+    if taper not in TAPERS:
+        raise ValueError(f"Unknown taper '{taper}', expected one of {tuple(TAPERS)}")
+    if parameter is None:
+        parameter = TAPERS[taper][1]
+    return _cached_window(taper, int(num_elements), None if parameter is None else float(parameter))
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_window(taper, num_elements, parameter):
+    if num_elements <= 1 or taper == 'uniform':
+        window = np.ones(max(num_elements, 0))
+    elif taper == 'hamming':
+        window = np.hamming(num_elements)
+    elif taper == 'hann':
+        # Drop the zero end points of the classic window so the outermost elements still radiate
+        window = np.hanning(num_elements + 2)[1:-1]
+    elif taper == 'kaiser':
+        window = np.kaiser(num_elements, parameter)
+    elif taper == 'taylor':
+        window = taylor_window(num_elements, parameter)
+    else:
+        window = chebyshev_window(num_elements, parameter)
+
+    window = window / window.max()
+    window.setflags(write=False)
+    return window
+
+
+def taylor_window(num_elements, sidelobe_db, nbar=TAYLOR_NBAR):
+    # Taylor's nbar approximation: a cosine series whose coefficients place the first nbar - 1 nulls of the ideal pattern
+    B = 10 ** (sidelobe_db / 20)
+    A = np.arccosh(B) / np.pi
+    sigma_squared = nbar ** 2 / (A ** 2 + (nbar - 0.5) ** 2)
+    m = np.arange(1, nbar)
+    coefficients = np.empty(nbar - 1)
+    for index, m_i in enumerate(m):
+        numerator = (-1) ** (m_i + 1) * np.prod(1 - m_i ** 2 / sigma_squared / (A ** 2 + (m - 0.5) ** 2))
+        others = np.delete(m, index)
+        denominator = 2 * np.prod(1 - m_i ** 2 / others ** 2)
+        coefficients[index] = numerator / denominator
+
+    n = np.arange(num_elements)
+    return 1 + 2 * coefficients @ np.cos(2 * np.pi * np.outer(m, n - num_elements / 2 + 0.5) / num_elements)
+
+
+def chebyshev_window(num_elements, sidelobe_db):
+    # Dolph–Chebyshev weights as the inverse DFT of the Chebyshev polynomial sampled on the unit circle
+    order = num_elements - 1
+    beta = np.cosh(np.arccosh(10 ** (abs(sidelobe_db) / 20)) / order)
+    x = beta * np.cos(np.pi * np.arange(num_elements) / num_elements)
+
+    p = np.zeros(num_elements)
+    inside = np.abs(x) <= 1
+    p[inside] = np.cos(order * np.arccos(x[inside]))
+    p[x > 1] = np.cosh(order * np.arccosh(x[x > 1]))
+    p[x < -1] = (2 * (num_elements % 2) - 1) * np.cosh(order * np.arccosh(-x[x < -1]))
+
+    if num_elements % 2:
+        w = np.real(np.fft.fft(p))
+        half = (num_elements + 1) // 2
+        return np.concatenate((w[half - 1:0:-1], w[:half]))
+    w = np.real(np.fft.fft(p * np.exp(1j * np.pi / num_elements * np.arange(num_elements))))
+    half = num_elements // 2 + 1
+    return np.concatenate((w[half - 1:0:-1], w[1:half]))
@@ -0,0 +1,100 @@
+import collections
+import math
+
+import numpy as np
+
+from App.SimpleSimulation import BeamformingSimulator
+
+
+class TileGrid:
+    def __init__(self, tile_size=128, base_span=10.0, min_level=0, max_level=14):
+        """Quadtree tiling of the x–y plane.
+
+        At level z a tile covers base_span / 2**z meters per side and is sampled at tile_size x tile_size, so every level
+        has the same on-screen sharpness. Tile (z, i, j) spans x in [i * span, (i + 1) * span), y likewise with j.
+        """
+        self.tile_size = tile_size
+        self.base_span = base_span
+        self.min_level = min_level
+        self.max_level = max_level
+
+    def span(self, level):
+        return self.base_span / 2 ** level
+
+    def level_for(self, meters_per_pixel):
+        # The level whose samples are closest to one screen pixel
+        level = round(math.log2(self.base_span / (self.tile_size * meters_per_pixel)))
+        return min(max(level, self.min_level), self.max_level)
+
+    def meters_per_pixel_limits(self):
+        # The zoom range level_for maps onto distinct levels; beyond it the view would only list more tiles at a clamped level
+        return (self.span(self.max_level) / self.tile_size / math.sqrt(2),
+                self.span(self.min_level) / self.tile_size * math.sqrt(2))
+
+    def bounds(self, level, i, j):
+        span = self.span(level)
+        return i * span, (i + 1) * span, j * span, (j + 1) * span
+
+    def visible_tiles(self, level, x_min, x_max, y_min, y_max):
+        span = self.span(level)
+        columns = range(math.floor(x_min / span), math.floor(x_max / span) + 1)
+        rows = range(math.floor(y_min / span), math.floor(y_max / span) + 1)
+        # Nearest the view centre first, so the middle of the screen fills in first
+        center_i, center_j = (x_min + x_max) / 2 / span, (y_min + y_max) / 2 / span
+        tiles = [(level, i, j) for i in columns for j in rows]
+        return sorted(tiles, key=lambda tile: (tile[1] + 0.5 - center_i) ** 2 + (tile[2] + 0.5 - center_j) ** 2)
+
+    def sample_coordinates(self, level, i, j):
+        # Pixel-centre sample positions, so neighbouring tiles never share or skip a column
+        x0, x1, y0, y1 = self.bounds(level, i, j)
+        offsets = (np.arange(self.tile_size) + 0.5) / self.tile_size
+        return x0 + offsets * (x1 - x0), y0 + offsets * (y1 - y0)
+
+
+def tile_state(model):
+    """Everything a tile's content depends on, computed once per model change and shared by all tile jobs."""
+    positions = model.all_element_positions()
+    # With mutual coupling the amplitudes are the complex element currents and the steering angle is 0
+    steering_angle, amplitudes = model.excitation(positions, model.all_element_amplitudes())
+    return {
+        'positions': positions,
+        'amplitudes': amplitudes,
+        'k': model.k,
+        'steering_angle': steering_angle,
+        'precision': model.precision,
+        'table_bits': model.table_bits,
+        'directivity': model.directivity(),  # Tiles have their own grids, so directive elements look their gains up per tile
+        'reference': max(np.abs(amplitudes).sum(), 1) ** 2,  # Peak intensity of a fully coherent sum, the same for every tile
+    }
+
+
+def compute_tile(tile_grid, state, level, i, j, dynamic_range_db=40.0):
+    """Intensity of one tile in dB relative to the coherent peak, clipped to [-dynamic_range_db, 0], as float32."""
+    x, y = tile_grid.sample_coordinates(level, i, j)
+    X, Y = np.meshgrid(x, y)
+    field = BeamformingSimulator.direct_field(state['positions'], X, Y, state['k'], state['steering_angle'], state['precision'],
+                                              state['amplitudes'], table_bits=state['table_bits'], directivity=state['directivity'])
+    intensity = np.abs(field) ** 2 / state['reference']
+    return np.clip(10 * np.log10(np.maximum(intensity, 1e-12)), -dynamic_range_db, 0).astype(np.float32)
+
+
+class TileCache:
+    def __init__(self, capacity=512):
+        """LRU of rendered tiles keyed by (state key, level, i, j)."""
+        self.capacity = capacity
+        self.entries = collections.OrderedDict()
+
+    def get(self, key):
+        tile = self.entries.get(key)
+        if tile is not None:
+            self.entries.move_to_end(key)
+        return tile
+
+    def put(self, key, tile):
+        self.entries[key] = tile
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self.entries
@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from App.InteractionTrace import load_trace
+
+PERCENTILES = (50, 90, 99)
+
+
+def replay_steering_angle(controller, value):
+    # The slot runs on sliderReleased, which setValue does not emit
+    controller.view.steering_angle_slider.setValue(value)
+    controller.update_steering_angle()
+
+
+def replay_sidebar(controller, visible):
+    if controller.view.sidebar.isVisible() != visible:
+        controller.toggle_sidebar()
+
+
+# Event name -> how to reproduce it: set the control the operator used, so the same signals reach the same slots
+REPLAY_ACTIONS = {
+    'arrays_number': lambda controller, value: controller.view.arrays_number_SpinBox.setValue(value),
+    'elements_number': lambda controller, value: controller.view.elements_number_SpinBox.setValue(value),
+    'elements_spacing': lambda controller, value: controller.view.elements_spacing_slider.setValue(value),
+    'curvature': lambda controller, value: controller.view.array_curve_slider.setValue(value),
+    'rows': lambda controller, value: controller.view.rows_SpinBox.setValue(value),
+    'array_selection': lambda controller, value: controller.view.select_array(*value),
+    'sidebar': replay_sidebar,
+    'steering_angle': replay_steering_angle,
+    'operating_frequency': lambda controller, value: controller.view.operating_frequency_combobox.setCurrentIndex(value),
+    'taper': lambda controller, value: controller.view.taper_combobox.setCurrentIndex(value),
+    'element_pattern': lambda controller, value: controller.view.element_pattern_combobox.setCurrentIndex(value),
+    'coupling': lambda controller, value: controller.view.coupling_button.setChecked(value),
+    'scenario': lambda controller, value: controller.toggle_scenario(),
+    'multi_beam': lambda controller, value: controller.multi_beam_view.set_beams(value),
+    'phase_quantization': lambda controller, value: controller.quantization_view.set_settings(*value),
+}
+
+
+def settle(app):
+    # Deliver the events the action posted (repaints, deferred updates) so they count towards its latency
+    app.processEvents()
+    app.sendPostedEvents()
+    app.processEvents()
+
+
+def replay_trace(trace_path, speed=1.0, cache_directory=None, progress=None):
+    """Drive a fresh MainController offscreen through a recorded trace; returns one result dict per event.
+
+    speed scales the recorded gaps between events (1.0 keeps the operator's pacing, so background prewarming gets the
+    same idle time it had live; 0 replays back to back). Without cache_directory the replay starts from an empty
+    temporary result cache, so runs are comparable.
+    """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5 import QtWidgets
+    from App.Controller import MainController
+
+    _, events = load_trace(trace_path)
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    with tempfile.TemporaryDirectory(prefix="beamforming-replay-", ignore_cleanup_errors=True) as temporary_cache:
+        controller = MainController(app, cache_directory=cache_directory or temporary_cache)
+        controller.main_window.show()
+        controller.prewarm_scenarios()
+        settle(app)
+
+        results = []
+        start = time.perf_counter()
+        try:
+            for index, record in enumerate(events):
+                action = REPLAY_ACTIONS.get(record['event'])
+                if action is None:
+                    continue
+                if speed > 0:
+                    due = start + record['t'] / speed
+                    while time.perf_counter() < due:
+                        app.processEvents()
+                        time.sleep(min(0.001, max(due - time.perf_counter(), 0)))
+
+                began = time.perf_counter()
+                action(controller, record['value'])
+                settle(app)
+                result = {'event': record['event'], 'value': record['value'], 'ms': (time.perf_counter() - began) * 1000,
+                          'recorded_slot_ms': record.get('slot_ms')}
+                if record['event'] == 'scenario' and controller.current_scenario != record['value']:
+                    result['diverged'] = True  # The replayed scenario cycle is not where the operator's was
+                results.append(result)
+                if progress is not None:
+                    progress(index + 1, len(events))
+        finally:
+            controller.prewarmer.stop()
+            controller.prewarmer.thread.join(timeout=10)
+            controller.logging.close()
+            controller.main_window.close()
+    return results
+
+
+def latency_report(results):
+    """Per-event-type and overall latency percentiles (ms), as {event: {'count', 'p50', 'p90', 'p99', 'max'}}."""
+    groups = {}
+    for result in results:
+        groups.setdefault(result['event'], []).append(result['ms'])
+    groups['all'] = [result['ms'] for result in results]
+
+    report = {}
+    for event, latencies in groups.items():
+        if not latencies:
+            continue
+        row = {'count': len(latencies)}
+        row.update({f"p{percentile}": float(np.percentile(latencies, percentile)) for percentile in PERCENTILES})
+        row['max'] = float(max(latencies))
+        report[event] = row
+    return report
+
+
+def format_report(report):
+    columns = ['count'] + [f"p{percentile}" for percentile in PERCENTILES] + ['max']
+    lines = [f"{'event':<20}" + ''.join(f"{column:>10}" for column in columns)]
+    for event, row in sorted(report.items(), key=lambda item: (item[0] == 'all', item[0])):
+        lines.append(f"{event:<20}{row['count']:>10}" + ''.join(f"{row[column]:>10.1f}" for column in columns[1:]))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded interaction trace offscreen and report per-event latency (ms).")
+    parser.add_argument('trace', help="Trace recorded with `python Main.py --record-trace PATH`")
+    parser.add_argument('--speed', type=float, default=1.0, help="Pacing relative to the recording; 0 replays back to back")
+    parser.add_argument('--cache-directory', help="Use this result cache instead of an empty temporary one")
+    parser.add_argument('--json', metavar='PATH', help="Also write the per-event results and the report as JSON")
+    arguments = parser.parse_args()
+
+    results = replay_trace(arguments.trace, arguments.speed, arguments.cache_directory,
+                           progress=lambda done, total: print(f"\r{done}/{total} events", end='', flush=True))
+    report = latency_report(results)
+    print('\n' + format_report(report))
+    diverged = sum(1 for result in results if result.get('diverged'))
+    if diverged:
+        print(f"Warning: {diverged} scenario events did not reach the recorded scenario")
+
+    if arguments.json:
+        with open(arguments.json, 'w', encoding='utf-8') as json_file:
+            json.dump({'trace': arguments.trace, 'speed': arguments.speed, 'report': report, 'events': results}, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
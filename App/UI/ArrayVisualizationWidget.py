@@ -1,7 +1,8 @@
+import numpy as np
 from PyQt5.QtWidgets import QWidget
-from PyQt5.QtGui import QPainter, QColor, QPen
-from PyQt5.QtCore import QPoint
-from math import cos, radians, sin
+from PyQt5.QtGui import QPainter, QColor, QPen, QPainterPath, QPixmap
+from PyQt5.QtCore import QPointF, Qt
+from math import radians, sin
 
 
 class ArrayVisualizationWidget(QWidget):
@@ -9,6 +10,7 @@ class ArrayVisualizationWidget(QWidget):
         super().__init__(parent)
         self.element_size = 1  # Constant radius for each element
         self.array_configs = []
+        self.geometry_cache = {}  # Array index -> (geometry key, rendered QPixmap, bounding QRect)
         # Default configuration for new arrays if not specified
         self.default_spacing = 2
         self.default_num_elements = 2
@@ -29,8 +31,13 @@ class ArrayVisualizationWidget(QWidget):
         # Adjust index to zero-based for internal processing
         zero_based_index = index - 1
         if 0 <= zero_based_index < len(self.array_configs):
+            if self.array_configs[zero_based_index] == (spacing, num_elements, curvature_angle):
+                return
+            # Only the area covered by the old and new drawing of this array needs repainting
+            _, old_bounds = self.arrayGeometry(zero_based_index)
             self.array_configs[zero_based_index] = (spacing, num_elements, curvature_angle)
-            self.update()
+            _, new_bounds = self.arrayGeometry(zero_based_index)
+            self.update(old_bounds.united(new_bounds))
         else:
             raise ValueError("Array index out of range")  # Provide feedback for invalid index
 
@@ -45,6 +52,8 @@ class ArrayVisualizationWidget(QWidget):
         elif target_length < current_length:
             # Remove excess arrays
             self.array_configs = self.array_configs[:target_length]
+            for index in [index for index in self.geometry_cache if index >= target_length]:
+                del self.geometry_cache[index]
         self.update()  # Redraw the widget with updated settings
 
     def get_array_configuration(self, index):
@@ -57,12 +66,17 @@ class ArrayVisualizationWidget(QWidget):
 
     def paintEvent(self, event):
         qp = QPainter(self)
-        self.drawArrays(qp)
+        self.drawArrays(qp, event.rect())
         qp.end()
 
-    def drawArrays(self, qp):
-        qp.setPen(QPen(QColor(0, 0, 0), 1))  # Setting pen for circle outlines
-        qp.setBrush(QColor(255, 255, 255))  # Setting brush for filling circles
+    def drawArrays(self, qp, dirty_rect=None):
+        # Each array is blitted from a cached pixmap; arrays outside the region being repainted are skipped
+        for index in range(len(self.array_configs)):
+            pixmap, bounds = self.arrayGeometry(index)
+            if dirty_rect is None or bounds.intersects(dirty_rect):
+                qp.drawPixmap(bounds.topLeft(), pixmap)
+
+    def arrayOrigin(self, index):
         centerY = self.height() / 2  # Vertical center of the widget
 
         num_arrays = len(self.array_configs)
@@ -85,26 +99,54 @@ class ArrayVisualizationWidget(QWidget):
 
         # Calculate the starting x position to center the arrays in the widget
         x_start = (self.width() - (total_width_required + (num_arrays - 1) * spacing_between_arrays)) / 2
-
-        for index, (spacing, num_elements, curvature_angle) in enumerate(self.array_configs):
-            positions = []  # Store calculated positions for alignment
-            current_x_start = x_start + index * (array_width + spacing_between_arrays)  # Calculate x_start for this array
-
-            if curvature_angle == 0:  # Linear layout for arrays without curvature
-                for i in range(num_elements):
-                    x_pos = current_x_start + i * spacing
-                    positions.append((x_pos, centerY))
-            else:  # Curved layout calculation
-                radius = spacing / (2 * sin(radians(curvature_angle / (num_elements - 1) / 2))) if num_elements > 1 else spacing
-                start_angle = radians(90 - curvature_angle / 2)
-                for i in range(num_elements):
-                    angle = start_angle + i * radians(curvature_angle / (num_elements - 1))
-                    x_pos = current_x_start + radius * cos(angle)
-                    y_pos = centerY + radius * sin(angle) - radius
-                    positions.append((x_pos, y_pos))
-
-            for x_pos, y_pos in positions:
-                if not (-2147483648 <= x_pos <= 2147483647 and -2147483648 <= y_pos <= 2147483647):
-                    print(f"Invalid position values: x_pos={x_pos}, y_pos={y_pos}")
-                else:
-                    qp.drawEllipse(QPoint(int(x_pos), int(y_pos)), self.element_size, self.element_size)
+        return x_start + index * (array_width + spacing_between_arrays), centerY
+
+    def elementPositions(self, index):
+        spacing, num_elements, curvature_angle = self.array_configs[index]
+        current_x_start, centerY = self.arrayOrigin(index)
+        element_indices = np.arange(num_elements)
+
+        if curvature_angle == 0:  # Linear layout for arrays without curvature
+            x_positions = current_x_start + element_indices * spacing
+            y_positions = np.full(num_elements, centerY, dtype=float)
+        else:  # Curved layout calculation
+            radius = spacing / (2 * sin(radians(curvature_angle / (num_elements - 1) / 2))) if num_elements > 1 else spacing
+            start_angle = radians(90 - curvature_angle / 2)
+            angle_step = radians(curvature_angle / (num_elements - 1)) if num_elements > 1 else 0
+            angles = start_angle + element_indices * angle_step
+            x_positions = current_x_start + radius * np.cos(angles)
+            y_positions = centerY + radius * np.sin(angles) - radius
+
+        # Positions that cannot be represented as Qt int coordinates are dropped rather than drawn
+        valid = np.isfinite(x_positions) & np.isfinite(y_positions)
+        valid &= (np.abs(x_positions) <= 2147483647) & (np.abs(y_positions) <= 2147483647)
+        return x_positions[valid].astype(int), y_positions[valid].astype(int)
+
+    def arrayGeometry(self, index):
+        # Geometry depends on the array's own configuration and on the overall layout (array count and widget size)
+        key = (self.array_configs[index], len(self.array_configs), self.width(), self.height())
+        cached = self.geometry_cache.get(index)
+        if cached is not None and cached[0] == key:
+            return cached[1], cached[2]
+
+        path = QPainterPath()
+        path.setFillRule(Qt.WindingFill)  # Overlapping circles (closely spaced elements) fill solid instead of leaving odd-even holes
+        for x_pos, y_pos in zip(*self.elementPositions(index)):
+            path.addEllipse(QPointF(x_pos, y_pos), self.element_size, self.element_size)
+        # Grow the bounds by the pen width so outlines are included
+        bounds = path.boundingRect().toAlignedRect().adjusted(-2, -2, 2, 2)
+        # Clip to the widget so an oversized array never allocates a huge pixmap
+        bounds = bounds.intersected(self.rect())
+
+        # Render the whole array once; repaints then cost a single blit
+        pixmap = QPixmap(max(bounds.width(), 1), max(bounds.height(), 1))
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.translate(-bounds.left(), -bounds.top())
+        painter.setPen(QPen(QColor(0, 0, 0), 1))  # Setting pen for circle outlines
+        painter.setBrush(QColor(255, 255, 255))  # Setting brush for filling circles
+        painter.drawPath(path)
+        painter.end()
+
+        self.geometry_cache[index] = (key, pixmap, bounds)
+        return pixmap, bounds
@@ -4,11 +4,16 @@ from matplotlib.figure import Figure
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
 from App.UI.ArrayVisualizationWidget import ArrayVisualizationWidget
+from App.UI.HeatmapWidget import HeatmapWidget
+from App.Scenarios import OPERATING_FREQUENCIES
+from App.Tapers import TAPERS
+from App.Directivity import ELEMENT_PATTERNS, SELECTABLE_PATTERNS
 
 
 class Ui_MainWindow(object):
     def __init__(self, current_selected_ALL_array=False, current_arrays_number=1, current_array_curvature_angle=0, current_elements_number=2,
-                 current_elements_spacing=0.5, current_steering_angle=90, current_operating_frequency=700e6):
+                 current_elements_spacing=0.5, current_steering_angle=90, current_operating_frequency=700e6, current_taper='uniform',
+                 current_element_pattern='isotropic', current_rows=1):
         self.visualization_widget = ArrayVisualizationWidget()
 
         self.BUTTON_STYLESHEET = """
@@ -20,6 +25,9 @@ class Ui_MainWindow(object):
         QPushButton:hover {
             background-color: rgba(255, 255, 255, 10);
         }
+        QPushButton:checked {
+            background-color: rgba(176, 190, 197, 60);
+        }
         """
 
         self.QUIT_BUTTON_STYLESHEETSHEET = """
@@ -156,23 +164,14 @@ class Ui_MainWindow(object):
         self.current_array_curvature_angle = current_array_curvature_angle
         self.current_elements_number = current_elements_number
         self.current_elements_spacing = current_elements_spacing
+        self.current_rows = current_rows  # Rows of every array; more than one makes planar arrays, one row per element spacing
 
         self.current_steering_angle = current_steering_angle
         self.current_operating_frequency = current_operating_frequency
+        self.current_taper = current_taper
+        self.current_element_pattern = current_element_pattern
 
-        self.operaring_frequency_values = [
-            700e6,  # 700 MHz (5G)
-            900e6,  # 900 MHz (5G)
-            1.8e9,  # 1.8 GHz (5G)
-            2.1e9,  # 2.1 GHz (5G)
-            3.5e9,  # 3.5 GHz (5G)
-            5e9,  # 5 GHz (5G and advanced applications)
-            1e6,  # 1 MHz (Ultrasound, tumor ablation)
-            3e6,  # 3 MHz (Ultrasound, therapeutic applications)
-            5e6,  # 5 MHz (Ultrasound, industrial applications)
-            10e6,  # 10 MHz (Ultrasound, tumor ablation)
-            20e6  # 20 MHz (Ultrasound, advanced tumor ablation)
-        ]
+        self.operaring_frequency_values = list(OPERATING_FREQUENCIES)
 
     def setupUi(self, MainWindow):
         MainWindow.setObjectName("MainWindow")
@@ -263,19 +262,7 @@ class Ui_MainWindow(object):
         """)
         self.sidebar.setVisible(False)
 
-        self.operating_frequency_values = [
-            700e6,  # 700 MHz (5G)
-            900e6,  # 900 MHz (5G)
-            1.8e9,  # 1.8 GHz (5G)
-            2.1e9,  # 2.1 GHz (5G)
-            3.5e9,  # 3.5 GHz (5G)
-            5e9,  # 5 GHz (5G and advanced applications)
-            1e6,  # 1 MHz (Ultrasound, tumor ablation)
-            3e6,  # 3 MHz (Ultrasound, therapeutic applications)
-            5e6,  # 5 MHz (Ultrasound, industrial applications)
-            10e6,  # 10 MHz (Ultrasound, tumor ablation)
-            20e6  # 20 MHz (Ultrasound, advanced tumor ablation)
-        ]
+        self.operating_frequency_values = list(OPERATING_FREQUENCIES)
 
         # Set a vertical layout for the sidebar
         sidebar_layout = QtWidgets.QVBoxLayout(self.sidebar)
@@ -318,10 +305,33 @@ class Ui_MainWindow(object):
         self.operating_frequency_combobox = self.createComboBox(layout=self.controls_layout, options=self.operaring_frequency_values,
                                                                 placeholder="Operating Frequency", isVisible=False)
 
+        self.taper_button = self.createButton(self.controls_layout, "Amplitude Taper", method=self.show_taper_combobox)
+        self.taper_combobox = self.createComboBox(layout=self.controls_layout, options=[label for label, _ in TAPERS.values()],
+                                                  placeholder="Amplitude Taper", isVisible=False)
+        self.element_pattern_button = self.createButton(self.controls_layout, "Element Pattern", method=self.show_element_pattern_combobox)
+        self.element_pattern_combobox = self.createComboBox(layout=self.controls_layout,
+                                                            options=[ELEMENT_PATTERNS[pattern][0] for pattern in SELECTABLE_PATTERNS],
+                                                            placeholder="Element Pattern", isVisible=False)
+        self.coupling_button = self.createButton(self.controls_layout, "Mutual Coupling")
+        self.coupling_button.setCheckable(True)
+        self.compare_tapers_button = self.createButton(self.controls_layout, "Compare Tapers")
+        self.multi_beam_button = self.createButton(self.controls_layout, "Multi-Beam")
+        self.quantization_button = self.createButton(self.controls_layout, "Phase Quantization")
+
+        self.volume_view_button = self.createButton(self.controls_layout, "3D Volume")
+        self.tiled_view_button = self.createButton(self.controls_layout, "Pan / Zoom")
+        self.imaging_button = self.createButton(self.controls_layout, "Receive Imaging")
+        self.export_button = self.createButton(self.controls_layout, "Export")
+        self.auto_tune_button = self.createButton(self.controls_layout, "Auto-Tune")
+
         self.sidebar_parameter_indicator = self.createLabel(self.controls_layout, max_size=150, isVisible=False)
 
         self.SIDEBAR_CONTROLLER_BUTTONS = [self.return_sidebar_buttons, self.steering_angle_button, self.steering_angle_slider,
-                                           self.operating_frequency_button, self.operating_frequency_combobox, self.sidebar_parameter_indicator]
+                                           self.operating_frequency_button, self.operating_frequency_combobox, self.taper_button,
+                                           self.taper_combobox, self.element_pattern_button, self.element_pattern_combobox,
+                                           self.coupling_button, self.compare_tapers_button, self.multi_beam_button,
+                                           self.quantization_button, self.volume_view_button, self.tiled_view_button, self.imaging_button,
+                                           self.export_button, self.auto_tune_button, self.sidebar_parameter_indicator]
 
         # Add the controls_widget to the sidebar's layout
         sidebar_layout.addWidget(self.controls_widget)
@@ -340,17 +350,15 @@ class Ui_MainWindow(object):
         plots_layout.setContentsMargins(5, 5, 5, 5)
         plots_layout.setSpacing(10)
 
-        # Creating matplotlib canvases for the intensity map and beam profile
-        self.intensityMapFigure = Figure()
-        self.intensityMapCanvas = FigureCanvas(self.intensityMapFigure)
-        self.intensityMapCanvas.setStyleSheet("background-color: #1A1A40;")
+        # The intensity map is redrawn on every interaction, so it bypasses matplotlib; the beam profile stays a matplotlib canvas
+        self.intensityMapView = HeatmapWidget()
 
         self.beamProfileFigure = Figure()
         self.beamProfileCanvas = FigureCanvas(self.beamProfileFigure)
         self.beamProfileCanvas.setStyleSheet("background-color: #1A1A40;")
 
         # Adding canvases to the plots layout
-        plots_layout.addWidget(self.intensityMapCanvas, 0, 0)  # Position at row 0, column 0
+        plots_layout.addWidget(self.intensityMapView, 0, 0)  # Position at row 0, column 0
         plots_layout.addWidget(self.beamProfileCanvas, 0, 1)  # Position at row 0, column 1
 
     def setupMainButtons(self, MainWindow):
@@ -373,13 +381,16 @@ class Ui_MainWindow(object):
         self.add_curve_button = self.createButton(self.inputs_layout, "Array Curve", self.show_curve_input)
         self.array_curve_slider = self.createSlider(layout=self.inputs_layout, min_value=0, max_value=180, initial_value=0, isVisible=False)
 
+        self.rows_button = self.createButton(self.inputs_layout, "Array Rows", self.show_rows_SpinBox)
+        self.rows_SpinBox = self.createSpinBox(self.inputs_layout, min_value=1, max_value=16, initial_value=self.current_rows, isVisible=False)
+
         self.arrays_parameters_indicator = self.createLabel(self.inputs_layout, max_size=110, isVisible=False)
 
         self.ARRAYS_CONTROLLER_BUTTONS = [self.return_main_buttons, self.array_curve_slider, self.adjust_array_number,
                                           self.elements_number_button,
                                           self.elements_spacing_button, self.add_curve_button, self.elements_spacing_slider,
                                           self.elements_number_SpinBox, self.arrays_number_SpinBox, self.current_selected_array_button,
-                                          self.arrays_parameters_indicator]
+                                          self.arrays_parameters_indicator, self.rows_button, self.rows_SpinBox]
 
         # Creating the quit_app_button directly on the centralwidget without using the layout
         self.scenarios_button = QtWidgets.QPushButton(self.centralwidget)
@@ -540,34 +551,37 @@ class Ui_MainWindow(object):
     # --------------------------------------------------------------------------------------------------------------------------------------
 
     def updateVisualization(self):
-        spacing_factor = 5
-        if self.current_selected_ALL_array:
-            for i in range(1, self.current_arrays_number + 1):
-                self.visualization_widget.editArray(
-                    index=self.current_selected_array + i,
-                    spacing=self.current_elements_spacing * spacing_factor,
-                    num_elements=self.current_elements_number,
-                    curvature_angle=self.current_array_curvature_angle,
-                )
-        else:
+        for index, (spacing, num_elements, curvature_angle) in self.array_edits(self.current_elements_spacing, self.current_elements_number,
+                                                                               self.current_array_curvature_angle):
             self.visualization_widget.editArray(
-                index=self.current_selected_array,
-                spacing=self.current_elements_spacing * spacing_factor,
-                num_elements=self.current_elements_number,
-                curvature_angle=self.current_array_curvature_angle,
+                index=index,
+                spacing=spacing,
+                num_elements=num_elements,
+                curvature_angle=curvature_angle,
             )
 
+    def array_edits(self, elements_spacing, elements_number, curvature_angle):
+        # (index, configuration) pairs that updateVisualization applies for the given settings
+        spacing_factor = 5
+        configuration = (elements_spacing * spacing_factor, elements_number, curvature_angle)
+        if self.current_selected_ALL_array:
+            return [(self.current_selected_array + i, configuration) for i in range(1, self.current_arrays_number + 1)]
+        return [(self.current_selected_array, configuration)]
+
     # --------------------------------------------------------------------------------------------------------------------------------------
     def return_main_initial_button(self):
         if self.return_main_buttons.isVisible():
             self.hide_button(self.ARRAYS_CONTROLLER_BUTTONS)
             self.show_button([self.adjust_array_number, self.elements_number_button, self.elements_spacing_button,
-                              self.add_curve_button])
+                              self.add_curve_button, self.rows_button])
 
     def return_sidebar_initial_button(self):
         if self.return_sidebar_buttons.isVisible():
             self.hide_button(self.SIDEBAR_CONTROLLER_BUTTONS)
-            self.show_button([self.operating_frequency_button, self.steering_angle_button])
+            self.show_button([self.operating_frequency_button, self.steering_angle_button, self.taper_button, self.element_pattern_button,
+                              self.coupling_button, self.compare_tapers_button, self.multi_beam_button, self.quantization_button,
+                              self.volume_view_button, self.tiled_view_button, self.imaging_button, self.export_button,
+                              self.auto_tune_button])
 
     def toggle_current_selected_array(self):
         if self.current_selected_ALL_array:
@@ -583,6 +597,12 @@ class Ui_MainWindow(object):
             self.current_selected_array_button.setText("All Arrays")
             self.current_selected_array = 0
 
+    def select_array(self, index, all_arrays):
+        # Jump straight to a selection toggle_current_selected_array would reach, as replayed interaction traces do
+        self.current_selected_array = index
+        self.current_selected_ALL_array = all_arrays
+        self.current_selected_array_button.setText("All Arrays" if all_arrays else f"Array {index}")
+
     def show_curve_input(self):
         if not self.array_curve_slider.isVisible():
             self.hide_button(self.ARRAYS_CONTROLLER_BUTTONS)
@@ -617,6 +637,13 @@ class Ui_MainWindow(object):
                 controller_buttons.append(self.current_selected_array_button)
             self.show_button(controller_buttons)
 
+    def show_rows_SpinBox(self):
+        if not self.rows_SpinBox.isVisible():
+            self.hide_button(self.ARRAYS_CONTROLLER_BUTTONS)
+            self.arrays_parameters_indicator.setText(f"{self.current_rows} Rows")
+            controller_buttons = [self.return_main_buttons, self.rows_SpinBox, self.arrays_parameters_indicator]
+            self.show_button(controller_buttons)
+
     def show_frequency_combobox(self):
         if not self.operating_frequency_combobox.isVisible():
             self.hide_button(self.SIDEBAR_CONTROLLER_BUTTONS)
@@ -625,6 +652,20 @@ class Ui_MainWindow(object):
             formatted_frequency = self.format_frequency(self.current_operating_frequency)
             self.sidebar_parameter_indicator.setText(formatted_frequency)
 
+    def show_taper_combobox(self):
+        if not self.taper_combobox.isVisible():
+            self.hide_button(self.SIDEBAR_CONTROLLER_BUTTONS)
+            controller_buttons = [self.return_sidebar_buttons, self.taper_combobox, self.sidebar_parameter_indicator]
+            self.show_button(controller_buttons)
+            self.sidebar_parameter_indicator.setText(TAPERS[self.current_taper][0])
+
+    def show_element_pattern_combobox(self):
+        if not self.element_pattern_combobox.isVisible():
+            self.hide_button(self.SIDEBAR_CONTROLLER_BUTTONS)
+            controller_buttons = [self.return_sidebar_buttons, self.element_pattern_combobox, self.sidebar_parameter_indicator]
+            self.show_button(controller_buttons)
+            self.sidebar_parameter_indicator.setText(ELEMENT_PATTERNS[self.current_element_pattern][0])
+
     def show_steering_angle_slider(self):
         if not self.steering_angle_slider.isVisible():
             self.hide_button(self.SIDEBAR_CONTROLLER_BUTTONS)
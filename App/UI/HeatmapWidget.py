@@ -0,0 +1,124 @@
+import sys
+
+import numpy as np
+from matplotlib import colormaps
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+def colormap_lut(name='jet'):
+    """256-entry lookup table in the byte order of QImage.Format_RGB32 (0xffRRGGBB as a native 32-bit word)."""
+    rgba = colormaps[name](np.linspace(0, 1, 256), bytes=True)
+    order = [2, 1, 0, 3] if sys.byteorder == 'little' else [3, 0, 1, 2]
+    lut = rgba[:, order].copy()
+    lut[:, 3 if sys.byteorder == 'little' else 0] = 255
+    return lut
+
+
+class HeatmapWidget(QtWidgets.QWidget):
+    MARGINS = (56, 28, 90, 36)  # Left, top, right (colorbar), bottom, in pixels
+
+    def __init__(self, title='Beamforming Intensity Map', colormap='jet', parent=None):
+        """Lightweight display of a 2-D intensity array, for the live path where matplotlib is too slow.
+
+        Values are mapped through a 256-entry colormap table straight into a preallocated 32-bit pixel buffer that a
+        QImage wraps without copying; both are reused until the array shape changes. The scale is linear or dB
+        (toggled from the context menu). Publication-quality figures still come from matplotlib (see App.Exporter).
+        """
+        super().__init__(parent)
+        self.title = title
+        self.lut = colormap_lut(colormap)
+        self.scale = 'linear'
+        self.dynamic_range_db = 40.0
+
+        self.x_range = self.y_range = None
+        self.intensity = None
+        self.levels = None  # Scratch for the scaled values, in the intensity's dtype so indices round as matplotlib's do
+        self.indices = None  # uint8 colormap indices
+        self.pixels = None  # (ny, nx, 4) uint8, the memory behind self.image
+        self.image = None
+        self.colorbar = QtGui.QImage(self.lut[::-1].copy().data, 1, 256, 4, QtGui.QImage.Format_RGB32).copy()
+
+        self.setMinimumSize(200, 150)
+        self.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.show_context_menu)
+
+    def set_intensity(self, x, y, intensity):
+        """Show a normalized (ny, nx) intensity over the x and y axes; repaints without reallocating when the shape is unchanged."""
+        self.x_range = (float(x[0]), float(x[-1]))
+        self.y_range = (float(y[0]), float(y[-1]))
+        self.intensity = intensity
+        if self.pixels is None or self.pixels.shape[:2] != intensity.shape or self.levels.dtype != intensity.dtype:
+            height, width = intensity.shape
+            self.levels = np.empty(intensity.shape, intensity.dtype)
+            self.indices = np.empty(intensity.shape, np.uint8)
+            self.pixels = np.empty((height, width, 4), np.uint8)
+            self.image = QtGui.QImage(self.pixels.data, width, height, width * 4, QtGui.QImage.Format_RGB32)
+        self.map_colors()
+        self.update()
+
+    def map_colors(self):
+        # Image row 0 is the top, so rows are flipped to put the lowest y at the bottom. Like matplotlib's Colormap, a value
+        # v in [0, 1] selects entry int(v * 256), with v = 1 falling into the last entry
+        levels = self.levels
+        if self.scale == 'db':
+            np.maximum(self.intensity[::-1], 10 ** (-self.dynamic_range_db / 10), out=levels)
+            np.log10(levels, out=levels)
+            levels *= 10 * 256 / self.dynamic_range_db
+            levels += 256
+        else:
+            np.multiply(self.intensity[::-1], 256, out=levels)
+        np.clip(levels, 0, 255, out=levels)
+        np.copyto(self.indices, levels, casting='unsafe')
+        np.take(self.lut, self.indices, axis=0, out=self.pixels, mode='clip')
+
+    def set_scale(self, scale):
+        self.scale = scale
+        if self.intensity is not None:
+            self.map_colors()
+            self.update()
+
+    def show_context_menu(self, position):
+        menu = QtWidgets.QMenu(self)
+        action = menu.addAction("Decibel Scale")
+        action.setCheckable(True)
+        action.setChecked(self.scale == 'db')
+        action.toggled.connect(lambda checked: self.set_scale('db' if checked else 'linear'))
+        menu.exec_(self.mapToGlobal(position))
+
+    # Painting -------------------------------------------------------------------------------------------------------------------------------
+
+    def plot_rect(self):
+        left, top, right, bottom = self.MARGINS
+        return QtCore.QRect(left, top, max(self.width() - left - right, 1), max(self.height() - top - bottom, 1))
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        painter.fillRect(self.rect(), QtGui.QColor(26, 26, 64))
+        painter.setPen(QtGui.QColor('white'))
+        painter.drawText(QtCore.QRect(0, 4, self.width(), 20), QtCore.Qt.AlignHCenter, self.title)
+        if self.image is None:
+            painter.end()
+            return
+
+        target = self.plot_rect()
+        painter.drawImage(target, self.image)
+        painter.drawRect(target.adjusted(0, 0, -1, -1))
+
+        # Axis extents at the corners of the map, in meters
+        metrics = painter.fontMetrics()
+        below = target.bottom() + metrics.height() + 2
+        painter.drawText(target.left(), below, f"{self.x_range[0]:.4g}")
+        painter.drawText(target.right() - metrics.width(f"{self.x_range[1]:.4g}"), below, f"{self.x_range[1]:.4g}")
+        painter.drawText(QtCore.QRect(target.left(), below - metrics.height() + 4, target.width(), metrics.height() + 4),
+                         QtCore.Qt.AlignHCenter, "Horizontal Position (m)")
+        painter.drawText(QtCore.QRect(0, target.bottom() - metrics.height(), target.left() - 6, metrics.height()),
+                         QtCore.Qt.AlignRight, f"{self.y_range[0]:.4g}")
+        painter.drawText(QtCore.QRect(0, target.top(), target.left() - 6, metrics.height()), QtCore.Qt.AlignRight, f"{self.y_range[1]:.4g}")
+
+        bar = QtCore.QRect(target.right() + 14, target.top(), 14, target.height())
+        painter.drawImage(bar, self.colorbar)
+        painter.drawRect(bar.adjusted(0, 0, -1, -1))
+        high, low = ("0 dB", f"-{self.dynamic_range_db:g} dB") if self.scale == 'db' else ("1", "0")
+        painter.drawText(bar.right() + 4, bar.top() + metrics.ascent(), high)
+        painter.drawText(bar.right() + 4, bar.bottom(), low)
+        painter.end()
@@ -0,0 +1,88 @@
+import time
+
+import numpy as np
+from PyQt5 import QtCore, QtWidgets
+
+from App.Imaging import DYNAMIC_RANGE_DB, DelayAndSumImager, demo_scatterers
+from App.ResultCache import ResultCache
+from App.UI.HeatmapWidget import HeatmapWidget
+
+
+class ImagingView(QtWidgets.QWidget):
+    FRAME_INTERVAL_MS = 30  # Timer period of the stream; frames are dropped rather than queued when one runs late
+    ORBIT_FRAMES = 240  # Frames per orbit of the moving scatterer
+
+    def __init__(self, parent=None):
+        """Live delay-and-sum B-mode image of point scatterers, one moving, from RF synthesized for the current arrays.
+
+        The imager and its delay table are rebuilt only when the frequency or array configurations change; each timer
+        tick synthesizes and beamforms one frame into the preallocated heatmap.
+        """
+        super().__init__(parent)
+        self.setWindowTitle("Receive Imaging (Delay-and-Sum)")
+        self.resize(800, 700)
+        self.imager = None
+        self.model_key = None
+        self.frame = 0
+        self.frame_ms = None
+        self.build_ms = 0.0
+
+        layout = QtWidgets.QVBoxLayout(self)
+        self.heatmap = HeatmapWidget("Delay-and-Sum B-Mode", colormap='gray')
+        self.heatmap.scale = 'db'
+        self.heatmap.dynamic_range_db = DYNAMIC_RANGE_DB
+        layout.addWidget(self.heatmap, 1)
+
+        controls = QtWidgets.QHBoxLayout()
+        self.play_button = QtWidgets.QPushButton("Pause", self)
+        self.play_button.setCheckable(True)
+        self.play_button.setChecked(True)
+        self.play_button.toggled.connect(self.set_playing)
+        self.status_label = QtWidgets.QLabel(self)
+        controls.addWidget(self.play_button)
+        controls.addWidget(self.status_label, 1)
+        layout.addLayout(controls)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(self.FRAME_INTERVAL_MS)
+        self.timer.timeout.connect(self.next_frame)
+
+    def set_model(self, model):
+        model_key = ResultCache.make_key({'frequency': model.frequency, 'arrays_info': model.arrays_info})
+        if model_key == self.model_key:
+            return
+        start = time.perf_counter()
+        self.imager = DelayAndSumImager.from_model(model)
+        self.model_key = model_key
+        self.build_ms = (time.perf_counter() - start) * 1000
+        self.frame_ms = None
+        self.next_frame()
+
+    def set_playing(self, playing):
+        self.play_button.setText("Pause" if playing else "Play")
+        if playing and self.isVisible():
+            self.timer.start()
+        else:
+            self.timer.stop()
+
+    def next_frame(self):
+        if self.imager is None:
+            return
+        imager = self.imager
+        start = time.perf_counter()
+        scatterers = demo_scatterers((imager.x[0], imager.x[-1]), (imager.y[0], imager.y[-1]), self.frame / self.ORBIT_FRAMES)
+        envelope = imager.beamform(imager.synthesize(scatterers))
+        self.heatmap.set_intensity(imager.x, imager.y, np.square(envelope, out=envelope))
+        elapsed = (time.perf_counter() - start) * 1000
+        self.frame_ms = elapsed if self.frame_ms is None else 0.9 * self.frame_ms + 0.1 * elapsed
+        self.frame = (self.frame + 1) % self.ORBIT_FRAMES
+        self.status_label.setText(f"{len(imager.x)} x {len(imager.y)} pixels x {len(imager.positions)} channels, "
+                                  f"{self.frame_ms:.1f} ms per frame (table built in {self.build_ms:.0f} ms)")
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.set_playing(self.play_button.isChecked())
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.stop()
@@ -0,0 +1,160 @@
+import numpy as np
+from PyQt5 import QtCore, QtWidgets
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+
+from App.SimpleSimulation import BeamformingSimulator
+
+
+class MultiBeamView(QtWidgets.QWidget):
+    # Emitted with the list of (angle, power) beams whenever a beam is added, removed or edited
+    beamsChanged = QtCore.pyqtSignal(list)
+
+    DEFAULT_BEAMS = ((-30.0, 0.0), (0.0, 0.0), (30.0, 0.0))  # (angle in degrees, power in dB)
+    FLOOR_DB = -40
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Multi-Beam Steering")
+        self.resize(1400, 600)
+        self.artists = None
+        self.updating = False  # Set while the table is filled programmatically, so one change emits one signal
+
+        layout = QtWidgets.QHBoxLayout(self)
+        controls = QtWidgets.QVBoxLayout()
+        layout.addLayout(controls)
+
+        self.beam_table = QtWidgets.QTableWidget(0, 2, self)
+        self.beam_table.setHorizontalHeaderLabels(["Angle (deg)", "Power (dB)"])
+        self.beam_table.setMaximumWidth(220)
+        self.beam_table.itemChanged.connect(self.beam_edited)
+        self.beam_table.currentCellChanged.connect(lambda row, *_: self.select_beam(row))
+        controls.addWidget(self.beam_table, 1)
+
+        # Dragging the selected beam only recomputes that beam's contribution
+        self.angle_slider = QtWidgets.QSlider(QtCore.Qt.Horizontal, self)
+        self.angle_slider.setRange(-90, 90)
+        self.angle_slider.valueChanged.connect(self.slide_selected_beam)
+        controls.addWidget(self.angle_slider)
+
+        buttons = QtWidgets.QHBoxLayout()
+        self.add_button = QtWidgets.QPushButton("Add Beam", self)
+        self.add_button.clicked.connect(lambda: self.add_beam(0.0, 0.0))
+        self.remove_button = QtWidgets.QPushButton("Remove Beam", self)
+        self.remove_button.clicked.connect(self.remove_selected_beam)
+        buttons.addWidget(self.add_button)
+        buttons.addWidget(self.remove_button)
+        controls.addLayout(buttons)
+
+        spread = QtWidgets.QHBoxLayout()
+        self.spread_count = QtWidgets.QSpinBox(self)
+        self.spread_count.setRange(1, 64)
+        self.spread_count.setValue(8)
+        self.spread_button = QtWidgets.QPushButton("Spread Users", self)
+        self.spread_button.clicked.connect(lambda: self.spread_beams(self.spread_count.value()))
+        spread.addWidget(self.spread_count)
+        spread.addWidget(self.spread_button)
+        controls.addLayout(spread)
+
+        self.figure = Figure()
+        self.canvas = FigureCanvas(self.figure)
+        layout.addWidget(self.canvas, 1)
+
+        self.set_beams([(angle, 10 ** (power_db / 10)) for angle, power_db in self.DEFAULT_BEAMS], emit=False)
+
+    # Beams ---------------------------------------------------------------------------------------------------------------------------------
+
+    def beams(self):
+        """The beams as (angle in degrees, linear relative power) pairs."""
+        beams = []
+        for row in range(self.beam_table.rowCount()):
+            try:
+                angle = float(self.beam_table.item(row, 0).text())
+                power_db = float(self.beam_table.item(row, 1).text())
+            except (AttributeError, ValueError):
+                continue  # A cell being typed into or left invalid is skipped until it parses
+            beams.append((float(np.clip(angle, -90, 90)), 10 ** (power_db / 10)))
+        return beams
+
+    def set_beams(self, beams, emit=True):
+        self.updating = True
+        try:
+            self.beam_table.setRowCount(0)
+            for angle, power in beams:
+                self.append_row(angle, power)
+        finally:
+            self.updating = False
+        if emit:
+            self.beamsChanged.emit(self.beams())
+
+    def append_row(self, angle, power):
+        row = self.beam_table.rowCount()
+        self.beam_table.insertRow(row)
+        self.beam_table.setItem(row, 0, QtWidgets.QTableWidgetItem(f"{angle:g}"))
+        self.beam_table.setItem(row, 1, QtWidgets.QTableWidgetItem(f"{10 * np.log10(power):.4g}"))
+
+    def add_beam(self, angle, power):
+        self.updating = True
+        try:
+            self.append_row(angle, power)
+        finally:
+            self.updating = False
+        self.beam_table.setCurrentCell(self.beam_table.rowCount() - 1, 0)
+        self.beamsChanged.emit(self.beams())
+
+    def remove_selected_beam(self):
+        row = self.beam_table.currentRow()
+        if row < 0 or self.beam_table.rowCount() <= 1:
+            return
+        self.beam_table.removeRow(row)
+        self.beamsChanged.emit(self.beams())
+
+    def spread_beams(self, count):
+        # count users at equal power, spread evenly across +-60 degrees
+        angles = np.linspace(-60, 60, count) if count > 1 else [0.0]
+        self.set_beams([(round(float(angle), 2), 1.0) for angle in angles])
+
+    def beam_edited(self, _):
+        if not self.updating:
+            self.beamsChanged.emit(self.beams())
+
+    def select_beam(self, row):
+        item = self.beam_table.item(row, 0) if row >= 0 else None
+        if item is None:
+            return
+        self.angle_slider.blockSignals(True)
+        try:
+            self.angle_slider.setValue(int(round(float(item.text()))))
+        except ValueError:
+            pass
+        finally:
+            self.angle_slider.blockSignals(False)
+
+    def slide_selected_beam(self, value):
+        row = self.beam_table.currentRow()
+        if row >= 0:
+            self.beam_table.item(row, 0).setText(f"{value:g}")  # Emits through beam_edited
+
+    # Plots ---------------------------------------------------------------------------------------------------------------------------------
+
+    def show_multi_beam(self, result):
+        """Draw a MultiBeamField result, updating the existing artists in place when the beam count is unchanged."""
+        if result is None:
+            self.figure.clf()
+            self.artists = None
+        elif self.artists is not None and len(self.artists['beam_array_factors']) == len(result['beams']) and \
+                self.artists['intensity'].get_array().shape == result['intensity'].shape:
+            floor = 10 ** (self.FLOOR_DB / 10)
+            self.artists['intensity'].set_data(result['intensity'])
+            self.artists['dominant'].set_data(BeamformingSimulator.dominant_beam_map(result, self.FLOOR_DB))
+            self.artists['array_factor'].set_ydata(10 * np.log10(np.maximum(result['array_factor'], floor)))
+            beam_lines = self.artists['beam_array_factors']
+            for index, (line, array_factor, (angle, _)) in enumerate(zip(beam_lines, result['beam_array_factors'], result['beams'])):
+                line.set_ydata(10 * np.log10(np.maximum(array_factor, floor)))
+                line.set_label(f"Beam {index + 1} ({angle:g} deg)")
+            if len(beam_lines) <= 10:
+                self.artists['array_factor'].axes.legend(fontsize='small')
+        else:
+            self.artists = BeamformingSimulator.draw_multi_beam(self.figure, result, self.FLOOR_DB)
+        self.canvas.draw_idle()
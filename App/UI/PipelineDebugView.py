@@ -0,0 +1,34 @@
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class PipelineDebugView(QtWidgets.QWidget):
+    STATUS_COLORS = {'ran': QtGui.QColor(253, 94, 80), 'reused': QtGui.QColor(120, 180, 120)}
+
+    def __init__(self, parent=None):
+        super().__init__(parent, QtCore.Qt.Tool)
+        self.setWindowTitle("Pipeline Stages")
+        self.resize(360, 420)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        self.table = QtWidgets.QTableWidget(0, 3, self)
+        self.table.setHorizontalHeaderLabels(["Stage", "Status", "Time (ms)"])
+        self.table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        self.total_label = QtWidgets.QLabel(self)
+        layout.addWidget(self.total_label)
+
+    def show_run(self, run_log):
+        # run_log is Pipeline.run_log: (stage name, 'ran' or 'reused', milliseconds) in execution order
+        self.table.setRowCount(len(run_log))
+        for row, (name, status, milliseconds) in enumerate(run_log):
+            status_item = QtWidgets.QTableWidgetItem(status)
+            status_item.setForeground(self.STATUS_COLORS.get(status, QtGui.QColor(0, 0, 0)))
+            self.table.setItem(row, 0, QtWidgets.QTableWidgetItem(name))
+            self.table.setItem(row, 1, status_item)
+            self.table.setItem(row, 2, QtWidgets.QTableWidgetItem(f"{milliseconds:.2f}"))
+
+        ran = [milliseconds for _, status, milliseconds in run_log if status == 'ran']
+        self.total_label.setText(f"{len(ran)} of {len(run_log)} stages ran, {sum(ran):.2f} ms")
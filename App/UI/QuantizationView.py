@@ -0,0 +1,75 @@
+from PyQt5 import QtCore, QtWidgets
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+
+from App.PhaseQuantization import PHASE_BITS, PHASE_MODES
+from App.SimpleSimulation import BeamformingSimulator
+
+
+class QuantizationView(QtWidgets.QWidget):
+    # Emitted with (bits, mode) whenever either control changes
+    settingsChanged = QtCore.pyqtSignal(int, str)
+
+    DEFAULT_BITS = 3
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Phase Quantization")
+        self.resize(1100, 650)
+
+        layout = QtWidgets.QHBoxLayout(self)
+        controls = QtWidgets.QVBoxLayout()
+        layout.addLayout(controls)
+
+        self.bits_spinbox = QtWidgets.QSpinBox(self)
+        self.bits_spinbox.setRange(PHASE_BITS.start, PHASE_BITS.stop - 1)
+        self.bits_spinbox.setValue(self.DEFAULT_BITS)
+        self.bits_spinbox.setSuffix(" bits")
+        self.mode_combobox = QtWidgets.QComboBox(self)
+        self.mode_combobox.addItems([mode.capitalize() for mode in PHASE_MODES])
+        self.bits_spinbox.valueChanged.connect(lambda _: self.settingsChanged.emit(*self.settings()))
+        self.mode_combobox.currentIndexChanged.connect(lambda _: self.settingsChanged.emit(*self.settings()))
+        controls.addWidget(QtWidgets.QLabel("Phase shifter resolution", self))
+        controls.addWidget(self.bits_spinbox)
+        controls.addWidget(QtWidgets.QLabel("Quantization", self))
+        controls.addWidget(self.mode_combobox)
+
+        self.report_label = QtWidgets.QLabel(self)
+        self.report_label.setMinimumWidth(220)
+        self.report_label.setAlignment(QtCore.Qt.AlignTop | QtCore.Qt.AlignLeft)
+        controls.addWidget(self.report_label, 1)
+
+        self.figure = Figure()
+        self.canvas = FigureCanvas(self.figure)
+        layout.addWidget(self.canvas, 1)
+
+    def settings(self):
+        return self.bits_spinbox.value(), PHASE_MODES[self.mode_combobox.currentIndex()]
+
+    def set_settings(self, bits, mode):
+        # One signal for the pair, rather than one per control
+        for control in (self.bits_spinbox, self.mode_combobox):
+            control.blockSignals(True)
+        try:
+            self.bits_spinbox.setValue(bits)
+            self.mode_combobox.setCurrentIndex(PHASE_MODES.index(mode))
+        finally:
+            for control in (self.bits_spinbox, self.mode_combobox):
+                control.blockSignals(False)
+        self.settingsChanged.emit(*self.settings())
+
+    def show_comparison(self, comparison):
+        report, timing = comparison['report'], comparison['timing']
+        label = f"{report['bits']}-bit ({report['mode']})"
+        BeamformingSimulator.draw_taper_comparison(self.figure, comparison, ["Ideal", label], title='Beam Profile: Ideal vs Quantized')
+        self.canvas.draw_idle()
+        self.report_label.setText(
+            f"Quantization lobe: {report['lobe_db']:.1f} dB at {report['lobe_angle']:.1f} deg\n"
+            f"Modeled: {report['predicted_lobe_db']:.1f} dB\n"
+            f"Mean error level: {report['mean_error_db']:.1f} dB\n\n"
+            f"Peak sidelobe: {report['quantized_sidelobe_db']:.1f} dB (ideal {report['ideal_sidelobe_db']:.1f} dB)\n"
+            f"Pointing error: {report['pointing_error']:.2f} deg\n"
+            f"Gain change: {report['gain_loss_db']:.2f} dB\n\n"
+            f"Map: {timing['ideal_ms']:.0f} ms with cos/sin, {timing['table_ms']:.0f} ms from the table\n"
+            f"Speedup: {timing['speedup']:.1f}x")
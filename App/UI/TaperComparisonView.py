@@ -0,0 +1,46 @@
+from PyQt5 import QtCore, QtWidgets
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+
+from App.SimpleSimulation import BeamformingSimulator
+from App.Tapers import TAPERS
+
+
+class TaperComparisonView(QtWidgets.QWidget):
+    # Emitted with the list of checked taper names whenever the selection changes
+    selectionChanged = QtCore.pyqtSignal(list)
+
+    DEFAULT_SELECTION = ('uniform', 'hamming', 'taylor', 'chebyshev')
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Amplitude Taper Comparison")
+        self.resize(1100, 600)
+
+        layout = QtWidgets.QHBoxLayout(self)
+
+        self.taper_list = QtWidgets.QListWidget(self)
+        self.taper_list.setMaximumWidth(180)
+        for name, (label, parameter) in TAPERS.items():
+            item = QtWidgets.QListWidgetItem(label if parameter is None else f"{label} ({parameter:g})")
+            item.setData(QtCore.Qt.UserRole, name)
+            item.setFlags(item.flags() | QtCore.Qt.ItemIsUserCheckable)
+            item.setCheckState(QtCore.Qt.Checked if name in self.DEFAULT_SELECTION else QtCore.Qt.Unchecked)
+            self.taper_list.addItem(item)
+        self.taper_list.itemChanged.connect(lambda _: self.selectionChanged.emit(self.selected_tapers()))
+        layout.addWidget(self.taper_list)
+
+        self.figure = Figure()
+        self.canvas = FigureCanvas(self.figure)
+        layout.addWidget(self.canvas, 1)
+
+    def selected_tapers(self):
+        return [self.taper_list.item(row).data(QtCore.Qt.UserRole) for row in range(self.taper_list.count())
+                if self.taper_list.item(row).checkState() == QtCore.Qt.Checked]
+
+    def show_comparison(self, tapers, comparison):
+        self.figure.clf()
+        if tapers:
+            BeamformingSimulator.draw_taper_comparison(self.figure, comparison, [TAPERS[name][0] for name in tapers])
+        self.canvas.draw_idle()
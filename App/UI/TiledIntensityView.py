@@ -0,0 +1,194 @@
+import math
+
+import numpy as np
+from matplotlib import colormaps
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from App.ResultCache import ResultCache
+from App.Tiles import TileCache, TileGrid, compute_tile, tile_state
+
+
+class TileSignals(QtCore.QObject):
+    finished = QtCore.pyqtSignal(object, object)  # (tile key, dB array)
+
+
+class TileJob(QtCore.QRunnable):
+    def __init__(self, tile_grid, state, key, dynamic_range_db):
+        super().__init__()
+        self.tile_grid = tile_grid
+        self.state = state
+        self.key = key
+        self.dynamic_range_db = dynamic_range_db
+        self.signals = TileSignals()
+
+    def run(self):
+        _, level, i, j = self.key
+        self.signals.finished.emit(self.key, compute_tile(self.tile_grid, self.state, level, i, j, self.dynamic_range_db))
+
+
+class TiledIntensityView(QtWidgets.QWidget):
+    def __init__(self, x_range=(-10, 10), y_range=(0, 10), parent=None):
+        """Pan (drag) and zoom (wheel) over the intensity map.
+
+        The visible region is covered by tiles at the zoom level matching the screen resolution. Missing tiles are computed
+        on a thread pool and painted as they arrive; until then the nearest cached coarser tile is stretched in their place.
+        """
+        super().__init__(parent)
+        self.setWindowTitle("Intensity Map (Pan / Zoom)")
+        self.resize(900, 600)
+        self.setMouseTracking(True)
+
+        self.tile_grid = TileGrid()
+        self.tile_cache = TileCache()
+        self.thread_pool = QtCore.QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max(QtCore.QThread.idealThreadCount() - 1, 1))
+        self.requested = set()
+
+        self.dynamic_range_db = 40.0
+        self.lut = colormaps['jet'](np.linspace(0, 1, 256), bytes=True)  # 256 x RGBA uint8
+
+        self.state = None
+        self.state_key = None
+
+        # View: world point at the widget centre and meters per screen pixel
+        self.center = ((x_range[0] + x_range[1]) / 2, (y_range[0] + y_range[1]) / 2)
+        self.meters_per_pixel = max((x_range[1] - x_range[0]) / self.width(), (y_range[1] - y_range[0]) / self.height())
+        self.drag_origin = None
+
+        self.status_label = QtWidgets.QLabel(self)
+        self.status_label.setStyleSheet("color: white; background-color: rgba(0, 0, 0, 120); padding: 3px;")
+        self.status_label.move(8, 8)
+
+    def set_model(self, model):
+        state_key = ResultCache.make_key({'frequency': model.frequency, 'steering_angle': model.steering_angle,
+                                          'arrays_info': model.arrays_info, 'precision': model.precision,
+                                          **({'coupling': True} if model.coupling else {}),
+                                          **({'phase_bits': model.phase_bits, 'phase_mode': model.phase_mode}
+                                             if model.phase_bits is not None else {})})
+        if state_key == self.state_key:
+            return
+        # Queued tiles belong to the previous state and are no longer wanted
+        self.thread_pool.clear()
+        self.requested.clear()
+        self.state = tile_state(model)
+        self.state_key = state_key
+        self.update()
+
+    # Coordinates ------------------------------------------------------------------------------------------------------------------------
+
+    def world_bounds(self):
+        half_width = self.width() * self.meters_per_pixel / 2
+        half_height = self.height() * self.meters_per_pixel / 2
+        return self.center[0] - half_width, self.center[0] + half_width, self.center[1] - half_height, self.center[1] + half_height
+
+    def to_screen(self, x, y):
+        # y grows upwards in the world and downwards on screen
+        x_min, _, _, y_max = self.world_bounds()
+        return (x - x_min) / self.meters_per_pixel, (y_max - y) / self.meters_per_pixel
+
+    def to_world(self, point):
+        x_min, _, _, y_max = self.world_bounds()
+        return x_min + point.x() * self.meters_per_pixel, y_max - point.y() * self.meters_per_pixel
+
+    def tile_rect(self, level, i, j):
+        x0, x1, y0, y1 = self.tile_grid.bounds(level, i, j)
+        left, top = self.to_screen(x0, y1)
+        right, bottom = self.to_screen(x1, y0)
+        return QtCore.QRectF(left, top, right - left, bottom - top)
+
+    # Tiles ------------------------------------------------------------------------------------------------------------------------------
+
+    def request_tile(self, tile):
+        key = (self.state_key, *tile)
+        if key in self.requested:
+            return
+        self.requested.add(key)
+        job = TileJob(self.tile_grid, self.state, key, self.dynamic_range_db)
+        job.signals.finished.connect(self.tile_finished)
+        self.thread_pool.start(job)
+
+    def tile_finished(self, key, tile_db):
+        self.requested.discard(key)
+        # Map dB onto the colormap; rows are flipped because image row 0 is the top of the tile
+        indices = np.clip((tile_db[::-1] + self.dynamic_range_db) / self.dynamic_range_db * 256, 0, 255).astype(np.uint8)
+        rgba = np.ascontiguousarray(self.lut[indices])
+        height, width = indices.shape
+        image = QtGui.QImage(rgba.data, width, height, width * 4, QtGui.QImage.Format_RGBA8888).copy()
+        self.tile_cache.put(key, image)
+        if key[0] == self.state_key:
+            _, level, i, j = key
+            self.update(self.tile_rect(level, i, j).toAlignedRect())
+
+    def fallback_tile(self, level, i, j):
+        # The nearest cached ancestor and the part of it covering this tile
+        for parent_level in range(level - 1, self.tile_grid.min_level - 1, -1):
+            scale = 2 ** (level - parent_level)
+            parent_i, parent_j = math.floor(i / scale), math.floor(j / scale)
+            image = self.tile_cache.get((self.state_key, parent_level, parent_i, parent_j))
+            if image is not None:
+                size = image.width() / scale
+                source = QtCore.QRectF((i - parent_i * scale) * size, (scale - 1 - (j - parent_j * scale)) * size, size, size)
+                return image, source
+        return None, None
+
+    # Qt events --------------------------------------------------------------------------------------------------------------------------
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        painter.fillRect(self.rect(), QtGui.QColor(26, 26, 64))
+        if self.state is None:
+            painter.end()
+            return
+
+        level = self.tile_grid.level_for(self.meters_per_pixel)
+        missing = 0
+        # Tiles beyond the cache's capacity would evict each other and be requested again on every repaint; the ones nearest the
+        # centre come first, so a window too large for the cache leaves its edges empty instead
+        for tile in self.tile_grid.visible_tiles(level, *self.world_bounds())[:self.tile_cache.capacity]:
+            target = self.tile_rect(*tile)
+            if not target.intersects(QtCore.QRectF(event.rect())):
+                continue
+            image = self.tile_cache.get((self.state_key, *tile))
+            if image is not None:
+                painter.drawImage(target, image)
+                continue
+
+            missing += 1
+            self.request_tile(tile)
+            fallback, source = self.fallback_tile(*tile)
+            if fallback is not None:
+                painter.drawImage(target, fallback, source)
+        painter.end()
+
+        self.status_label.setText(f"Zoom level {level} · {self.meters_per_pixel * 1000:.2f} mm/px"
+                                  + (f" · {missing} tiles loading" if missing else ""))
+        self.status_label.adjustSize()
+
+    def wheelEvent(self, event):
+        # Zoom about the cursor: the world point under it stays fixed
+        anchor = self.to_world(event.pos())
+        factor = 0.8 if event.angleDelta().y() > 0 else 1.25
+        minimum, maximum = self.tile_grid.meters_per_pixel_limits()
+        meters_per_pixel = min(max(self.meters_per_pixel * factor, minimum), maximum)
+        factor = meters_per_pixel / self.meters_per_pixel
+        self.meters_per_pixel = meters_per_pixel
+        self.center = (anchor[0] + (self.center[0] - anchor[0]) * factor, anchor[1] + (self.center[1] - anchor[1]) * factor)
+        self.update()
+
+    def mousePressEvent(self, event):
+        self.drag_origin = event.pos()
+
+    def mouseMoveEvent(self, event):
+        if self.drag_origin is None:
+            return
+        delta = event.pos() - self.drag_origin
+        self.drag_origin = event.pos()
+        self.center = (self.center[0] - delta.x() * self.meters_per_pixel, self.center[1] + delta.y() * self.meters_per_pixel)
+        self.update()
+
+    def mouseReleaseEvent(self, event):
+        self.drag_origin = None
+
+    def closeEvent(self, event):
+        self.thread_pool.clear()
+        super().closeEvent(event)
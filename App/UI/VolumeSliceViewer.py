@@ -0,0 +1,113 @@
+import numpy as np
+from PyQt5 import QtCore, QtWidgets
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+
+
+class VolumeSignals(QtCore.QObject):
+    finished = QtCore.pyqtSignal(str)  # Path of the written volume
+    failed = QtCore.pyqtSignal(str)  # Error message
+
+
+class VolumeJob(QtCore.QRunnable):
+    def __init__(self, model, x_range, y_range, z_range, shape, output_path):
+        # The model must not be shared with the GUI thread, which keeps changing its own while the job runs
+        super().__init__()
+        self.model = model
+        self.ranges = (x_range, y_range, z_range)
+        self.shape = shape
+        self.output_path = output_path
+        self.signals = VolumeSignals()
+
+    def run(self):
+        try:
+            self.model.simulate_volume(*self.ranges, self.shape, self.output_path)
+        except Exception as error:
+            self.signals.failed.emit(str(error))
+        else:
+            self.signals.finished.emit(self.output_path)
+
+
+class VolumeSliceViewer(QtWidgets.QWidget):
+    # Axis name -> (volume axis, horizontal label, vertical label); the volume is stored as (nz, ny, nx)
+    SLICE_AXES = {
+        'z': (0, 'Horizontal Position (meters)', 'Vertical Position (meters)'),
+        'y': (1, 'Horizontal Position (meters)', 'Elevation (meters)'),
+        'x': (2, 'Vertical Position (meters)', 'Elevation (meters)'),
+    }
+
+    def __init__(self, volume_path, x_range, y_range, z_range, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Volumetric Intensity")
+        self.resize(800, 650)
+
+        # Memory-mapped read-only: only the slice being displayed is ever read from disk
+        self.volume = np.load(volume_path, mmap_mode='r')
+        self.ranges = {'x': x_range, 'y': y_range, 'z': z_range}
+        self.current_axis = 'z'
+        self.image = None
+
+        layout = QtWidgets.QVBoxLayout(self)
+
+        self.figure = Figure()
+        self.canvas = FigureCanvas(self.figure)
+        layout.addWidget(self.canvas)
+
+        controls_layout = QtWidgets.QHBoxLayout()
+        self.axis_combobox = QtWidgets.QComboBox(self)
+        self.axis_combobox.addItems([f"{axis.upper()} Slices" for axis in self.SLICE_AXES])
+        self.axis_combobox.currentIndexChanged.connect(self.change_slice_axis)
+        controls_layout.addWidget(self.axis_combobox)
+
+        self.slice_slider = QtWidgets.QSlider(QtCore.Qt.Horizontal, self)
+        self.slice_slider.valueChanged.connect(self.show_slice)
+        controls_layout.addWidget(self.slice_slider)
+
+        self.slice_indicator = QtWidgets.QLabel(self)
+        self.slice_indicator.setMinimumWidth(120)
+        controls_layout.addWidget(self.slice_indicator)
+        layout.addLayout(controls_layout)
+
+        self.change_slice_axis(0)
+
+    def change_slice_axis(self, index):
+        self.current_axis = list(self.SLICE_AXES)[index]
+        volume_axis = self.SLICE_AXES[self.current_axis][0]
+        self.image = None  # Extent and labels differ per axis, so the image is rebuilt
+        self.slice_slider.blockSignals(True)
+        self.slice_slider.setRange(0, self.volume.shape[volume_axis] - 1)
+        self.slice_slider.setValue(self.volume.shape[volume_axis] // 2)
+        self.slice_slider.blockSignals(False)
+        self.show_slice(self.slice_slider.value())
+
+    def read_slice(self, index):
+        volume_axis = self.SLICE_AXES[self.current_axis][0]
+        return np.asarray(np.take(self.volume, index, axis=volume_axis))
+
+    def slice_extent(self):
+        if self.current_axis == 'z':
+            return [*self.ranges['x'], *self.ranges['y']]
+        if self.current_axis == 'y':
+            return [*self.ranges['x'], *self.ranges['z']]
+        return [*self.ranges['y'], *self.ranges['z']]
+
+    def show_slice(self, index):
+        data = self.read_slice(index)
+        low, high = self.ranges[self.current_axis]
+        count = self.volume.shape[self.SLICE_AXES[self.current_axis][0]]
+        position = low + (high - low) * index / max(count - 1, 1)
+        self.slice_indicator.setText(f"{self.current_axis} = {position:.2f} m")
+
+        if self.image is None:
+            self.figure.clf()
+            ax = self.figure.subplots()
+            self.image = ax.imshow(data, extent=self.slice_extent(), origin='lower', cmap='jet', aspect='auto', vmin=0, vmax=1)
+            _, horizontal_label, vertical_label = self.SLICE_AXES[self.current_axis]
+            ax.set_xlabel(horizontal_label)
+            ax.set_ylabel(vertical_label)
+            self.figure.colorbar(self.image, ax=ax, label='Normalized Intensity')
+        else:
+            self.image.set_data(data)
+        self.image.axes.set_title(f'Intensity Slice ({self.current_axis} = {position:.2f} m)')
+        self.canvas.draw_idle()
@@ -0,0 +1,101 @@
+import numpy as np
+
+
+class Workspace:
+    def __init__(self):
+        """Memory reused across simulator calls: element geometry and directivity, the coupling factorization, grid
+        coordinates, element gain maps, scratch buffers and angle trig tables.
+
+        The geometry and directivity are rebuilt only when the array configurations change, the coupling factorization
+        only when the element positions or wave number change, the grid arrays only when the grid changes, the gain maps
+        only when the directivity or grid changes and the sine table only when the angles change; scratch
+        buffers are handed out by name and reallocated only when the requested shape or dtype differs. A workspace is not
+        thread-safe, so each thread uses its own.
+        """
+        self.geometry_key = None
+        self.positions = self.amplitudes = None
+        self.directivity_key = self.element_directivity = None
+        self.gain_directivity = self.gains = None
+        self.coupling_key = self.coupling_positions = None
+        self.factorization = None
+        self.grid_key = None
+        self.x = self.y = self.X = self.Y = None
+        self.angles = None
+        self.angle_sines = None
+        self.buffers = {}
+        self.allocations = 0  # Buffers allocated so far, to check that steady-state calls allocate none
+
+    def geometry(self, arrays_info, build):
+        """(positions, amplitudes) of every element, shared read-only; build() computes them when arrays_info changed."""
+        key = tuple(tuple(sorted(info.items())) for info in arrays_info)
+        if key != self.geometry_key:
+            positions, amplitudes = build()
+            for array in (positions, amplitudes):
+                array.setflags(write=False)
+            self.positions, self.amplitudes = positions, amplitudes
+            self.geometry_key = key
+            self.allocations += 2
+        return self.positions, self.amplitudes
+
+    def directivity(self, arrays_info, build):
+        """ElementDirectivity of every element (None when all are isotropic); build() computes it when arrays_info changed."""
+        key = tuple(tuple(sorted(info.items())) for info in arrays_info)
+        if key != self.directivity_key:
+            self.element_directivity = build()
+            self.directivity_key = key
+            self.allocations += 1
+        return self.element_directivity
+
+    def coupling(self, positions, k, build):
+        """Factorization of the mutual-impedance matrix; build() computes it when the positions or wave number changed."""
+        if self.coupling_key != float(k) or self.coupling_positions is None or \
+                self.coupling_positions.shape != positions.shape or not np.array_equal(self.coupling_positions, positions):
+            self.factorization = build()
+            self.coupling_positions = np.array(positions)
+            self.coupling_key = float(k)
+            self.allocations += 3
+        return self.factorization
+
+    def grid(self, x_range, y_range, resolution):
+        """(x, y, X, Y) for the grid, shared read-only between calls."""
+        key = (float(x_range[0]), float(x_range[1]), float(y_range[0]), float(y_range[1]), int(resolution))
+        if key != self.grid_key:
+            x = np.linspace(x_range[0], x_range[1], resolution)
+            y = np.linspace(y_range[0], y_range[1], resolution)
+            X, Y = np.meshgrid(x, y)
+            for array in (x, y, X, Y):
+                array.setflags(write=False)
+            self.x, self.y, self.X, self.Y = x, y, X, Y
+            self.grid_key = key
+            self.buffers.clear()  # Scratch buffers are sized for the old grid
+            self.gain_directivity = self.gains = None  # And so are the gain maps
+            self.allocations += 4
+        return self.x, self.y, self.X, self.Y
+
+    def gain_maps(self, directivity, build):
+        """Gain maps of every element over the current grid, shared read-only; build() computes them when the directivity
+        or the grid changed."""
+        if directivity is not self.gain_directivity:
+            gains = build()
+            gains.setflags(write=False)
+            self.gains, self.gain_directivity = gains, directivity
+            self.allocations += 1
+        return self.gains
+
+    def sines(self, angles):
+        """sin(angles) for angles in degrees, recomputed only when the angles change."""
+        angles = np.asarray(angles, dtype=np.float64)
+        if self.angles is None or self.angles.shape != angles.shape or not np.array_equal(self.angles, angles):
+            self.angles = angles.copy()
+            self.angle_sines = np.sin(np.radians(angles))
+            self.angle_sines.setflags(write=False)
+            self.allocations += 2
+        return self.angle_sines
+
+    def buffer(self, name, shape, dtype):
+        """A scratch array; its contents are undefined and only valid until the next request for the same name."""
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.shape != tuple(shape) or buffer.dtype != dtype:
+            buffer = self.buffers[name] = np.empty(shape, dtype)
+            self.allocations += 1
+        return buffer
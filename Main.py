@@ -1,3 +1,4 @@
+import argparse
 import sys
 
 from PyQt5 import QtWidgets
@@ -6,8 +7,12 @@ from App.Controller import MainController
 
 
 def main():
-    app = QtWidgets.QApplication(sys.argv)
-    controller = MainController(app)
+    parser = argparse.ArgumentParser(description="Transmitter Beamforming Simulator")
+    parser.add_argument('--record-trace', metavar='PATH', help="Record every UI parameter event to this trace for App.TraceReplay")
+    arguments, qt_arguments = parser.parse_known_args()
+
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_arguments)
+    controller = MainController(app, trace_path=arguments.record_trace)
     sys.exit(controller.run())
 
 
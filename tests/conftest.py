@@ -0,0 +1,28 @@
+import os
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+@pytest.fixture(scope='session')
+def qt_app():
+    # Held for the whole session: widgets must not outlive the application object
+    from PyQt5 import QtWidgets
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+@pytest.fixture
+def controller(qt_app, tmp_path, monkeypatch):
+    """A MainController driven offscreen, as App.TraceReplay does, with its logs, caches and profiles under tmp_path."""
+    from App.Controller import MainController
+
+    monkeypatch.chdir(tmp_path)
+    controller = MainController(qt_app, cache_directory=str(tmp_path / "Cache"))
+    # Background prewarming would race the stages under test for the result cache
+    controller.prewarmer.stop()
+    yield controller
+    controller.thread_pool.waitForDone()
+    controller.prewarmer.thread.join(timeout=10)
+    controller.logging.close()
+    controller.main_window.close()
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from App.AdaptiveSampling import adaptive_angles, initial_sample_count
+from App.SimpleSimulation import BeamformingSimulator
+
+DENSE_SAMPLES = 200_001
+MIN_STEP = 1e-3
+
+
+def pattern(num_elements, spacing_wavelengths, steering_angle):
+    info = {'num_elements': num_elements, 'spacing': spacing_wavelengths * 0.1, 'curvature': 0}
+    model = BeamformingSimulator(3e9, steering_angle, [info])
+    positions = model.element_positions(info)
+    return positions, lambda angles: model.array_factor(positions, model.k, steering_angle, angles)
+
+
+def local_minima(values):
+    return np.flatnonzero((values[1:-1] < values[:-2]) & (values[1:-1] <= values[2:])) + 1
+
+
+@pytest.mark.parametrize('num_elements, spacing, steering_angle', [(16, 0.5, 0), (64, 0.5, 30), (64, 0.25, -45)])
+def test_adaptive_profile_matches_a_dense_grid_with_fewer_evaluations(num_elements, spacing, steering_angle):
+    positions, evaluate = pattern(num_elements, spacing, steering_angle)
+    evaluated = []
+    initial_samples = initial_sample_count(np.ptp(positions[:, 0]) / 0.1)
+    angles, values = adaptive_angles(lambda sample_angles: evaluated.append(len(sample_angles)) or evaluate(sample_angles), -90, 90,
+                                     initial_samples, tolerance_db=0.5, min_step=MIN_STEP)
+    assert np.all(np.diff(angles) > 0) and sum(evaluated) == len(angles) < DENSE_SAMPLES / 20
+
+    dense_angles = np.linspace(-90, 90, DENSE_SAMPLES)
+    dense = evaluate(dense_angles)
+    peak = dense.max()
+    dense_db = 10 * np.log10(np.maximum(dense / peak, 1e-30))
+    adaptive_db = 10 * np.log10(np.maximum(values / peak, 1e-30))
+
+    # Lobes: the profile drawn through the samples stays within about twice the per-interval tolerance
+    error = np.abs(np.interp(dense_angles, angles, adaptive_db) - dense_db)[dense_db > -30]
+    assert np.percentile(error, 99) < 1.0
+
+    # Nulls: each one of the reference has a sampled minimum next to it, and that minimum is deep
+    nulls = local_minima(dense_db)
+    sampled_nulls = local_minima(adaptive_db)
+    assert len(sampled_nulls) == len(nulls)
+    nearest = np.abs(angles[sampled_nulls][None, :] - dense_angles[nulls][:, None]).argmin(axis=1)
+    dense_step = 180 / (DENSE_SAMPLES - 1)
+    assert np.all(np.abs(angles[sampled_nulls][nearest] - dense_angles[nulls]) <= MIN_STEP + dense_step)
+    assert adaptive_db[sampled_nulls].max() < -60
+
+
+def test_initial_grid_has_four_samples_per_lobe_at_broadside():
+    for aperture_wavelengths in (2, 7.5, 32, 128):
+        samples = initial_sample_count(aperture_wavelengths)
+        step = np.pi / (samples - 1)
+        # Around broadside a lobe is 1 / aperture wide in sin(angle), and sin(angle) changes by about the step in radians
+        assert step <= 1 / (4 * aperture_wavelengths)
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from PyQt5.QtCore import QPointF, Qt
+from PyQt5.QtGui import QColor, QImage, QPainter, QPen
+
+from App.UI.ArrayVisualizationWidget import ArrayVisualizationWidget
+
+
+@pytest.fixture
+def widget(qt_app):
+    widget = ArrayVisualizationWidget()
+    widget.resize(600, 200)
+    yield widget
+    widget.close()
+
+
+def render(widget, draw):
+    image = QImage(widget.width(), widget.height(), QImage.Format_ARGB32)
+    image.fill(Qt.transparent)
+    painter = QPainter(image)
+    draw(painter)
+    painter.end()
+    pointer = image.constBits()
+    pointer.setsize(image.byteCount())
+    return np.frombuffer(pointer, np.uint8).reshape(image.height(), image.width(), 4).copy()
+
+
+def draw_elements(widget, painter):
+    # Reference: every element drawn as its own circle, as the widget did before arrays were cached
+    painter.setPen(QPen(QColor(0, 0, 0), 1))
+    painter.setBrush(QColor(255, 255, 255))
+    for index in range(len(widget.array_configs)):
+        for x, y in zip(*widget.elementPositions(index)):
+            painter.drawEllipse(QPointF(x, y), widget.element_size, widget.element_size)
+
+
+@pytest.mark.parametrize('configs', [[(10, 8, 0)], [(6, 16, 90), (2, 40, 0), (1, 64, 30)]], ids=['sparse', 'overlapping'])
+def test_cached_arrays_paint_like_individual_elements(widget, configs):
+    widget.element_size = 4  # Large enough for closely spaced elements to overlap
+    for spacing, num_elements, curvature in configs:
+        widget.addArray(spacing, num_elements, curvature)
+    cached = render(widget, widget.drawArrays)[..., 3] > 0
+    reference = render(widget, lambda painter: draw_elements(widget, painter))[..., 3] > 0
+    # A path and separate ellipses rasterize a 1-pixel circle slightly differently, so coverage is compared to within a pixel
+    assert np.all(cached <= dilated(reference)) and np.all(reference <= dilated(cached))
+    for index in range(len(configs)):
+        x, y = widget.elementPositions(index)
+        inside = (x >= 0) & (x < widget.width()) & (y >= 0) & (y < widget.height())
+        assert np.all(cached[y[inside], x[inside]])  # Every element is drawn, however much its neighbours overlap it
+
+
+def dilated(mask):
+    grown = mask.copy()
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            grown |= np.roll(np.roll(mask, dy, axis=0), dx, axis=1)
+    return grown
+
+
+def test_overlapping_elements_fill_solid(widget):
+    widget.element_size = 4
+    widget.addArray(4, 20, 0)  # Neighbours overlap, and the point between two of them lies inside exactly two circles
+    pixels = render(widget, widget.drawArrays)
+    x, y = widget.elementPositions(0)
+    between = pixels[y[:-1], (x[:-1] + x[1:]) // 2]
+    np.testing.assert_array_equal(between, np.full_like(between, 255))  # White fill, not an even-odd hole
+
+
+def test_geometry_is_cached_until_the_array_changes(widget):
+    widget.addArray(10, 8, 0)
+    widget.addArray(10, 8, 45)
+    first = [widget.arrayGeometry(index)[0].cacheKey() for index in range(2)]
+    assert [widget.arrayGeometry(index)[0].cacheKey() for index in range(2)] == first
+
+    widget.editArray(2, 10, 12, 45)
+    assert widget.arrayGeometry(0)[0].cacheKey() == first[0]
+    assert widget.arrayGeometry(1)[0].cacheKey() != first[1]
+
+    widget.resize(500, 200)  # The layout depends on the widget size
+    assert widget.arrayGeometry(0)[0].cacheKey() != first[0]
+
+
+def test_linear_positions(widget):
+    widget.addArray(10, 4, 0)
+    x, y = widget.elementPositions(0)
+    x_start, centre = widget.arrayOrigin(0)
+    np.testing.assert_array_equal(x, (x_start + 10 * np.arange(4)).astype(int))
+    assert set(y) == {int(centre)}
@@ -0,0 +1,43 @@
+import json
+
+from App.AutoTuner import DEFAULT_SETTINGS, AutoTuner, configuration_class
+from App.SimpleSimulation import BeamformingSimulator
+
+ARRAYS_INFO = [{'num_elements': 12, 'spacing': 0.05, 'curvature': 0}]
+RESOLUTION = 48
+
+
+def test_tune_keeps_the_fastest_candidate_within_tolerance_and_persists_it(tmp_path):
+    profile_path = str(tmp_path / "Profiles" / "Tuning.json")
+    model = BeamformingSimulator(3e9, 20, ARRAYS_INFO)
+    tuner = AutoTuner(profile_path, repeats=1)
+    tolerance = 0.05
+    entry, results = tuner.tune(model, (-10, 10), (0, 10), RESOLUTION, tolerance)
+
+    assert [result['ms'] for result in results] == sorted(result['ms'] for result in results)
+    chosen = results.index(next(result for result in results if result['settings'] == entry['settings']))
+    assert entry['error'] <= tolerance
+    assert all(result['error'] > tolerance for result in results[:chosen])
+    # The exact computation is its own reference, and the coarser grids are measured after resampling onto it
+    assert next(result for result in results if result['settings'] == DEFAULT_SETTINGS)['error'] == 0
+    assert all(0 < result['error'] <= 1 for result in results if result['settings']['grid_scale'] < 1)
+
+    reloaded = AutoTuner(profile_path)
+    assert reloaded.lookup(ARRAYS_INFO, RESOLUTION) == entry['settings']
+    assert reloaded.lookup(ARRAYS_INFO, RESOLUTION * 2) == DEFAULT_SETTINGS  # Another configuration class
+    assert configuration_class([dict(ARRAYS_INFO[0], num_elements=16)], RESOLUTION) == configuration_class(ARRAYS_INFO, RESOLUTION)
+
+
+def test_a_zero_tolerance_keeps_the_exact_settings(tmp_path):
+    model = BeamformingSimulator(3e9, 0, ARRAYS_INFO)
+    entry, _ = AutoTuner(str(tmp_path / "Tuning.json"), repeats=1).tune(model, (-10, 10), (0, 10), RESOLUTION, 0.0)
+    assert entry['error'] == 0
+    assert (entry['settings']['grid_scale'], entry['settings']['precision'], entry['settings']['far_field']) == (1.0, 'float64', False)
+
+
+def test_profiles_from_another_machine_are_ignored(tmp_path):
+    profile_path = tmp_path / "Tuning.json"
+    settings = dict(DEFAULT_SETTINGS, precision='float32')
+    profile_path.write_text(json.dumps({'machine': {'node': 'elsewhere'},
+                                        'classes': {configuration_class(ARRAYS_INFO, RESOLUTION): {'settings': settings}}}))
+    assert AutoTuner(str(profile_path)).lookup(ARRAYS_INFO, RESOLUTION) == DEFAULT_SETTINGS
@@ -0,0 +1,48 @@
+import numpy as np
+
+from App.Coverage import FINE_BIN_DB, FOCAL_THRESHOLD_DB, contiguous_span, coverage_statistics
+from App.SimpleSimulation import BeamformingSimulator
+
+X_RANGE, Y_RANGE, SHAPE = (-4, 4), (0.2, 5), (240, 150)
+
+
+def dense_levels(model):
+    # The whole grid at once, normalized by its own peak
+    x = np.linspace(*X_RANGE, SHAPE[0])
+    y = np.linspace(*Y_RANGE, SHAPE[1])
+    X, Y = np.meshgrid(x, y)
+    positions, amplitudes = model.geometry()
+    steering_angle, currents = model.excitation(positions, amplitudes)
+    intensity = np.abs(model.unbatched_field(positions, X, Y, model.k, steering_angle, model.precision, currents,
+                                             directivity=model.directivity())) ** 2
+    return x, y, intensity / intensity.max()
+
+
+def test_streamed_statistics_match_a_dense_grid():
+    model = BeamformingSimulator(3e9, 20.0, [{'num_elements': 16, 'spacing': 0.05, 'curvature': 10}] * 2)
+    thresholds = (-3, -10, -20)
+    # Blocks of a few rows, so the statistics are merged across many of them
+    statistics = coverage_statistics(model, X_RANGE, Y_RANGE, SHAPE, thresholds, floor_db=-40, bin_db=2.0, block_points=1000)
+    x, y, intensity = dense_levels(model)
+    levels_db = 10 * np.log10(np.maximum(intensity, np.finfo(np.float64).tiny))
+
+    def near(level_db):
+        # Points the fine binning may put on either side of level_db
+        return np.count_nonzero(np.abs(levels_db - level_db) <= 2 * FINE_BIN_DB)
+
+    cell_area = statistics['cell_area']
+    for threshold in thresholds:
+        expected = np.count_nonzero(levels_db >= threshold) * cell_area
+        assert abs(statistics['area_above'][float(threshold)] - expected) <= near(threshold) * cell_area + 1e-12
+
+    for edge, fraction in zip(statistics['bin_edges_db'][:-1], statistics['cdf'][:-1]):
+        assert abs(fraction * intensity.size - np.count_nonzero(levels_db < edge)) <= near(edge)
+    assert statistics['histogram'].sum() + statistics['below_floor'] == intensity.size
+
+    row, column = np.unravel_index(intensity.argmax(), intensity.shape)
+    assert (statistics['peak']['x'], statistics['peak']['y']) == (x[column], y[row])
+    focal = intensity >= 10 ** (FOCAL_THRESHOLD_DB / 10)
+    left, right = contiguous_span(focal.any(axis=0), column)
+    bottom, top = contiguous_span(focal.any(axis=1), row)
+    assert np.isclose(statistics['focal_region']['width'], (right - left) * (x[1] - x[0]))
+    assert np.isclose(statistics['focal_region']['height'], (top - bottom) * (y[1] - y[0]))
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from App.Directivity import TABLE_SIZE, ElementDirectivity, pattern_table, table_gains
+
+TABLE_ANGLES = np.linspace(0, 180, TABLE_SIZE)
+
+
+def test_table_gains_interpolate_each_elements_own_table():
+    tables = np.stack([pattern_table('cosine', 1), pattern_table('cosine', 3), pattern_table('tabulated', [(0, 0), (90, -20), (180, -40)])])
+    rows = np.array([2, 0, 1, 2, 1])
+    off_boresight = np.random.default_rng(5).uniform(0, 180, size=(5, 200))
+    off_boresight[:, :3] = [0.0, 0.05, 180.0]  # A table sample, a point between samples and the last sample
+
+    gains = table_gains(tables, rows, off_boresight)
+    for row, angles, element_gains in zip(rows, off_boresight, gains):
+        np.testing.assert_allclose(element_gains, np.interp(angles, TABLE_ANGLES, tables[row]), atol=1e-15)
+
+
+def test_cosine_elements_follow_their_boresight():
+    directivity = ElementDirectivity([0.0, 30.0], np.stack([pattern_table('cosine', 2)]), [0, 0])
+    positions = np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0]])
+    angles = np.array([-60.0, -10.0, 0.0, 25.0, 89.0, 120.0])
+    # Grid points 5 m from each element, at the angles (from +y towards +x) seen from the first element
+    X, Y = 5 * np.sin(np.radians(angles)), 5 * np.cos(np.radians(angles))
+
+    gains = directivity.field_gains(positions, X, Y)
+    np.testing.assert_allclose(gains[0], np.maximum(np.cos(np.radians(angles)), 0) ** 2, atol=1e-6)
+    second = np.degrees(np.arctan2(X - 1.0, Y)) - 30.0
+    np.testing.assert_allclose(gains[1], np.maximum(np.cos(np.radians(second)), 0) ** 2, atol=1e-6)
+
+    profile = directivity.profile_gains(angles)
+    np.testing.assert_allclose(profile, np.maximum(np.cos(np.radians(angles[None, :] - [[0.0], [30.0]])), 0) ** 2, atol=1e-6)
+
+
+def test_tabulated_patterns_interpolate_in_db_and_hold_beyond_the_last_sample():
+    table = pattern_table('tabulated', [(60, -12), (0, 0), (30, -6)])
+    np.testing.assert_allclose(table[[0, 150, 300, 450, 600, 1800]], 10 ** (np.array([0, -3, -6, -9, -12, -12]) / 20))
+    assert not table.flags.writeable
+    with pytest.raises(ValueError):
+        pattern_table('tabulated', [(0, 0), (200, -3)])
+    with pytest.raises(ValueError):
+        pattern_table('dipole')
@@ -0,0 +1,40 @@
+import numpy as np
+from matplotlib.image import imread
+from PIL import Image
+
+from App.Exporter import compute_frame_scene, export_scene, export_sweep, render_frame
+
+PARAMETERS = {'frequency': 3e9, 'steering_angle': 0, 'arrays_info': [{'num_elements': 8, 'spacing': 0.05, 'curvature': 0}]}
+SIZE = (300, 150)
+
+
+def rgb(frame_bytes):
+    return np.frombuffer(frame_bytes, dtype=np.uint8).reshape(SIZE[1], SIZE[0], 3)
+
+
+def test_export_scene_writes_png_and_svg(tmp_path):
+    scene = compute_frame_scene(PARAMETERS, 'steering', 20)
+    png = export_scene(scene, str(tmp_path / "Figures" / "scene.png"), width=SIZE[0], height=SIZE[1])
+    svg = export_scene(scene, str(tmp_path / "Figures" / "scene.svg"), kind='beam', width=SIZE[0], height=SIZE[1])
+
+    assert imread(png).shape[:2] == (SIZE[1], SIZE[0])
+    with open(svg) as figure:
+        assert figure.read().rstrip().endswith('</svg>')
+
+
+def test_parallel_sweep_matches_frames_rendered_in_order(tmp_path):
+    values = [-40, 0, 25, 60]
+    assert export_sweep(PARAMETERS, 'steering', values, str(tmp_path / "Sweep" / "frame.png"), width=SIZE[0], height=SIZE[1],
+                        workers=2) == len(values)
+
+    for index, value in enumerate(values):
+        frame = np.asarray(Image.open(tmp_path / "Sweep" / f"frame_{index:04d}.png").convert('RGB'))
+        np.testing.assert_array_equal(frame, rgb(render_frame((PARAMETERS, 'steering', value, 'both', SIZE, None))))
+
+
+def test_time_sweep_repeats_every_half_period():
+    # The frames show Re(field e^{-2i pi t})^2, which is the same at t and t + 1/2
+    first = compute_frame_scene(PARAMETERS, 'time', 0.1)['intensity']
+    later = compute_frame_scene(PARAMETERS, 'time', 0.6)['intensity']
+    np.testing.assert_allclose(later, first, atol=1e-12)
+    assert not np.allclose(compute_frame_scene(PARAMETERS, 'time', 0.35)['intensity'], first)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from App.SimpleSimulation import BeamformingSimulator
+
+ARRAYS = [{'num_elements': 12, 'spacing': 0.05, 'curvature': 0, 'taper': 'hamming'},
+          {'num_elements': 8, 'spacing': 0.05, 'curvature': 30}]
+X_RANGE, Y_RANGE, RESOLUTION = (-3, 3), (0.5, 6), 40
+
+# name -> (array keys, simulator options, tolerance); quantized maps read propagation phasors from the lookup table
+CASES = {
+    'plain': ({}, {}, 1e-9),
+    'coupling': ({}, {'coupling': True}, 1e-9),
+    'phase_bits': ({}, {'phase_bits': 2}, 2e-3),
+    'directivity': ({'element_pattern': 'cosine', 'pattern_parameter': 2}, {}, 1e-9),
+}
+
+
+def model_for(case, steering_angle=25.0):
+    keys, options, _ = CASES[case]
+    return BeamformingSimulator(3e9, steering_angle, [dict(info, **keys) for info in ARRAYS], **options)
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_probe_matches_the_map(case):
+    model = model_for(case)
+    x, y, intensity = model.simulate_multiple_arrays(X_RANGE, Y_RANGE, RESOLUTION)
+    X, Y = np.meshgrid(x, y)
+    _, probed = model.probe_field(np.column_stack([X.ravel(), Y.ravel()]))
+    # The probe is relative to a coherent sum rather than the map's peak, so compare the shapes
+    np.testing.assert_allclose(probed.reshape(X.shape) / probed.max(), intensity, atol=CASES[case][2])
+
+
+@pytest.mark.parametrize('max_basis_entries', [8_000_000, 0], ids=['basis', 'element loop'])
+@pytest.mark.parametrize('case', CASES)
+def test_steering_batch_matches_the_map(case, max_basis_entries):
+    steering_angles = [-40.0, 0.0, 25.0]
+    _, _, batch = model_for(case).simulate_steering_batch(X_RANGE, Y_RANGE, RESOLUTION, steering_angles, max_basis_entries)
+    for steering_angle, intensity in zip(steering_angles, batch):
+        _, _, expected = model_for(case, steering_angle).simulate_multiple_arrays(X_RANGE, Y_RANGE, RESOLUTION)
+        np.testing.assert_allclose(intensity, expected, atol=CASES[case][2])
+
+
+@pytest.mark.parametrize('max_block_entries', [1, 7 * 20, 4_000_000], ids=['one point', 'seven points', 'one block'])
+def test_probe_evaluates_scattered_points(max_block_entries):
+    model = model_for('plain')
+    points = np.random.default_rng(3).uniform((-8, 0.1), (8, 9), size=(57, 2))
+    field, intensity = model.probe_field(points, max_block_entries)
+
+    positions, amplitudes = model.all_element_positions(), model.all_element_amplitudes()
+    expected = BeamformingSimulator.direct_field(positions, points[:, 0], points[:, 1], model.k, model.steering_angle, amplitudes=amplitudes)
+    np.testing.assert_allclose(field, expected, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(intensity, np.abs(expected) ** 2 / amplitudes.sum() ** 2, rtol=1e-12, atol=1e-15)
+
+
+def test_probe_rejects_points_that_are_not_pairs():
+    with pytest.raises(ValueError):
+        model_for('plain').probe_field(np.zeros((4, 3)))
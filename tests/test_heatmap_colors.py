@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from matplotlib import colormaps
+
+
+@pytest.fixture
+def heatmap(qt_app):
+    from App.UI.HeatmapWidget import HeatmapWidget
+
+    return HeatmapWidget()
+
+
+def rendered_rgb(heatmap):
+    # Format_RGB32 words are 0xffRRGGBB, so little-endian memory holds B, G, R, 255. Rows come back in intensity order
+    order = [2, 1, 0] if np.little_endian else [1, 2, 3]
+    return heatmap.pixels[::-1, :, order]
+
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_linear_colors_match_matplotlib(heatmap, dtype):
+    intensity = np.random.default_rng(0).random((64, 80)).astype(dtype)
+    intensity[0, :2] = 0, 1
+    heatmap.set_intensity(np.arange(80), np.arange(64), intensity)
+
+    np.testing.assert_array_equal(rendered_rgb(heatmap), colormaps['jet'](intensity, bytes=True)[..., :3])
+
+
+def test_decibel_colors_match_matplotlib(heatmap):
+    intensity = 10 ** np.random.default_rng(1).uniform(-6, 0, (64, 80))
+    heatmap.set_intensity(np.arange(80), np.arange(64), intensity)
+    heatmap.set_scale('db')
+
+    levels = np.clip(10 * np.log10(intensity), -heatmap.dynamic_range_db, 0) / heatmap.dynamic_range_db + 1
+    np.testing.assert_array_equal(rendered_rgb(heatmap), colormaps['jet'](levels, bytes=True)[..., :3])
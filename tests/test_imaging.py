@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from App.Imaging import DelayAndSumImager
+from App.SimpleSimulation import BeamformingSimulator
+
+WAVELENGTH = 3e8 / 5e6
+
+
+def model_for(curvature, **keys):
+    return BeamformingSimulator(5e6, 0, [dict({'num_elements': 32, 'spacing': 0.5 * WAVELENGTH, 'curvature': curvature}, **keys)])
+
+
+def reference_image(imager, rf, apodization):
+    # Delay-and-sum written out per pixel: interpolate each channel's baseband signal at the two-way delay, rotate back
+    # to the carrier and sum over channels with the apodization
+    analytic = np.fft.ifft(np.fft.fft(rf.astype(np.float64), axis=0) * imager.spectrum_weights, axis=0)
+    baseband = analytic * np.exp(-2j * np.pi * imager.frequency * imager.time)[:, None]
+    image = np.zeros((len(imager.y), len(imager.x)))
+    for row, py in enumerate(imager.y):
+        for column, px in enumerate(imager.x):
+            transmit = np.hypot(px - imager.source[0], py - imager.source[1])
+            delays = (transmit + np.hypot(px - imager.positions[:, 0], py - imager.positions[:, 1])) / imager.speed
+            samples = [np.interp(delay, imager.time, channel.real) + 1j * np.interp(delay, imager.time, channel.imag)
+                       for delay, channel in zip(delays, baseband.T)]
+            image[row, column] = abs(np.sum(apodization * np.array(samples) * np.exp(2j * np.pi * imager.frequency * delays)))
+    return image / image.max()
+
+
+@pytest.mark.parametrize('curvature', [0, 180])
+def test_image_peaks_at_each_scatterer(curvature):
+    imager = DelayAndSumImager.from_model(model_for(curvature), pixels_per_wavelength=2)
+    scatterers = np.array([[imager.x[20], imager.y[25], 1.0], [imager.x[60], imager.y[55], 0.5]])
+    envelope = imager.beamform(imager.synthesize(scatterers))
+
+    for x, y, amplitude in scatterers:
+        # The brightest pixel within two wavelengths of a scatterer is the scatterer itself, as bright as its echo
+        near = (np.abs(imager.x - x) <= 2 * WAVELENGTH)[None, :] & (np.abs(imager.y - y) <= 2 * WAVELENGTH)[:, None]
+        row, column = np.unravel_index(np.argmax(np.where(near, envelope, 0)), envelope.shape)
+        assert (imager.x[column], imager.y[row]) == (x, y)
+        assert envelope[row, column] == pytest.approx(amplitude, abs=0.05)
+
+
+def test_delay_table_matches_per_pixel_delay_and_sum():
+    model = model_for(0, taper='hamming')
+    region = DelayAndSumImager.from_model(model, pixels_per_wavelength=2)
+    positions, apodization = model.geometry()
+    imager = DelayAndSumImager(positions, model.frequency, region.speed, region.x[::8], region.y[::8], apodization)
+
+    rf = imager.synthesize([[imager.x[4], imager.y[5], 1.0], [imager.x[7], imager.y[2], 0.7]], noise=0.05, rng=np.random.default_rng(1))
+    first = imager.beamform(rf)
+    np.testing.assert_allclose(first, reference_image(imager, rf, apodization), atol=2e-4)
+    np.testing.assert_array_equal(imager.beamform(rf), first)  # Reused buffers give the same frame again
@@ -0,0 +1,58 @@
+import gc
+import json
+import time
+import weakref
+
+from App.Logging_Manager import LoggingManager
+
+
+def messages(manager):
+    with open(manager.log_file, encoding='utf-8') as log_file:
+        return [line.split(' - ', 2)[2].rstrip('\n') for line in log_file]
+
+
+def test_rate_limited_source_logs_its_first_and_last_message(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = LoggingManager(rate_limit_interval=0.2)
+    for value in range(5):
+        manager.log(f"Steering angle {value}", source='steering_angle')
+    manager.log("Unrelated message")
+    time.sleep(0.4)  # The trailing message is emitted when the interval expires, without waiting for close
+    manager.log("Steering angle 5", source='steering_angle')
+    manager.close()
+    assert messages(manager) == ["Steering angle 0", "Unrelated message", "Steering angle 4 (3 similar messages suppressed)",
+                                 "Steering angle 5"]
+
+
+def test_close_flushes_the_pending_message(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = LoggingManager(rate_limit_interval=60)
+    manager.log("Curvature 10", source='curvature')
+    manager.log("Curvature 20", source='curvature')
+    manager.close()
+    manager.close()
+    assert messages(manager) == ["Curvature 10", "Curvature 20"]
+
+
+def test_events_go_to_the_json_lines_file_only(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = LoggingManager()
+    manager.log("Application Opened")
+    manager.log_event('pipeline_run', total_ms=1.5, stages=[{'stage': 'field', 'status': 'ran'}])
+    manager.close()
+    with open(manager.performance_log_file, encoding='utf-8') as events_file:
+        events = [json.loads(line) for line in events_file]
+    assert [(event['event'], event['total_ms'], event['stages']) for event in events] == [
+        ('pipeline_run', 1.5, [{'stage': 'field', 'status': 'ran'}])]
+    assert messages(manager) == ["Application Opened"]
+
+
+def test_closed_manager_is_released(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = LoggingManager()
+    manager.log("Application Closed")
+    manager.close()
+    released = weakref.ref(manager)
+    del manager
+    gc.collect()
+    assert released() is None
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from App.MultiBeam import PROFILE_ANGLES, MultiBeamField
+from App.SimpleSimulation import BeamformingSimulator
+
+UPDATES = [
+    [(-30, 1.0), (10, 0.5), (45, 0.25)],
+    [(-30, 1.0), (20, 0.5), (45, 0.25)],  # One beam moves
+    [(-30, 1.0), (20, 0.5), (45, 1.0)],  # One beam changes power
+    [(-25, 0.2), (20, 0.5), (50, 1.0)],  # Two beams change
+    [(-25, 0.2), (20, 0.5)],  # A beam is removed
+]
+
+
+def bound_field(model, x, y, with_basis):
+    X, Y = np.meshgrid(x, y)
+    positions, amplitudes = model.all_element_positions(), model.all_element_amplitudes()
+    basis = BeamformingSimulator.element_basis(positions, X, Y, model.k) if with_basis else None
+    field = MultiBeamField()
+    field.bind(positions, amplitudes, model.k, {'x': x, 'y': y, 'X': X, 'Y': Y}, basis, profile_elements=len(positions), chunk_size=500)
+    return field
+
+
+@pytest.mark.parametrize('with_basis', [True, False])
+def test_incremental_updates_match_each_beam_computed_from_scratch(with_basis):
+    model = BeamformingSimulator(3e9, 0, [{'num_elements': 10, 'spacing': 0.05, 'curvature': 0},
+                                          {'num_elements': 6, 'spacing': 0.05, 'curvature': 20}])
+    x, y = np.linspace(-5, 5, 40), np.linspace(0, 5, 30)
+    X, Y = np.meshgrid(x, y)
+    positions, amplitudes = model.all_element_positions(), model.all_element_amplitudes()
+    field = bound_field(model, x, y, with_basis)
+
+    expected_changes = [[0, 1, 2], [1], [2], [0, 2], [0, 1]]
+    for beams, expected_changed in zip(UPDATES, expected_changes):
+        assert field.update(beams) == expected_changed
+        assert field.recomputed == len(expected_changed)
+
+        # By linearity the combined field is the sum of the fields each beam would produce on its own
+        fields = [np.sqrt(power) * BeamformingSimulator.direct_field(positions, X, Y, model.k, angle, amplitudes=amplitudes)
+                  for angle, power in beams]
+        combined = np.sum(fields, axis=0)
+        peak = np.abs(combined).max() ** 2
+        result = field.result()
+        np.testing.assert_allclose(result['intensity'], np.abs(combined) ** 2 / peak, atol=1e-9)
+        np.testing.assert_allclose(result['beam_intensities'], np.abs(fields) ** 2 / peak, atol=1e-9)
+        np.testing.assert_array_equal(result['dominant_beam'], np.argmax(np.abs(fields), axis=0))
+
+        profiles = [np.sqrt(power) * BeamformingSimulator.steering_weights(positions, model.k, angle, amplitudes)
+                    @ np.exp(1j * model.k * np.outer(positions[:, 0], np.sin(np.radians(PROFILE_ANGLES)))) for angle, power in beams]
+        array_factor = np.abs(np.sum(profiles, axis=0)) ** 2
+        np.testing.assert_allclose(result['array_factor'], array_factor / array_factor.max(), atol=1e-9)
+
+    assert field.update(UPDATES[-1]) == []
+
+
+def test_binding_a_new_geometry_drops_every_beam():
+    x, y = np.linspace(-5, 5, 20), np.linspace(0, 5, 10)
+    model = BeamformingSimulator(3e9, 0, [{'num_elements': 8, 'spacing': 0.05, 'curvature': 0}])
+    field = bound_field(model, x, y, True)
+    field.update(UPDATES[0])
+    bound = field.bound
+    field.bind(*bound[0][:2], field.k, bound[0][2], bound[0][3], profile_elements=8, chunk_size=500)
+    assert field.update(UPDATES[0]) == []  # The same inputs keep the rows
+
+    model.update_operating_frequency(2.5e9)
+    field.bind(model.all_element_positions(), model.all_element_amplitudes(), model.k, bound[0][2], None, profile_elements=8)
+    assert field.update(UPDATES[0]) == [0, 1, 2]
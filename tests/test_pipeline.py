@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from App.Pipeline import Pipeline
+from App.SimpleSimulation import BeamformingSimulator
+
+# Stages that depend only on the array geometry, the grid and the element patterns
+GEOMETRY_STAGES = {'geometry', 'positions', 'distances', 'directivity', 'element_angles', 'element_gains', 'propagation', 'coupling_factorization'}
+
+
+def stages_run(controller):
+    return {name for name, status, _ in controller.pipeline.run_log if status == 'ran'}
+
+
+def steer(controller, angle):
+    controller.view.steering_angle_slider.setValue(angle)
+    controller.update_steering_angle()
+
+
+def test_taper_change_reuses_geometry_stages(controller):
+    controller.view.element_pattern_combobox.setCurrentIndex(2)  # Directive elements, so the gain maps are cached as well
+    controller.view.taper_combobox.setCurrentIndex(2)
+
+    ran = stages_run(controller)
+    assert {'amplitudes', 'phases', 'field'} <= ran
+    assert not ran & GEOMETRY_STAGES
+
+
+def test_steering_change_reruns_only_the_weights_and_field(controller):
+    controller.view.element_pattern_combobox.setCurrentIndex(2)
+    steer(controller, 20)
+
+    assert stages_run(controller) == {'phases', 'field', 'normalization', 'array_factor', 'scene', 'heatmap_plot', 'beam_plot'}
+
+
+def test_pipeline_map_matches_the_model(controller):
+    controller.view.element_pattern_combobox.setCurrentIndex(2)
+    controller.view.taper_combobox.setCurrentIndex(2)
+    controller.view.coupling_button.setChecked(True)
+    steer(controller, 25)
+
+    scene = controller.pipeline.run(['scene'])['scene']
+    model = BeamformingSimulator(controller.model.frequency, 25, controller.configurations, coupling=True)
+    _, _, intensity = model.simulate_multiple_arrays(controller.X_RANGE, controller.Y_RANGE, controller.RESOLUTION)
+    np.testing.assert_allclose(scene['intensity'], intensity, atol=1e-9)
+
+
+def diamond(calls):
+    # a <- x; b <- a, y; c <- a; d <- b, c
+    def stage(name, function):
+        return lambda inputs: calls.append(name) or function(inputs)
+
+    pipeline = Pipeline()
+    pipeline.add_stage('a', stage('a', lambda inputs: inputs['x'] * 2), params=['x'])
+    pipeline.add_stage('b', stage('b', lambda inputs: inputs['a'] + inputs['y']), params=['y'], dependencies=['a'])
+    pipeline.add_stage('c', stage('c', lambda inputs: -inputs['a']), dependencies=['a'])
+    pipeline.add_stage('d', stage('d', lambda inputs: (inputs['b'], inputs['c'])), dependencies=['b', 'c'])
+    return pipeline
+
+
+def test_a_parameter_change_reruns_exactly_the_stages_downstream_of_it():
+    calls = []
+    pipeline = diamond(calls)
+    pipeline.set_params(x=np.arange(3.0), y=1.0)
+    first = pipeline.run(['d'])['d']
+    assert sorted(calls) == ['a', 'b', 'c', 'd']
+
+    calls.clear()
+    pipeline.set_params(y=2.0)
+    np.testing.assert_array_equal(pipeline.run(['d'])['d'][0], first[0] + 1)
+    assert sorted(calls) == ['b', 'd']
+    assert {name for name, status, _ in pipeline.run_log if status == 'reused'} == {'a', 'c'}
+
+    # Arrays are compared by content, so an equal copy changes nothing
+    calls.clear()
+    pipeline.set_params(x=np.arange(3.0))
+    pipeline.run(['d'])
+    assert calls == []
+
+    pipeline.set_params(x=np.arange(4.0))
+    pipeline.run(['d'])
+    assert sorted(calls) == ['a', 'b', 'c', 'd']
+
+
+def test_dependencies_are_only_computed_when_read():
+    calls = []
+    pipeline = Pipeline()
+    pipeline.add_stage('expensive', lambda inputs: calls.append('expensive') or 1.0)
+    pipeline.add_stage('choice', lambda inputs: inputs['expensive'] if inputs['use'] else 0.0, params=['use'], dependencies=['expensive'])
+    pipeline.set_params(use=False)
+    assert pipeline.run(['choice'])['choice'] == 0.0 and calls == []
+    pipeline.set_params(use=True)
+    assert pipeline.run(['choice'])['choice'] == 1.0 and calls == ['expensive']
+
+
+def test_undeclared_inputs_and_unknown_dependencies_are_errors():
+    pipeline = Pipeline()
+    with pytest.raises(ValueError):
+        pipeline.add_stage('b', lambda inputs: None, dependencies=['a'])
+    pipeline.add_stage('a', lambda inputs: inputs['x'])
+    pipeline.set_params(x=1)
+    with pytest.raises(KeyError):
+        pipeline.run(['a'])
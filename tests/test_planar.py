@@ -0,0 +1,37 @@
+import numpy as np
+
+from App.SimpleSimulation import BeamformingSimulator
+
+
+def positions(**array_info):
+    return BeamformingSimulator(3e9, 0, [array_info]).element_positions(array_info)
+
+
+def test_linear_rows_are_stacked_along_z_around_the_array_centre():
+    expected = [(-0.5, 0, -0.25), (0, 0, -0.25), (0.5, 0, -0.25),
+                (-0.5, 0, 0.25), (0, 0, 0.25), (0.5, 0, 0.25)]
+    np.testing.assert_allclose(positions(num_elements=3, spacing=0.5, curvature=0, rows=2), expected, atol=1e-12)
+
+
+def test_row_spacing_is_independent_of_element_spacing():
+    z = positions(num_elements=2, spacing=0.5, curvature=0, rows=3, row_spacing=0.3)[:, 2]
+    np.testing.assert_allclose(z, [-0.3, -0.3, 0, 0, 0.3, 0.3], atol=1e-12)
+
+
+def test_curved_rows_repeat_the_arc():
+    # 60 degrees over two gaps of 1 m: the chord of 30 degrees is 1 m, so the radius is 1 / (2 sin 15 degrees)
+    radius = 1 / (2 * np.sin(np.radians(15)))
+    arc = [(radius * np.cos(np.radians(-30)) + radius, -radius / 2), (2 * radius, 0), (radius * np.cos(np.radians(30)) + radius, radius / 2)]
+    expected = [(x, y, z) for z in (-0.5, 0.5) for x, y in arc]
+    np.testing.assert_allclose(positions(num_elements=3, spacing=1.0, curvature=60, rows=2), expected, atol=1e-12)
+
+
+def test_rows_control_makes_the_arrays_planar(controller):
+    controller.view.rows_SpinBox.setValue(4)
+    assert all(info['rows'] == 4 for info in controller.configurations)
+    elements = controller.view.current_elements_number * controller.view.current_arrays_number
+    z = controller.model.all_element_positions()[:, 2]
+    assert len(z) == 4 * elements and len(np.unique(np.round(z, 12))) == 4
+
+    controller.view.rows_SpinBox.setValue(1)
+    assert not any('rows' in info for info in controller.configurations)
@@ -0,0 +1,92 @@
+import threading
+import time
+
+from App.Prewarmer import Prewarmer
+from App.ResultCache import ResultCache
+
+ANGLES = {'start': -90, 'stop': 90, 'tolerance_db': 0.5}
+
+
+class RecordingPrewarmer(Prewarmer):
+    def __init__(self, *args, **kwargs):
+        self.checkpoints = 0
+        self.started = threading.Event()
+        super().__init__(*args, **kwargs)
+
+    def checkpoint(self):
+        self.checkpoints += 1
+        self.started.set()
+        super().checkpoint()
+
+
+def schedule(prewarmer, steering_angle, resolution=50, elements=16):
+    prewarmer.schedule(Prewarmer.PRESET_PRIORITY, f"steering {steering_angle}", 3e9, steering_angle,
+                       [{'num_elements': elements, 'spacing': 0.05, 'curvature': 0}], (-10, 10), (0, 10), resolution, ANGLES)
+
+
+def wait_until(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_memory_cap_covers_queued_jobs_and_stored_results(tmp_path):
+    cache = ResultCache(str(tmp_path / "Cache"))
+    estimate = Prewarmer.estimate_job_bytes(None, 50, ANGLES)
+    prewarmer = Prewarmer(cache, memory_cap_bytes=int(2.5 * estimate))
+    prewarmer.pause()
+    try:
+        for steering_angle in (0, 10, 20):
+            schedule(prewarmer, steering_angle)
+        assert len(prewarmer.pending) == 2 and prewarmer.pending_bytes == 2 * estimate
+
+        prewarmer.resume()
+        wait_until(lambda: len(prewarmer.stored_bytes) == 2 and prewarmer.pending_bytes == 0)
+        stored = prewarmer.committed_bytes()
+        assert stored == sum(array.nbytes for key in prewarmer.stored_bytes for array in cache.get(key).values())
+
+        # With the stored results counted, one more job no longer fits; once the cache evicts them it does
+        prewarmer.memory_cap_bytes = stored + estimate - 1
+        schedule(prewarmer, 30)
+        assert not prewarmer.pending_keys and prewarmer.pending_bytes == 0
+        cache.clear()
+        prewarmer.pause()
+        schedule(prewarmer, 30)
+        assert prewarmer.committed_bytes() == estimate
+    finally:
+        prewarmer.stop()
+        prewarmer.thread.join(timeout=10)
+
+
+def test_pause_preempts_a_running_job(tmp_path):
+    cache = ResultCache(str(tmp_path / "Cache"))
+    prewarmer = RecordingPrewarmer(cache)
+    try:
+        schedule(prewarmer, 15, resolution=400, elements=64)
+        assert prewarmer.started.wait(timeout=30)
+        prewarmer.pause()
+        paused_at = prewarmer.checkpoints
+        time.sleep(0.3)
+        # At most the piece that was running when the pause came finishes; the job itself does not
+        assert prewarmer.checkpoints <= paused_at + 1 and not prewarmer.stored_bytes
+
+        prewarmer.resume()
+        wait_until(lambda: prewarmer.stored_bytes)
+        assert prewarmer.checkpoints > paused_at + 1
+    finally:
+        prewarmer.stop()
+        prewarmer.thread.join(timeout=10)
+
+
+def test_user_requests_run_with_prewarming_paused(controller):
+    observed = []
+    run = controller.pipeline.run
+    controller.pipeline.run = lambda targets: observed.append((tuple(targets), controller.prewarmer.idle.is_set())) or run(targets)
+
+    controller.show_taper_comparison()
+    controller.show_multi_beam()
+    controller.show_quantization()
+    assert {targets[0] for targets, _ in observed} >= {'taper_comparison', 'multi_beam', 'phase_quantization'}
+    assert not any(idle for _, idle in observed)
+    assert controller.prewarmer.idle.is_set()
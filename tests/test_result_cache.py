@@ -0,0 +1,49 @@
+import os
+import time
+
+import numpy as np
+
+from App.ResultCache import ResultCache
+
+
+def scene(value, size=1000):
+    return {'intensity': np.full(size, value, dtype=np.float64), 'angles': np.arange(3.0)}
+
+
+def age(cache, key, seconds_ago):
+    # Modification times record last use; set them explicitly so the order does not depend on timer resolution
+    stamp = time.time() - seconds_ago
+    os.utime(cache.entry_path(key), (stamp, stamp))
+
+
+def test_keys_are_canonical():
+    assert ResultCache.make_key({'a': 1, 'b': [1.0, 2]}) == ResultCache.make_key({'b': [1.0, 2], 'a': 1})
+    assert ResultCache.make_key({'a': 1}) != ResultCache.make_key({'a': 2})
+    assert ResultCache.make_key({'a': np.float64(0.5)}) == ResultCache.make_key({'a': 0.5})
+
+
+def test_round_trip_is_read_only(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put('key', scene(2.0))
+    loaded = cache.get('key')
+    np.testing.assert_array_equal(loaded['intensity'], scene(2.0)['intensity'])
+    assert not loaded['intensity'].flags.writeable
+    assert cache.get('missing') is None and 'missing' not in cache
+
+
+def test_eviction_drops_the_least_recently_used_entries(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10 ** 9)
+    for index, key in enumerate('abcd'):
+        cache.put(key, scene(index))
+        age(cache, key, 100 - index)  # a is the oldest
+    entry_bytes = cache.size() // 4
+
+    cache.get('a')  # Using an entry makes it the most recent
+    cache.max_bytes = 4 * entry_bytes
+    cache.put('e', scene(4.0))
+    assert sorted(key for key in 'abcde' if key in cache) == ['a', 'c', 'd', 'e']
+    assert cache.size() <= cache.max_bytes
+
+    cache.max_bytes = entry_bytes
+    cache.evict()
+    assert [key for key in 'abcde' if key in cache] == ['e']
@@ -0,0 +1,107 @@
+import asyncio
+import io
+import json
+
+import numpy as np
+import pytest
+
+from App.Service import SceneLRU, SimulationService
+
+ARRAYS_INFO = [{'num_elements': 8, 'spacing': 0.05, 'curvature': 0}]
+
+
+def payload(steering_angle=10.0, **options):
+    return dict({'frequency': 3e9, 'steering_angle': steering_angle, 'arrays_info': ARRAYS_INFO, 'resolution': 24}, **options)
+
+
+def route(service, method, path, body=None):
+    return asyncio.run(service.route(method, path, json.dumps(body).encode() if body is not None else b''))
+
+
+def test_requests_sharing_a_geometry_are_coalesced_and_cached():
+    async def scenario():
+        service = SimulationService(batch_window=0.05, workers=1)
+        first, second, repeated = await asyncio.gather(service.simulate(payload(10.0)), service.simulate(payload(-20.0)),
+                                                       service.simulate(payload(10.0)))
+        assert service.batches_run == 1 and repeated is first
+        assert await service.simulate(payload(-20.0)) is second
+        assert (service.cache.hits, service.batches_run) == (1, 1)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert not np.array_equal(first['intensity'], second['intensity'])
+    model = SimulationService.model_for(SimulationService.normalize_request(payload(-20.0)))
+    _, _, expected = model.simulate_multiple_arrays((-10, 10), (0, 10), 24)
+    np.testing.assert_allclose(second['intensity'], expected, atol=1e-9)
+
+
+def test_cache_bytes_match_the_memory_held_after_evicting_batched_scenes():
+    requests = [SimulationService.normalize_request(payload(angle)) for angle in (-30.0, 0.0, 30.0)]
+    scenes = SimulationService.compute_batch(requests)
+    # The adaptive profile of each steering angle has its own length, so room for two of the largest scenes
+    scene_bytes = max(sum(array.nbytes for name, array in scene.items() if name not in ('x', 'y')) for scene in scenes)
+    axes_bytes = scenes[0]['x'].nbytes + scenes[0]['y'].nbytes
+    cache = SceneLRU(max_bytes=axes_bytes + 2 * scene_bytes)
+    for index, scene in enumerate(scenes):
+        cache.put(index, scene)
+
+    assert list(cache.entries) == [1, 2]
+    # Counted against the buffers the arrays keep alive, so a view of a whole batch would show up here
+    held = {id(owner(array)): owner(array) for scene in cache.entries.values() for array in scene.values()}
+    assert cache.total_bytes == sum(array.nbytes for array in held.values()) <= cache.max_bytes
+
+
+def owner(array):
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+
+def test_outputs_are_npy_arrays_and_scenes_npz_archives():
+    service = SimulationService(batch_window=0)
+    status, content_type, content = route(service, 'POST', '/simulate', payload(output='array_factor'))
+    assert (status, content_type) == (200, 'application/octet-stream')
+    array_factor = np.load(io.BytesIO(content))
+
+    status, _, content = route(service, 'POST', '/simulate', payload(output='scene'))
+    scene = np.load(io.BytesIO(content))
+    assert status == 200 and set(scene.files) == {'x', 'y', 'intensity', 'angles', 'array_factor'}
+    np.testing.assert_array_equal(scene['array_factor'], array_factor)
+    assert scene['intensity'].shape == (24, 24)
+
+
+@pytest.mark.parametrize('body', [
+    payload(frequency=0), payload(frequency=-1e9), payload(frequency='3e9'), payload(steering_angle=None), payload(resolution=0),
+    payload(resolution=2.5), payload(x_range=[0]), payload(colour='red'), payload(output='phase'),
+    payload(arrays_info=[]), payload(arrays_info=[{'num_elements': 0, 'spacing': 0.05, 'curvature': 0}]),
+    payload(arrays_info=[{'num_elements': 8, 'spacing': 'wide', 'curvature': 0}]), [1, 2],
+], ids=lambda body: json.dumps(body)[:60])
+def test_invalid_requests_are_answered_with_400(body):
+    status, content_type, content = route(SimulationService(batch_window=0), 'POST', '/simulate', body)
+    assert (status, content_type) == (400, 'application/json') and json.loads(content)['error']
+
+
+def test_unknown_paths_and_methods():
+    service = SimulationService()
+    assert route(service, 'GET', '/simulate')[0] == 405
+    assert route(service, 'GET', '/elsewhere')[0] == 404
+    status, _, content = route(service, 'GET', '/health')
+    assert status == 200 and json.loads(content)['status'] == 'ok'
+
+
+@pytest.mark.parametrize('request_bytes', [b"GARBAGE\r\n\r\n", b"POST /simulate HTTP/1.1\r\nContent-Length: many\r\n\r\n"],
+                         ids=['request line', 'content length'])
+def test_malformed_requests_get_a_400_and_the_connection_closes(request_bytes):
+    async def exchange():
+        server = await asyncio.start_server(SimulationService().handle_connection, '127.0.0.1', 0)
+        async with server:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            writer.write(request_bytes)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), timeout=10)  # Reads to EOF, so the server must close
+            writer.close()
+            return response
+
+    head, _, body = asyncio.run(exchange()).partition(b'\r\n\r\n')
+    assert head.startswith(b"HTTP/1.1 400 Bad Request") and b"Connection: close" in head
+    assert json.loads(body)['error'].startswith("Malformed request")
@@ -0,0 +1,47 @@
+import glob
+import os
+
+import numpy as np
+
+from App.SimpleSimulation import BeamformingSimulator
+from App.Study import DEFAULT_SETTINGS, StudyStore, evaluate_point, run_study
+
+SPEC = {
+    'version': 1,
+    'design': 'cartesian',
+    'parameters': {'frequency': {'values': [3e9]}, 'steering_angle': {'range': [-30, 30], 'levels': 3},
+                   'num_elements': {'values': [8, 16]}, 'spacing': {'values': [0.5]}, 'curvature': {'values': [0, 20]}},
+    'settings': dict(DEFAULT_SETTINGS, arrays=2, resolution=24, chunk_size=5, profile_samples=181),
+}
+
+
+def test_interrupted_study_resumes_from_the_stored_chunks(tmp_path):
+    directory = str(tmp_path / "Study")
+    store = StudyStore(directory)
+    store.create(SPEC)
+    assert run_study(directory, workers=2) == 12
+    complete = store.results()
+
+    # An interrupted run: one committed chunk missing and another still being written
+    os.remove(store.chunk_path(1))
+    with open(f"{store.chunk_path(2)}.partial.tmp", 'wb') as partial:
+        partial.write(b"truncated")
+
+    assert run_study(directory, workers=2) == 5
+    assert not glob.glob(os.path.join(store.chunks_directory, "*.tmp"))
+    resumed = store.results()
+    for name in ('indices', 'steering_angle', 'main_lobe_angle', 'beamwidth_3db', 'peak_sidelobe_db'):
+        np.testing.assert_array_equal(resumed[name], complete[name])
+
+
+def test_profile_metrics_cover_every_array_of_the_map():
+    settings = SPEC['settings']
+    angles = np.linspace(-90, 90, settings['profile_samples'])
+    point = {'frequency': 3e9, 'steering_angle': 20.0, 'num_elements': 16, 'spacing': 0.5, 'curvature': 20.0}
+    _, array_factor, metrics = evaluate_point(point, settings, angles)
+
+    array_info = {'num_elements': 16, 'spacing': 0.05, 'curvature': 20.0}
+    model = BeamformingSimulator(3e9, 20.0, [array_info] * settings['arrays'])
+    expected = model.array_factor(model.all_element_positions(), model.k, 20.0, angles, model.all_element_amplitudes())
+    np.testing.assert_allclose(array_factor, expected / expected.max(), atol=1e-6)
+    assert metrics['main_lobe_angle'] == angles[expected.argmax()]
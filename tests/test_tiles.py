@@ -0,0 +1,54 @@
+import numpy as np
+
+from App.SimpleSimulation import BeamformingSimulator
+from App.Tiles import TileCache, TileGrid, compute_tile, tile_state
+
+
+def reference_tile_db(positions, k, steering_angle, x, y, dynamic_range_db=40.0):
+    # Element sum written out directly: each element radiates exp(j k r), phased to steer towards steering_angle
+    X, Y = np.meshgrid(x, y)
+    field = np.zeros(X.shape, complex)
+    for px, py, pz in positions:
+        distance = np.sqrt((X - px) ** 2 + (Y - py) ** 2 + pz ** 2)
+        field += np.exp(-1j * k * px * np.sin(np.radians(steering_angle))) * np.exp(1j * k * distance)
+    intensity = np.abs(field) ** 2 / len(positions) ** 2
+    return np.clip(10 * np.log10(np.maximum(intensity, 1e-12)), -dynamic_range_db, 0)
+
+
+def test_tiles_match_the_element_sum_and_join_without_gaps():
+    model = BeamformingSimulator(3e9, 25, [{'num_elements': 12, 'spacing': 0.05, 'curvature': 0}])
+    grid = TileGrid(tile_size=32, base_span=8.0)
+    state = tile_state(model)
+
+    x, y = grid.sample_coordinates(2, 1, 0)
+    np.testing.assert_allclose(x, 2.0 + (np.arange(32) + 0.5) / 16)
+    tile = compute_tile(grid, state, 2, 1, 0)
+    assert tile.dtype == np.float32
+    np.testing.assert_allclose(tile, reference_tile_db(model.all_element_positions(), model.k, 25, x, y), atol=1e-3)
+
+    # Horizontal neighbours continue the same sample lattice
+    next_x, _ = grid.sample_coordinates(2, 2, 0)
+    np.testing.assert_allclose(next_x[0] - x[-1], x[1] - x[0])
+
+
+def test_levels_and_visible_tiles():
+    grid = TileGrid(tile_size=128, base_span=10.0, min_level=0, max_level=6)
+    for level in range(7):
+        assert grid.level_for(grid.span(level) / grid.tile_size) == level
+    finest, coarsest = grid.meters_per_pixel_limits()
+    assert grid.level_for(finest * 1.01) == 6 and grid.level_for(finest / 4) == 6
+    assert grid.level_for(coarsest / 1.01) == 0 and grid.level_for(coarsest * 4) == 0
+
+    tiles = grid.visible_tiles(2, -1.0, 4.0, 0.5, 3.0)  # Spans of 2.5 m: columns -1..1, rows 0..1
+    assert sorted(tiles) == [(2, i, j) for i in (-1, 0, 1) for j in (0, 1)]
+    assert tiles[0] == (2, 0, 0)  # The tile under the view centre (1.5, 1.75) comes first
+
+
+def test_tile_cache_evicts_the_least_recently_used_tile():
+    cache = TileCache(capacity=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'b' not in cache and 'a' in cache and 'c' in cache
+    assert cache.get('b') is None
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from App.InteractionTrace import load_trace
+from App.TraceReplay import latency_report, replay_trace
+
+
+def test_recorded_events_replay_through_the_same_controls(qt_app, tmp_path, monkeypatch):
+    from App.Controller import MainController
+
+    monkeypatch.chdir(tmp_path)
+    trace_path = str(tmp_path / "Traces" / "session.jsonl")
+    controller = MainController(qt_app, trace_path=trace_path, cache_directory=str(tmp_path / "Cache"))
+    controller.prewarmer.stop()
+    controller.view.elements_number_SpinBox.setValue(12)
+    controller.view.array_curve_slider.setValue(25)
+    controller.view.steering_angle_slider.setValue(30)
+    controller.view.steering_angle_slider.sliderReleased.emit()
+    controller.thread_pool.waitForDone()
+    controller.prewarmer.thread.join(timeout=10)
+    controller.close_application()
+
+    _, events = load_trace(trace_path)
+    assert [(event['event'], event['value']) for event in events] == [('elements_number', 12), ('curvature', 25), ('steering_angle', 30)]
+    assert all(event['slot_ms'] >= 0 for event in events)
+    assert [event['t'] for event in events] == sorted(event['t'] for event in events)
+
+    results = replay_trace(trace_path, speed=0, cache_directory=str(tmp_path / "ReplayCache"))
+    assert [(result['event'], result['value']) for result in results] == [(event['event'], event['value']) for event in events]
+    assert [result['recorded_slot_ms'] for result in results] == [event['slot_ms'] for event in events]
+    report = latency_report(results)
+    assert report['all']['count'] == 3 and report['curvature']['count'] == 1
+
+
+def test_latency_report_percentiles():
+    results = [{'event': 'curvature', 'ms': float(ms)} for ms in range(1, 101)] + [{'event': 'taper', 'ms': 500.0}]
+    report = latency_report(results)
+    assert report['curvature'] == pytest.approx({'count': 100, 'p50': 50.5, 'p90': 90.1, 'p99': 99.01, 'max': 100.0})
+    assert report['taper'] == {'count': 1, 'p50': 500.0, 'p90': 500.0, 'p99': 500.0, 'max': 500.0}
+    assert report['all']['count'] == 101 and report['all']['max'] == 500.0
+    assert report['all']['p50'] == np.percentile(list(range(1, 101)) + [500], 50)
@@ -0,0 +1,27 @@
+import os
+import time
+
+import numpy as np
+
+from App.SimpleSimulation import BeamformingSimulator
+
+
+def test_volume_is_computed_off_the_gui_thread(controller, qt_app, tmp_path):
+    controller.VOLUME_SHAPE = (16, 12, 5)
+    controller.show_volume_view()
+    # The slot returns at once; the viewer opens when the job reports back
+    assert controller.volume_viewer is None and not controller.view.volume_view_button.isEnabled()
+
+    deadline = time.monotonic() + 30
+    while controller.volume_viewer is None:
+        assert time.monotonic() < deadline, "the volume job did not finish"
+        qt_app.processEvents()
+        time.sleep(0.01)
+    assert controller.view.volume_view_button.isEnabled()
+
+    model = BeamformingSimulator(controller.model.frequency, controller.model.steering_angle, controller.configurations)
+    expected = model.simulate_volume(controller.X_RANGE, controller.Y_RANGE, controller.VOLUME_Z_RANGE, controller.VOLUME_SHAPE,
+                                     str(tmp_path / "Expected.npy"))
+    np.testing.assert_allclose(controller.volume_viewer.volume, expected, atol=1e-6)
+    assert os.path.dirname(controller.volume_viewer.volume.filename) == str(tmp_path / "Output")
+    controller.volume_viewer.close()
@@ -0,0 +1,44 @@
+import numpy as np
+
+from App.SimpleSimulation import BeamformingSimulator
+
+ARRAYS_INFO = [{'num_elements': 10, 'spacing': 0.05, 'curvature': 0}, {'num_elements': 6, 'spacing': 0.04, 'curvature': 30}]
+ANGLES = np.linspace(-90, 90, 721)
+
+
+def fresh(frequency, steering_angle, arrays_info):
+    # A model whose workspace has never been used, as the reference for a reused one
+    return BeamformingSimulator(frequency, steering_angle, arrays_info)
+
+
+def test_steady_state_calls_reuse_the_workspace_and_match_a_fresh_one():
+    model = fresh(3e9, 10, ARRAYS_INFO)
+    _, _, first = model.simulate_multiple_arrays((-5, 5), (0, 5), 64)
+    first_profile = model.calculate_array_factor(ANGLES)
+    allocations = model.workspace.allocations
+
+    model.update_steering_angle(-35)
+    model.update_operating_frequency(2.5e9)
+    x, y, intensity = model.simulate_multiple_arrays((-5, 5), (0, 5), 64)
+    profile = model.calculate_array_factor(ANGLES)
+    assert model.workspace.allocations == allocations
+
+    reference = fresh(2.5e9, -35, ARRAYS_INFO)
+    np.testing.assert_allclose(intensity, reference.simulate_multiple_arrays((-5, 5), (0, 5), 64)[2], atol=1e-12)
+    np.testing.assert_allclose(profile, reference.calculate_array_factor(ANGLES), rtol=1e-12)
+    np.testing.assert_array_equal(x, np.linspace(-5, 5, 64))
+    assert not x.flags.writeable and not y.flags.writeable
+    # Results that callers keep are not workspace buffers overwritten by the next call
+    assert not np.allclose(first, intensity) and not np.allclose(first_profile, profile)
+    np.testing.assert_allclose(first, fresh(3e9, 10, ARRAYS_INFO).simulate_multiple_arrays((-5, 5), (0, 5), 64)[2], atol=1e-12)
+
+
+def test_changed_grid_and_arrays_rebuild_the_cached_state():
+    model = fresh(3e9, 0, ARRAYS_INFO)
+    model.simulate_multiple_arrays((-5, 5), (0, 5), 64)
+
+    arrays_info = [dict(ARRAYS_INFO[0], num_elements=14)]
+    model.arrays_info = arrays_info
+    _, _, intensity = model.simulate_multiple_arrays((-4, 4), (0, 8), 48)
+    np.testing.assert_allclose(intensity, fresh(3e9, 0, arrays_info).simulate_multiple_arrays((-4, 4), (0, 8), 48)[2], atol=1e-12)
+    assert len(model.geometry()[0]) == 14